@@ -18,9 +18,29 @@ Full Markdown formatting, hyperlinks, sections, and syntax highlighting
 __author__ = "William Yeh"
 __email__ = "william.pjyeh@gmail.com"
 
+import os
 import re
 import sys
+import copy
+import contextlib
+import io
 import json
+import marshal
+import mmap
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import functools
+import hashlib
+import itertools
+import posixpath
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from types import MappingProxyType
 import zipfile
 import shutil
 from pathlib import Path
@@ -31,6 +51,9 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.oxml.ns import qn
 from pptx.oxml import parse_xml
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import Image, ImagePart
 from lxml import etree
 
 # Try to import yaml
@@ -40,6 +63,13 @@ try:
 except ImportError:
     HAS_YAML = False
 
+# Try to import Pillow (downsampling/transcoding of embedded images)
+try:
+    from PIL import Image as PILImage
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
 # Default configuration
 DEFAULT_COLORS = {
     'primary': '1E2761',
@@ -68,6 +98,20 @@ DEFAULT_FONTS = {
     'code': 'Consolas',
 }
 
+# Point sizes for text the converter sizes explicitly (placeholder text
+# inherits its size from the slide master).
+DEFAULT_SIZES = {
+    'code': 11,   # fenced code blocks
+    'text': 15,   # free-positioned text on slides with code blocks/tables
+}
+
+# Indexes into the template's slide layouts (python-pptx default template:
+# 0 = Title Slide, 1 = Title and Content).
+DEFAULT_LAYOUTS = {
+    'section': 0,
+    'content': 1,
+}
+
 # Language keywords for syntax highlighting
 SYNTAX_KEYWORDS = {
     'python': ['def', 'class', 'import', 'from', 'return', 'if', 'elif', 'else', 'for', 'while', 
@@ -174,6 +218,9 @@ SYNTAX_KEYWORDS['lhs'] = SYNTAX_KEYWORDS['haskell']
 # The trailing group is `*` (not `+`) so single-column tables are valid GFM.
 _TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
 
+# A line holding only an image: ![alt](path) or ![alt](<path with spaces> "title").
+_IMAGE_LINE_RE = re.compile(r'^!\[([^\]]*)\]\(\s*(?:<([^>]+)>|(\S+))(?:\s+"[^"]*")?\s*\)$')
+
 # --- HackMD/Marp <style> block ---------------------------------------------
 #
 # Only a tiny, hand-picked subset of CSS is honored:
@@ -301,8 +348,9 @@ def extract_style_block(body):
     cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
     return style_text, cleaned
 
+@functools.lru_cache(maxsize=256)
 def hex_to_rgb(hex_color):
-    """Convert hex color to RGBColor"""
+    """Convert hex color to RGBColor (memoised; RGBColor is immutable)"""
     hex_color = hex_color.lstrip('#')
     return RGBColor(int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16))
 
@@ -435,8 +483,11 @@ def _apply_run_style(run, decls, colors, *, allow_color=True, dropped_colors=Non
             if hex_val is not None:
                 if _color_passes_contrast(hex_val, colors):
                     run.font.color.rgb = hex_to_rgb(hex_val)
-                elif dropped_colors is not None:
-                    dropped_colors.add(hex_val)
+                else:
+                    if dropped_colors is not None:
+                        dropped_colors.add(hex_val)
+                    _record_warning('dropped_color', f"<style> colour #{hex_val} fails the contrast "
+                                    f"guard and was not applied", color=hex_val)
     ff = decls.get('font-family')
     if ff:
         # Use the first family name, stripping quotes (CSS `font-family: "Foo", sans-serif`).
@@ -461,38 +512,331 @@ def _apply_run_style(run, decls, colors, *, allow_color=True, dropped_colors=Non
     if td and 'underline' in td.lower():
         run.font.underline = True
 
+# --- conversion warnings ---------------------------------------------------
+#
+# Problems the converter works around (a colour dropped by the contrast
+# guard, a hyperlink that couldn't be attached, ...) are recorded here for
+# the ConversionReport of the conversion running in this context, if any.
+# Most also print a human-readable line where they happen.
+_WARNINGS = contextvars.ContextVar('_WARNINGS', default=None)
+
+
+def _record_warning(kind, message, **details):
+    """Count warning `kind` with `message` in the active ConversionReport;
+    repeats of the same (kind, message) only raise its 'count'."""
+    warnings = _WARNINGS.get()
+    if warnings is None:
+        return
+    entry = warnings.get((kind, message))
+    if entry is None:
+        warnings[(kind, message)] = {'kind': kind, 'message': message, 'count': 1, **details}
+    else:
+        entry['count'] += 1
+
+
+def _warn(kind, message, **details):
+    """Print `message` as a warning and record it (see _record_warning())."""
+    print(f"Warning: {message}")
+    _record_warning(kind, message, **details)
+
+
+class ConfigError(ValueError):
+    """Raised when a config layer contains values the renderer cannot use."""
+
+
+# --- config discovery ------------------------------------------------------
+#
+# Config is layered, lowest precedence first:
+#   built-in defaults → working-directory config → input-directory config
+# Within one directory the first candidate that parses wins; JSON names are
+# tried before YAML ones (YAML only when PyYAML is importable).
+_JSON_CONFIG_NAMES = ('config.json', 'slides-config.json')
+_YAML_CONFIG_NAMES = ('config.yaml', 'config.yml', 'slides-config.yaml', 'slides-config.yml')
+
+# Batch conversions hit the same few directories over and over. Both caches
+# are process-wide and validated by stat, so edits between runs are picked up:
+#   _CONFIG_DIR_CACHE:   directory -> (dir mtime_ns, frozenset of file names)
+#   _CONFIG_PARSE_CACHE: (path, mtime_ns, size) -> parsed config (or None if
+#                        the file failed to parse)
+#   _THEME_CACHE:        layer fingerprint -> Theme, least recently used
+#                        first; in-memory configs (e.g. one per HTTP
+#                        request) are client-controlled, so it is capped at
+#                        _THEME_CACHE_MAX entries
+_CONFIG_DIR_CACHE = {}
+_CONFIG_PARSE_CACHE = {}
+_THEME_CACHE = collections.OrderedDict()
+_THEME_CACHE_MAX = 256
+
+
+def _cached_theme(fingerprint, build):
+    """The cached Theme for `fingerprint`, or `build()`'s result, cached."""
+    theme = _THEME_CACHE.get(fingerprint)
+    if theme is None:
+        theme = _THEME_CACHE[fingerprint] = build()
+        if len(_THEME_CACHE) > _THEME_CACHE_MAX:
+            _THEME_CACHE.popitem(last=False)
+    else:
+        _THEME_CACHE.move_to_end(fingerprint)
+    return theme
+
+
+def clear_config_cache():
+    """Forget every cached directory listing, parsed config file and theme."""
+    _CONFIG_DIR_CACHE.clear()
+    _CONFIG_PARSE_CACHE.clear()
+    _THEME_CACHE.clear()
+
+
+def _config_dir_entries(directory):
+    """Return the file names in `directory`, listing it at most once per change.
+
+    One `stat()` of the directory validates the cached listing; a directory's
+    mtime changes whenever an entry is added, removed or renamed.
+    """
+    key = str(directory)
+    try:
+        mtime = os.stat(key).st_mtime_ns
+    except OSError:
+        return frozenset()
+    cached = _CONFIG_DIR_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with os.scandir(key) as it:
+            names = frozenset(entry.name for entry in it)
+    except OSError:
+        names = frozenset()
+    _CONFIG_DIR_CACHE[key] = (mtime, names)
+    return names
+
+
+def _parse_config_file(config_path):
+    """Parse `config_path`, memoised on (path, mtime, size).
+
+    Returns (config, cache_key). `config` is None when the file cannot be
+    read or parsed; the failure is cached too, so a broken config only warns
+    once per edit.
+    """
+    try:
+        st = config_path.stat()
+    except OSError:
+        return None, None
+    key = (str(config_path), st.st_mtime_ns, st.st_size)
+    if key in _CONFIG_PARSE_CACHE:
+        return _CONFIG_PARSE_CACHE[key], key
+    try:
+        content = config_path.read_text()
+        if config_path.suffix in ['.yaml', '.yml']:
+            config = yaml.safe_load(content)
+        else:
+            config = json.loads(content)
+    except Exception as e:
+        print(f"Warning: Could not parse {config_path}: {e}")
+        _record_warning('config', f"could not parse {config_path}: {e}")
+        config = None
+    _CONFIG_PARSE_CACHE[key] = config
+    return config, key
+
+
+def _find_directory_config(directory, names):
+    """Return (config, path, cache_key) for the first parsable `names` entry."""
+    entries = _config_dir_entries(directory)
+    for name in names:
+        if name not in entries:
+            continue
+        config_path = Path(directory) / name
+        config, key = _parse_config_file(config_path)
+        if config is not None:
+            return config, config_path, key
+    return None, None, None
+
+
+def _config_layers(input_file):
+    """Return [(config, path, cache_key), ...] lowest precedence first."""
+    input_dir = Path(input_file).parent
+    cwd = Path.cwd()
+    layers = []
+    # Working-directory layer: only the bare `config.*` names, as before.
+    cwd_names = ('config.json',) + (('config.yaml', 'config.yml') if HAS_YAML else ())
+    dir_names = _JSON_CONFIG_NAMES + (_YAML_CONFIG_NAMES if HAS_YAML else ())
+    same_dir = os.path.abspath(input_dir) == os.path.abspath(cwd)
+    if not same_dir:
+        found = _find_directory_config(cwd, cwd_names)
+        if found[0] is not None:
+            layers.append(found)
+    found = _find_directory_config(input_dir, dir_names)
+    if found[0] is not None:
+        layers.append(found)
+    return layers
+
+
+def _merge_config(base, override):
+    """Recursively merge `override` into a copy of `base` (mappings only)."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def resolve_config(input_file):
+    """Locate and merge every config layer that applies to `input_file`.
+
+    Returns (config, sources): the merged dict (a private copy; mutating it
+    does not affect the cache) and the list of Paths it was built from,
+    lowest precedence first. `sources` is empty when only the built-in
+    defaults apply.
+    """
+    config = {}
+    sources = []
+    for layer, path, _ in _config_layers(input_file):
+        if not isinstance(layer, dict):
+            raise ConfigError(f"{path}: top level must be a mapping, got {type(layer).__name__}")
+        config = _merge_config(config, layer)
+        sources.append(path)
+    return config, sources
+
+
 def load_config(input_file):
     """Load configuration from JSON or YAML file"""
-    input_path = Path(input_file)
-    config_files = [
-        input_path.parent / 'config.json',
-        input_path.parent / 'slides-config.json',
-        Path.cwd() / 'config.json',
-    ]
-    
-    if HAS_YAML:
-        config_files.extend([
-            input_path.parent / 'config.yaml',
-            input_path.parent / 'config.yml',
-            input_path.parent / 'slides-config.yaml',
-            input_path.parent / 'slides-config.yml',
-            Path.cwd() / 'config.yaml',
-            Path.cwd() / 'config.yml',
-        ])
-    
-    for config_path in config_files:
-        if config_path.exists():
-            try:
-                content = config_path.read_text()
-                if config_path.suffix in ['.yaml', '.yml']:
-                    config = yaml.safe_load(content)
-                else:
-                    config = json.loads(content)
-                print(f"Loaded config from {config_path}")
-                return config
-            except Exception as e:
-                print(f"Warning: Could not parse {config_path}: {e}")
-    return {}
+    config, sources = resolve_config(input_file)
+    for source in sources:
+        print(f"Loaded config from {source}")
+    return config
+
+
+# --- resolved theme ----------------------------------------------------------
+
+_HEX_COLOR_RE = re.compile(r'^#?[0-9A-Fa-f]{6}$')
+
+
+@dataclass(frozen=True)
+class Theme:
+    """Validated, immutable rendering settings for one deck.
+
+    Built once per distinct set of config layers and shared by every slide
+    (and every deck that resolves to the same layers). Colors are normalised
+    to upper-case `RRGGBB` strings with their RGBColor values pre-parsed in
+    `rgb`; sizes are point values.
+    """
+    colors: MappingProxyType
+    fonts: MappingProxyType
+    sizes: MappingProxyType
+    layouts: MappingProxyType
+    rgb: MappingProxyType
+
+
+def _validate_colors(section, where, errors):
+    out = {}
+    for key, value in section.items():
+        if not isinstance(value, str) or not _HEX_COLOR_RE.match(value):
+            errors.append(f"{where}colors.{key}: expected 6-digit hex like '1E2761', got {value!r}")
+            continue
+        out[key] = value.lstrip('#').upper()
+    return out
+
+
+def _validate_fonts(section, where, errors):
+    out = {}
+    for key, value in section.items():
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"{where}fonts.{key}: expected a font name, got {value!r}")
+            continue
+        out[key] = value.strip()
+    return out
+
+
+def _validate_sizes(section, where, errors):
+    out = {}
+    for key, value in section.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            errors.append(f"{where}sizes.{key}: expected a positive point size, got {value!r}")
+            continue
+        out[key] = value
+    return out
+
+
+def _validate_layouts(section, where, errors):
+    out = {}
+    for key, value in section.items():
+        if key not in DEFAULT_LAYOUTS:
+            errors.append(f"{where}layouts.{key}: unknown slide kind (expected one of "
+                          f"{', '.join(DEFAULT_LAYOUTS)})")
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            errors.append(f"{where}layouts.{key}: expected a layout index >= 0, got {value!r}")
+            continue
+        out[key] = value
+    return out
+
+
+_THEME_SECTIONS = {
+    'colors': _validate_colors,
+    'fonts': _validate_fonts,
+    'sizes': _validate_sizes,
+    'layouts': _validate_layouts,
+}
+
+
+def build_theme(*layers):
+    """Validate and merge config `layers` (lowest precedence first) into a Theme.
+
+    Each layer is a config mapping, or a (mapping, label) pair where `label`
+    names the source in error messages. All problems are collected and
+    raised together as one ConfigError, before any rendering starts.
+    """
+    merged = {name: {} for name in _THEME_SECTIONS}
+    errors = []
+    for layer in layers:
+        label = None
+        if isinstance(layer, tuple):
+            layer, label = layer
+        where = f"{label}: " if label else ''
+        if not layer:
+            continue
+        if not isinstance(layer, dict):
+            errors.append(f"{where}top level must be a mapping, got {type(layer).__name__}")
+            continue
+        for name, validate in _THEME_SECTIONS.items():
+            section = layer.get(name)
+            if section is None:
+                continue
+            if not isinstance(section, dict):
+                errors.append(f"{where}{name}: expected a mapping, got {type(section).__name__}")
+                continue
+            merged[name].update(validate(section, where, errors))
+    if errors:
+        raise ConfigError('invalid config:\n  ' + '\n  '.join(errors))
+
+    colors = {**DEFAULT_COLORS, **merged['colors']}
+    return Theme(
+        colors=MappingProxyType(colors),
+        fonts=MappingProxyType({**DEFAULT_FONTS, **merged['fonts']}),
+        sizes=MappingProxyType({**DEFAULT_SIZES, **merged['sizes']}),
+        layouts=MappingProxyType({**DEFAULT_LAYOUTS, **merged['layouts']}),
+        rgb=MappingProxyType({k: hex_to_rgb(v) for k, v in colors.items()}),
+    )
+
+
+def resolve_theme(input_file, deck_config=None):
+    """Return (theme, sources) for `input_file`, reusing cached themes.
+
+    `deck_config` is the deck's own frontmatter theme block (see
+    parse_frontmatter_theme); it is layered over the config files for this
+    deck only. Decks whose layers are the same unchanged files and the same
+    frontmatter share one Theme object, so a batch run validates each
+    distinct combination once.
+    """
+    layers = _config_layers(input_file)
+    sources = [path for _, path, _ in layers]
+    labelled = [(layer, str(path)) for layer, path, _ in layers]
+    fingerprint = tuple(key for _, _, key in layers)
+    if deck_config:
+        labelled.append((deck_config, f"{input_file} frontmatter"))
+        fingerprint += (json.dumps(deck_config, sort_keys=True, default=str),)
+    return _cached_theme(fingerprint, lambda: build_theme(*labelled)), sources
 
 def parse_inline_formatting(text):
     """Parse markdown inline formatting and return segments"""
@@ -627,59 +971,585 @@ def highlight_code(code, lang, colors):
     
     return merged
 
+# --- Parsed-slide IR -----------------------------------------------------------
+#
+# parse_slide() returns a Slide whose `content` holds Bullet, Numbered,
+# CodeBlock, Table and ImageRef nodes. They are __slots__ objects (a fraction
+# of the size of the equivalent dicts) with interned type tags, and they
+# read like the dicts the parser used to return — `item['type']`,
+# `slide.get('notes')`, `slide['section_idx'] = n` — so the renderers take
+# either. Speaker notes stay plain strings.
+
+BULLET = sys.intern('bullet')
+NUMBERED = sys.intern('numbered')
+TEXT = sys.intern('text')
+CODEBLOCK = sys.intern('codeblock')
+TABLE = sys.intern('table')
+IMAGE = sys.intern('image')
+
+
+class _Node:
+    """Base of the IR classes: fixed fields in slots, read like a mapping."""
+
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return [getattr(self, f) for f in self._fields]
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in self._fields]
+
+    def replace(self, **changes):
+        """A copy with `changes` applied."""
+        new = object.__new__(type(self))
+        for f in self._fields:
+            setattr(new, f, changes[f] if f in changes else getattr(self, f))
+        return new
+
+    def __eq__(self, other):
+        if isinstance(other, _Node):
+            return type(self) is type(other) and self.values() == other.values()
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+class Bullet(_Node):
+    """A bullet, or with `type` TEXT a plain paragraph."""
+
+    __slots__ = _fields = ('type', 'text', 'indent')
+
+    def __init__(self, text, indent=0, type=BULLET):
+        self.type, self.text, self.indent = type, text, indent
+
+
+class Numbered(_Node):
+    """A numbered list item; `number` is the number as written."""
+
+    __slots__ = _fields = ('type', 'number', 'text', 'indent')
+
+    def __init__(self, number, text, indent=0):
+        self.type, self.number, self.text, self.indent = NUMBERED, number, text, indent
+
+
+class CodeBlock(_Node):
+    __slots__ = _fields = ('type', 'lang', 'content')
+
+    def __init__(self, lang, content):
+        self.type, self.lang, self.content = CODEBLOCK, lang, content
+
+
+class Table(_Node):
+    """A GFM table: `header` and each of `rows` are lists of cell strings."""
+
+    __slots__ = _fields = ('type', 'header', 'rows')
+
+    def __init__(self, header, rows):
+        self.type, self.header, self.rows = TABLE, header, rows
+
+
+class ImageRef(_Node):
+    """A standalone image line: alt text and the path or URL as written."""
+
+    __slots__ = _fields = ('type', 'alt', 'src')
+
+    def __init__(self, alt, src):
+        self.type, self.alt, self.src = IMAGE, alt, src
+
+
+class Slide(_Node):
+    """One slide: title and subtitle lines, content nodes and speaker notes,
+    plus the section it belongs to (set by the deck parser)."""
+
+    __slots__ = _fields = ('title', 'subtitle', 'content', 'notes', 'is_section',
+                           'section', 'section_idx')
+
+    def __init__(self, title=None, subtitle=None, content=None, notes=None, is_section=False,
+                 section=None, section_idx=0):
+        self.title, self.subtitle, self.notes = title, subtitle, notes
+        self.content = [] if content is None else content
+        self.is_section, self.section, self.section_idx = is_section, section, section_idx
+
+
+def as_node(item):
+    """`item` as an IR node; dict-shaped items (as older callers build
+    them) are converted."""
+    if isinstance(item, _Node):
+        return item
+    kind = item['type']
+    if kind == NUMBERED:
+        return Numbered(item.get('number', '1'), item['text'], item.get('indent', 0))
+    if kind == CODEBLOCK:
+        return CodeBlock(item.get('lang', ''), item['content'])
+    if kind == TABLE:
+        return Table(item['header'], item.get('rows', []))
+    if kind == IMAGE:
+        return ImageRef(item.get('alt', ''), item['src'])
+    return Bullet(item['text'], item.get('indent', 0), sys.intern(kind))
+
+
+def _as_table(table_data):
+    # Table dicts may come without a 'type'.
+    if isinstance(table_data, Table):
+        return table_data
+    return Table(table_data['header'], table_data.get('rows', []))
+
+
+def as_slide(slide_data):
+    """`slide_data` as a Slide; a dict-shaped slide is converted (a missing
+    section is named 'Section')."""
+    if isinstance(slide_data, Slide):
+        return slide_data
+    return Slide(slide_data.get('title'), slide_data.get('subtitle'),
+                 [as_node(item) for item in slide_data.get('content', [])],
+                 slide_data.get('notes'), slide_data.get('is_section', False),
+                 slide_data.get('section', 'Section'), slide_data.get('section_idx', 0))
+
+
+# Compact serialisation: marshal of plain tuples, each node led by its
+# index in _NODE_TAGS. Bump _IR_FORMAT when the layout changes.
+_IR_FORMAT = 1
+_NODE_TAGS = (BULLET, TEXT, NUMBERED, CODEBLOCK, TABLE, IMAGE)
+_TAG_INDEX = {tag: i for i, tag in enumerate(_NODE_TAGS)}
+# Per tag: the fields stored after the tag, and how to rebuild the node
+# from them.
+_NODE_FIELDS = tuple(cls._fields[1:] for cls in (Bullet, Bullet, Numbered, CodeBlock, Table, ImageRef))
+_NODE_FACTORIES = (functools.partial(Bullet, type=BULLET), functools.partial(Bullet, type=TEXT),
+                   Numbered, CodeBlock, Table, ImageRef)
+
+
+def dump_slides(slides):
+    """Serialise parsed `slides` (with their `.style_overrides` and
+    `.theme_config`) to bytes for load_slides(). Dict-shaped slides and
+    items are accepted too. The format is specific to the Python version."""
+    out = []
+    for slide in map(as_slide, slides):
+        items = []
+        for item in slide.content:
+            tag = _TAG_INDEX[item.type]
+            items.append((tag, *map(item.__getattribute__, _NODE_FIELDS[tag])))
+        out.append((slide.title, slide.subtitle, slide.notes, slide.is_section,
+                    slide.section, slide.section_idx, items))
+    return marshal.dumps((_IR_FORMAT, getattr(slides, 'style_overrides', {}),
+                          getattr(slides, 'theme_config', {}), out))
+
+
+def load_slides(data):
+    """Rebuild the slide list written by dump_slides(). Raises ValueError
+    if `data` isn't in the current format."""
+    try:
+        version, style_overrides, theme_config, out = marshal.loads(data)
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"not a serialised slide list: {e}") from None
+    if version != _IR_FORMAT:
+        raise ValueError(f"slide list format {version}, expected {_IR_FORMAT}")
+    slides = _SlidesWithStyle()
+    slides.style_overrides, slides.theme_config = style_overrides, theme_config
+    factories = _NODE_FACTORIES
+    for title, subtitle, notes, is_section, section, section_idx, items in out:
+        content = [factories[values[0]](*values[1:]) for values in items]
+        slides.append(Slide(title, subtitle, content, notes, is_section, section, section_idx))
+    return slides
+
+
 class _SlidesWithStyle(list):
-    """List subclass that carries parsed CSS overrides alongside the slides.
+    """List subclass that carries deck-level settings alongside the slides.
 
     Existing callers iterate over it like a list (it *is* a list); the
-    renderer reads `.style_overrides` to pick up deck-level theming.
+    renderer reads `.style_overrides` to pick up deck-level CSS theming and
+    `.theme_config` for the frontmatter `pptx:` block.
     """
     style_overrides: dict
+    theme_config: dict
 
 
-def parse_markdown(content):
-    """Parse HackMD/Marp markdown into slides"""
-    # Remove YAML frontmatter if present
-    if content.startswith('---'):
-        end_idx = content.find('---', 3)
-        if end_idx != -1:
-            content = content[end_idx + 3:].strip()
+# Frontmatter key holding per-deck theme settings. Namespaced so it can't
+# collide with HackMD/Marp keys like `theme:` or `slideOptions:`.
+FRONTMATTER_THEME_KEY = 'pptx'
+_FRONTMATTER_THEME_RE = re.compile(r'(?m)^pptx[ \t]*:')
+
+
+def parse_frontmatter_theme(frontmatter):
+    """Return the `pptx:` mapping from a frontmatter block (without fences).
+
+    The block looks like a config file's top level:
+
+        pptx:
+          colors: {accent: FF6600}
+          fonts: {code: Fira Code}
+          sizes: {code: 10}
+
+    Most decks carry only title/tags metadata, so a line-anchored regex
+    check runs first and YAML is parsed only when a `pptx:` key is present.
+    Malformed YAML or a non-mapping value warns and yields {}.
+    """
+    if not frontmatter or not _FRONTMATTER_THEME_RE.search(frontmatter):
+        return {}
+    if not HAS_YAML:
+        _warn('frontmatter', "frontmatter `pptx:` block ignored (PyYAML not installed)")
+        return {}
+    try:
+        data = yaml.safe_load(frontmatter)
+    except yaml.YAMLError as e:
+        _warn('frontmatter', f"Could not parse frontmatter: {e}")
+        return {}
+    section = data.get(FRONTMATTER_THEME_KEY) if isinstance(data, dict) else None
+    if section is None:
+        return {}
+    if not isinstance(section, dict):
+        _warn('frontmatter', f"frontmatter `{FRONTMATTER_THEME_KEY}:` must be a mapping; ignored")
+        return {}
+    return section
+
+
+# Slide-splitting patterns, compiled for both `str` input and `bytes`-like
+# buffers (mmap). The parser works on offsets into one buffer and only
+# copies out the text of one slide at a time.
+_SECTION_SEP_RE = {str: re.compile(r'\n---\n'), bytes: re.compile(rb'\n---\n')}
+_SUB_SLIDE_SEP_RE = {str: re.compile(r'\n----\n'), bytes: re.compile(rb'\n----\n')}
+_HEADING_LINE_RE = {str: re.compile(r'(?m)^(#{1,3})\s'), bytes: re.compile(rb'(?m)^(#{1,3})\s')}
+_HEADING_AT_RE = {str: re.compile(r'#{1,3}\s'), bytes: re.compile(rb'#{1,3}\s')}
+_STYLE_SPAN_RE = {
+    str: _STYLE_TAG_RE,
+    bytes: re.compile(rb'<style\b[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL),
+}
+_NON_SPACE_RE = {str: re.compile(r'\S'), bytes: re.compile(rb'\S')}
+_BLANK_RUN_RE = re.compile(r'\n{3,}')
+
+
+def _split_parts(parts, sep_res):
+    """Split a logical text on a separator pattern, by offset.
+
+    `parts` is a list of (buf, start, end) pieces that together form the
+    text; each `buf` is a `str` or a bytes-like buffer and is searched with
+    the matching pattern from `sep_res`. Yields one list of pieces per chunk
+    between separators. Separators never straddle two parts (see
+    _parse_buffer), so each part can be searched on its own.
+    """
+    current = []
+    for buf, start, end in parts:
+        sep_re = sep_res[str if isinstance(buf, str) else bytes]
+        pos = start
+        for m in sep_re.finditer(buf, start, end):
+            current.append((buf, pos, m.start()))
+            yield current
+            current = []
+            pos = m.end()
+        current.append((buf, pos, end))
+    yield current
+
+
+def _join_parts(parts):
+    """Materialise the text of (buf, start, end) pieces, decoding bytes as UTF-8."""
+    return ''.join(
+        buf[s:e] if isinstance(buf, str) else buf[s:e].decode('utf-8')
+        for buf, s, e in parts
+    )
+
+
+def _strip_span(buf, start, end, kind):
+    """Shrink [start, end) past surrounding whitespace, as str.strip() would
+    remove it from the decoded text, without copying."""
+    if kind is str:
+        m = _NON_SPACE_RE[str].search(buf, start, end)
+        if not m:
+            return start, start
+        start = m.start()
+        while end > start and buf[end - 1].isspace():
+            end -= 1
+        return start, end
+    # UTF-8: step a whole character at a time so non-ASCII whitespace
+    # (U+3000, U+00A0, ...) is stripped too.
+    while start < end:
+        lead = buf[start]
+        width = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+        if not buf[start:start + width].decode('utf-8', 'replace').isspace():
+            break
+        start += width
+    while end > start:
+        char_start = end - 1
+        while char_start > start and 0x80 <= buf[char_start] < 0xC0:
+            char_start -= 1
+        if not buf[char_start:end].decode('utf-8', 'replace').isspace():
+            break
+        end = char_start
+    return start, end
+
+
+def _parse_buffer(buf, on_consumed=None, *, collapse_blank_runs=False):
+    """Parse a whole deck held in `buf` (a `str`, or bytes/mmap of UTF-8).
+
+    Frontmatter, the top-of-deck <style> block and slide boundaries are all
+    located as offsets into `buf`; only each slide's own text is decoded and
+    handed to parse_slide, so peak memory stays close to one copy of the
+    input plus the parsed result. `on_consumed(offset)`, if given, is called
+    as each slide is copied out, once `buf[:offset]` will not be read again.
+    `collapse_blank_runs` forces the blank-line collapsing that a lifted
+    style block normally triggers.
+    """
+    kind = str if isinstance(buf, str) else bytes
+    fence = '---' if kind is str else b'---'
+
+    start, end = 0, len(buf)
 
-    # Lift the top-of-deck <style> block (if any) before slide splitting
-    # so its lines don't leak into the first slide's content.
-    style_text, content = extract_style_block(content)
-    style_overrides = parse_style_block(style_text) if style_text else {}
+    # Remove YAML frontmatter if present, keeping its `pptx:` theme block
+    theme_config = {}
+    if buf[:3] == fence:
+        end_idx = buf.find(fence, 3)
+        if end_idx != -1:
+            theme_config = parse_frontmatter_theme(_join_parts([(buf, 3, end_idx)]))
+            start, end = _strip_span(buf, end_idx + 3, end, kind)
+
+    # Lift the top-of-deck <style> block (same rule as extract_style_block:
+    # it must precede the first heading) so its lines don't leak into the
+    # first slide's content. Only the text before the first heading is
+    # copied out to cut the block; everything after stays in `buf`.
+    parts = [(buf, start, end)]
+    style_overrides = {}
+    if start < end:
+        if _HEADING_AT_RE[kind].match(buf, start, end):
+            first_heading = start
+        else:
+            m = _HEADING_LINE_RE[kind].search(buf, start, end)
+            first_heading = m.start() if m else end
+        m = _STYLE_SPAN_RE[kind].search(buf, start, first_heading)
+        if m:
+            style_overrides = parse_style_block(_join_parts([(buf, m.start(), m.end())]))
+            head = _join_parts([(buf, start, m.start()), (buf, m.end(), first_heading)])
+            head = head.lstrip('\n')
+            # The tail starts at a heading line, so no separator can span
+            # the head/tail boundary.
+            parts = [(head, 0, len(head)), (buf, first_heading, end)]
+    collapse_blank_runs = collapse_blank_runs or len(parts) > 1
 
-    # Split by major sections (---)
-    sections = re.split(r'\n---\n', content)
     slides = _SlidesWithStyle()
     slides.style_overrides = style_overrides
+    slides.theme_config = theme_config
     current_section = None
     section_idx = 0
-    
-    for section in sections:
-        # Split by sub-slides (----)
-        sub_slides = re.split(r'\n----\n', section)
-        
-        for i, slide_content in enumerate(sub_slides):
-            slide = parse_slide(slide_content.strip())
-            
+
+    # Split by major sections (---), then by sub-slides (----)
+    for section in _split_parts(parts, _SECTION_SEP_RE):
+        for i, slide_parts in enumerate(_split_parts(section, _SUB_SLIDE_SEP_RE)):
+            slide_text = _join_parts(slide_parts)
+            if on_consumed is not None and slide_parts[-1][0] is buf:
+                on_consumed(slide_parts[-1][2])
+            if collapse_blank_runs:
+                # Lifting the style block collapses blank-line runs deck-wide.
+                slide_text = _BLANK_RUN_RE.sub('\n\n', slide_text)
+            slide = parse_slide(slide_text.strip())
+
             # Skip empty slides
-            if not slide['title'] and not slide['content']:
+            if not slide.title and not slide.content:
                 continue
-            
+
             # Determine if this is a section slide
-            if i == 0 and slide['title'] and slide['title'].startswith('# '):
-                current_section = slide['title'].lstrip('# ').strip()
-                has_bullet_content = any(item['type'] in ['bullet', 'numbered', 'codeblock'] for item in slide['content'])
-                slide['is_section'] = not has_bullet_content
+            if i == 0 and slide.title and slide.title.startswith('# '):
+                current_section = slide.title.lstrip('# ').strip()
+                has_bullet_content = any(item.type in (BULLET, NUMBERED, CODEBLOCK) for item in slide.content)
+                slide.is_section = not has_bullet_content
                 section_idx += 1
-            
-            slide['section'] = current_section
-            slide['section_idx'] = section_idx
+
+            slide.section = current_section
+            slide.section_idx = section_idx
             slides.append(slide)
-    
+
+    return slides
+
+
+def parse_markdown(content):
+    """Parse HackMD/Marp markdown into slides"""
+    return _parse_buffer(content)
+
+
+def iter_markdown_sections(texts, *, frontmatter=None, style_block=None):
+    """Parse `texts` as if they were one deck with each text a `---` section.
+
+    Gives the same slides as parse_markdown() on the joined document
+    (frontmatter, then style block, then the texts joined by `---` lines)
+    without building it. Yields one slide list per text, in order, each
+    carrying the deck-level `.style_overrides` and `.theme_config`; section
+    indexes continue across texts as in the joined document.
+    `frontmatter` is the YAML without its fences and `style_block` the whole
+    `<style>...</style>` element. Each text should begin at its first
+    heading, as merge.py's flattened decks do.
+    """
+    style_overrides = parse_style_block(style_block) if style_block else {}
+    theme_config = parse_frontmatter_theme(frontmatter) if frontmatter else {}
+    section, section_idx = None, 0
+    texts = iter(texts)
+    text = next(texts, None)
+    first = True
+    while text is not None:
+        following = next(texts, None)
+        # In the joined document each section keeps the newlines its `---`
+        # separators leave behind: one before it (unless first) and one
+        # after it. The document's own trailing newline is stripped along
+        # with the frontmatter, if there is one.
+        last = following is None
+        text = ('' if first else '\n') + text + ('' if last and frontmatter else '\n')
+        first = False
+        part = _parse_buffer(text, collapse_blank_runs=style_block is not None)
+        for slide in part:
+            if slide.section_idx == 0:
+                # Slides before the text's first section belong to the
+                # previous text's last section, as in the joined document.
+                slide.section = section
+            slide.section_idx += section_idx
+        if part:
+            section, section_idx = part[-1].section, part[-1].section_idx
+        part.style_overrides = style_overrides
+        part.theme_config = theme_config
+        yield part
+        text = following
+
+
+def parse_markdown_sections(texts, *, frontmatter=None, style_block=None):
+    """iter_markdown_sections() collected into a single slide list."""
+    slides = _SlidesWithStyle()
+    slides.style_overrides, slides.theme_config = {}, {}
+    for part in iter_markdown_sections(texts, frontmatter=frontmatter, style_block=style_block):
+        slides.extend(part)
+        slides.style_overrides, slides.theme_config = part.style_overrides, part.theme_config
     return slides
 
+
+def parse_markdown_file(path):
+    """Parse a UTF-8 markdown file without reading it into one big string.
+
+    The file is memory-mapped and parsed by offset (see _parse_buffer), so
+    multi-hundred-MB generated decks never exist as a full `str` alongside
+    their frontmatter-stripped and re-split copies. Pages already parsed are
+    dropped from the mapping as the parser moves on, so the input does not
+    stay resident next to the parsed slides. Produces the same result as
+    `parse_markdown(Path(path).read_text(encoding='utf-8'))`; files with
+    CRLF or CR line endings are decoded and normalised to LF like
+    read_text() does, so they are parsed from one full `str` copy.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _parse_buffer(b'')  # mmap refuses zero-length files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf.find(b'\r') != -1:
+                text = buf[:].decode('utf-8')
+                return _parse_buffer(text.replace('\r\n', '\n').replace('\r', '\n'))
+            on_consumed = None
+            if hasattr(mmap, 'MADV_DONTNEED'):
+                buf.madvise(mmap.MADV_SEQUENTIAL)
+
+                released = [0]
+
+                def on_consumed(offset):
+                    # Read-only file mapping: dropped pages are simply
+                    # re-read from disk if they are ever touched again.
+                    aligned = offset - offset % mmap.PAGESIZE
+                    if aligned > released[0]:
+                        buf.madvise(mmap.MADV_DONTNEED, released[0], aligned - released[0])
+                        released[0] = aligned
+            return _parse_buffer(buf, on_consumed)
+
+@functools.lru_cache(maxsize=None)
+def parser_version():
+    """Digest identifying the parser: convert.py's source, the IR format
+    and the Python and PyYAML versions (marshal's format and frontmatter
+    parsing depend on them). ParseCache entries are keyed on it."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(f"{_IR_FORMAT} {sys.version_info[:2]} {yaml.__version__ if HAS_YAML else None}".encode())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of parse_markdown_file() results.
+
+    Entries hold dump_slides() output plus the warnings the parse raised
+    (see _record_warning()), which are printed and recorded again on a hit
+    so a cached deck reports the same as a freshly parsed one. They are
+    named by a digest of the markdown file's bytes and parser_version(), so
+    editing the deck or upgrading the converter misses while a theme or
+    config change, which doesn't affect parsing, hits. Unreadable entries
+    are parsed again and rewritten. `hits` and `misses` count lookups.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.hits = self.misses = 0
+
+    def parse_file(self, path):
+        """Parsed slides for markdown file `path`, from the cache if possible."""
+        digest = hashlib.sha256(parser_version().encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        entry = self.cache_dir / f'{digest.hexdigest()}.slides'
+        try:
+            data, warnings = marshal.loads(entry.read_bytes())
+            slides = load_slides(data)
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+        else:
+            self.hits += 1
+            self._record(warnings, _warn)
+            return slides
+        self.misses += 1
+        warnings = {}
+        token = _WARNINGS.set(warnings)
+        try:
+            slides = parse_markdown_file(path)
+        finally:
+            _WARNINGS.reset(token)
+        warnings = list(warnings.values())
+        self._record(warnings, _record_warning)  # already printed by the parse
+        # Write-then-rename so concurrent conversions never see a partial file.
+        tmp = entry.with_name(f'{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            data = marshal.dumps((dump_slides(slides), warnings))
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, entry)
+        except (OSError, ValueError):  # ValueError: frontmatter marshal can't store
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+        return slides
+
+    @staticmethod
+    def _record(warnings, record):
+        for warning in warnings:
+            details = {k: v for k, v in warning.items() if k not in ('kind', 'message', 'count')}
+            for _ in range(warning['count']):
+                record(warning['kind'], warning['message'], **details)
+
+
 def _split_table_row(line):
     """Split a GFM table row on unescaped '|' and trim outer pipes."""
     # Temporarily mask escaped pipes so we can split on real ones
@@ -696,13 +1566,8 @@ def _split_table_row(line):
 def parse_slide(content):
     """Parse individual slide content"""
     lines = content.split('\n')
-    slide = {
-        'title': None,
-        'subtitle': None,
-        'content': [],
-        'notes': None,
-        'is_section': False,
-    }
+    slide = Slide()
+    items = slide.content
 
     in_note = False
     in_code_block = False
@@ -736,11 +1601,7 @@ def parse_slide(content):
                 code_block_content = []
             else:
                 in_code_block = False
-                slide['content'].append({
-                    'type': 'codeblock',
-                    'lang': code_block_lang,
-                    'content': '\n'.join(code_block_content),
-                })
+                items.append(CodeBlock(code_block_lang, '\n'.join(code_block_content)))
             i += 1
             continue
 
@@ -751,15 +1612,15 @@ def parse_slide(content):
 
         # Parse headers
         if line.startswith('# '):
-            slide['title'] = line
+            slide.title = line
             i += 1
             continue
         if line.startswith('## '):
-            slide['title'] = line
+            slide.title = line
             i += 1
             continue
         if line.startswith('### '):
-            slide['subtitle'] = line[4:].strip()
+            slide.subtitle = line[4:].strip()
             i += 1
             continue
 
@@ -778,10 +1639,17 @@ def parse_slide(content):
                     break  # non-table content ends the table
                 rows.append(_split_table_row(cur))
                 j += 1
-            slide['content'].append({'type': 'table', 'header': header, 'rows': rows})
+            items.append(Table(header, rows))
             i = j
             continue
 
+        # Standalone images
+        image_match = _IMAGE_LINE_RE.match(stripped)
+        if image_match:
+            items.append(ImageRef(image_match.group(1), image_match.group(2) or image_match.group(3)))
+            i += 1
+            continue
+
         # Parse bullet list items (- or *)
         bullet_match = re.match(r'^(\s*)[-*]\s+(.+)', line)
         if bullet_match:
@@ -792,7 +1660,7 @@ def parse_slide(content):
                 text = '☐ ' + text[4:]
             elif text.startswith('[x] ') or text.startswith('[X] '):
                 text = '☑ ' + text[4:]
-            slide['content'].append({'type': 'bullet', 'text': text, 'indent': indent})
+            items.append(Bullet(text, indent))
             i += 1
             continue
 
@@ -802,17 +1670,17 @@ def parse_slide(content):
             indent = len(numbered_match.group(1)) // 2
             num = numbered_match.group(2)
             text = numbered_match.group(3)
-            slide['content'].append({'type': 'numbered', 'number': num, 'text': text, 'indent': indent})
+            items.append(Numbered(num, text, indent))
             i += 1
             continue
 
         # Plain text (NOT a bullet - no bullet formatting)
         if stripped:
-            slide['content'].append({'type': 'text', 'text': stripped, 'indent': 0})
+            items.append(Bullet(stripped, 0, TEXT))
         i += 1
 
     if note_content:
-        slide['notes'] = '\n'.join(note_content)
+        slide.notes = '\n'.join(note_content)
 
     return slide
 
@@ -823,8 +1691,9 @@ def add_hyperlink(run, url):
         hlinkClick = etree.Element(qn('a:hlinkClick'))
         hlinkClick.set(qn('r:id'), rId)
         run._r.get_or_add_rPr().append(hlinkClick)
-    except Exception:
-        pass  # Hyperlink failed silently
+    except Exception as e:
+        # The run keeps its link styling, just isn't clickable.
+        _record_warning('hyperlink', f"could not add hyperlink {url!r}: {e}", url=url)
 
 def add_formatted_runs(paragraph, text, colors, fonts):
     """Add formatted text runs to a paragraph based on markdown formatting"""
@@ -893,46 +1762,546 @@ def style_table_cell(cell, text, *, is_header, colors, fonts):
                 run.font.name = fonts['body']
 
 
-def add_table_to_slide(slide, table_data, top, colors, fonts):
-    """Render a parsed table dict onto `slide` starting at vertical offset `top`.
+# Characters XML 1.0 can't carry; python-pptx writes them as _xHHHH_ escapes.
+_XML_CONTROL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
 
-    `top` is an EMU length (e.g. the result of `Inches(1.5)`), not a float.
-    Returns the next y-offset (EMU) the caller should continue from.
 
-    Precondition: `table_data['header']` is a non-empty list. The parser
-    guarantees this — a header-less table dict is never emitted.
+_TBL_NSDECLS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+
+
+def _xml_text(text):
+    """`text` escaped for XML character data and double-quoted attribute values."""
+    text = (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;'))
+    return _XML_CONTROL_RE.sub(lambda m: f'_x{ord(m.group()):04X}_', text)
+
+
+class _TableCellXml:
+    """Builds `<a:tc>` markup for one table's cells from shared templates.
+
+    Produces the same formatting as style_table_cell() (accent-filled
+    header with bold white runs; body runs in darkText unless inline code
+    or a link chose a colour) but as strings: the run properties for each
+    (header/body, segment type) pair and the two cell-property blocks are
+    rendered once per table, not once per run. Links are related to
+    `part` once per distinct URL.
     """
-    header = table_data['header']
-    rows = table_data.get('rows', [])
-    assert header, "table_data['header'] must be non-empty (parser invariant)"
 
-    n_cols = len(header)
-    n_rows = 1 + len(rows)
-    # Row height minimum; python-pptx auto-fit will expand if a cell is taller.
-    height = Inches(0.45 * n_rows)
+    def __init__(self, part, colors, fonts):
+        self._part = part
+        self._link_rids = {}
+        accent, white, dark = (colors['accent'].upper(), colors['white'].upper(),
+                               colors['darkText'].upper())
+        body_font, code_font = _xml_text(fonts['body']), _xml_text(fonts['code'])
+
+        def rpr(attrs, color, font):
+            return (f'<a:rPr{attrs}><a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+                    f'<a:latin typeface="{font}"/>')
+
+        self._rpr = {
+            (True, 'text'): rpr(' b="1"', white, body_font),
+            (True, 'bold'): rpr(' b="1"', white, body_font),
+            (True, 'italic'): rpr(' i="1" b="1"', white, body_font),
+            (True, 'code'): rpr(' b="1"', white, code_font),
+            (True, 'link'): rpr(' u="sng" b="1"', white, body_font),
+            (False, 'text'): rpr('', dark, body_font),
+            (False, 'bold'): rpr(' b="1"', dark, body_font),
+            (False, 'italic'): rpr(' i="1"', dark, body_font),
+            (False, 'code'): rpr('', accent, code_font),
+            (False, 'link'): rpr(' u="sng"', accent, body_font),
+        }
+        self._tc_open = '<a:tc><a:txBody><a:bodyPr wrap="square"/><a:lstStyle/><a:p>'
+        self._tc_close = {
+            True: f'</a:p></a:txBody><a:tcPr><a:solidFill><a:srgbClr val="{accent}"/></a:solidFill>'
+                  '</a:tcPr></a:tc>',
+            False: '</a:p></a:txBody><a:tcPr/></a:tc>',
+        }
+
+    def _link(self, url):
+        if url not in self._link_rids:
+            try:
+                self._link_rids[url] = self._part.relate_to(url, RT.HYPERLINK, is_external=True)
+            except Exception as e:
+                self._link_rids[url] = None  # same fallback as add_hyperlink()
+                _record_warning('hyperlink', f"could not add hyperlink {url!r}: {e}", url=url)
+        rid = self._link_rids[url]
+        return f'<a:hlinkClick r:id="{rid}"/>' if rid else ''
+
+    def cell(self, text, is_header):
+        out = [self._tc_open]
+        if text:
+            for seg in parse_inline_formatting(text):
+                kind = seg['type']
+                out.append('<a:r>')
+                out.append(self._rpr[is_header, kind])
+                if kind == 'link':
+                    out.append(self._link(seg['url']))
+                out.append('</a:rPr><a:t>')
+                out.append(_xml_text(seg['text']))
+                out.append('</a:t></a:r>')
+        out.append(self._tc_close[is_header])
+        return ''.join(out)
+
+
+# Glyph advances (1/1000 em) of a proportional sans for printable ASCII,
+# from the Helvetica metrics; other fonts are scaled by _FONT_WIDTH_SCALE.
+_SANS_WIDTHS = dict(zip(
+    ' !"#$%&\'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`'
+    'abcdefghijklmnopqrstuvwxyz{|}~',
+    (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+     556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+     1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+     667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+     333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+     556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584)))
+_FONT_WIDTH_SCALE = {'calibri': 0.9, 'segoe ui': 0.98, 'trebuchet ms': 0.98, 'verdana': 1.12,
+                     'tahoma': 0.98, 'georgia': 1.02, 'times new roman': 0.88}
+_MONOSPACE_FONTS = frozenset({'consolas', 'courier', 'courier new', 'menlo', 'monaco',
+                              'lucida console', 'monospace'})
+# Entries kept per TextMetrics cache before it is emptied.
+_METRICS_CACHE_MAX = 1 << 16
+
+
+class TextMetrics:
+    """Estimated extents of text set in one font at one point size.
+
+    Widths come from a glyph-advance table (every glyph 0.6em for monospace
+    fonts, 1em for East Asian wide characters) and wrapping is greedy at
+    spaces, as in a PowerPoint text frame; a word wider than the line is
+    broken between characters. Word widths and line counts are memoised,
+    so re-measuring the repeated words and lines of a large deck is a
+    dictionary lookup. Use text_metrics() to share instances.
+    """
+
+    def __init__(self, font, size_pt):
+        self.font = font
+        self.size_pt = size_pt
+        self.line_in = size_pt * 1.2 / 72
+        name = (font or '').lower()
+        self.monospace = name in _MONOSPACE_FONTS or 'mono' in name or 'code' in name
+        self._em_in = size_pt / 72 * (1.0 if self.monospace else _FONT_WIDTH_SCALE.get(name, 1.0))
+        self._widths = {}
+        self._lines = {}
+
+    def _glyph_em(self, ch):
+        if unicodedata.east_asian_width(ch) in 'WF':
+            return 1.0
+        if self.monospace:
+            return 0.6
+        return _SANS_WIDTHS.get(ch, 556) / 1000
+
+    def width_in(self, text):
+        """Width of `text` on one line, in inches."""
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= _METRICS_CACHE_MAX:
+                self._widths.clear()
+            width = self._widths[text] = sum(map(self._glyph_em, text)) * self._em_in
+        return width
+
+    def line_count(self, text, width_in):
+        """Lines `text` takes when wrapped to `width_in` inches (at least 1).
+        Widths narrower than one em are measured as one em."""
+        width_in = max(width_in, self._em_in)
+        key = (text, width_in)
+        lines = self._lines.get(key)
+        if lines is not None:
+            return lines
+        space = self.width_in(' ')
+        lines = 0
+        for para in text.split('\n'):
+            lines += 1
+            x = None  # width used on the current line; None while it is empty
+            for word in para.split(' '):
+                w = self.width_in(word)
+                if x is not None and x + space + w <= width_in:
+                    x += space + w
+                    continue
+                if x is not None:
+                    lines += 1
+                extra = int(w // width_in) if w > width_in else 0
+                lines += extra
+                x = w - extra * width_in
+        if len(self._lines) >= _METRICS_CACHE_MAX:
+            self._lines.clear()
+        self._lines[key] = lines
+        return lines
+
+    def height_in(self, text, width_in):
+        """Height of `text` wrapped to `width_in`, in inches, without insets."""
+        return self.line_count(text, width_in) * self.line_in
+
+
+@functools.lru_cache(maxsize=None)
+def text_metrics(font, size_pt):
+    """The shared TextMetrics for `font` at `size_pt`."""
+    return TextMetrics(font, size_pt)
+
+
+def _visible_text(text):
+    """`text` as displayed: inline markdown removed, link text kept."""
+    return ''.join(seg['text'] for seg in parse_inline_formatting(text))
+
+
+# Content area below the title of the 10in x 5.625in slide, in inches.
+# Explicitly positioned items start at CONTENT_TOP_IN; content is laid out
+# (and tables paged) to end above CONTENT_BOTTOM_IN.
+CONTENT_TOP_IN = 1.5
+CONTENT_BOTTOM_IN = 5.375
+CONTENT_WIDTH_IN = 9.0
+TABLE_WIDTH_IN = 9.0
+# Tables keep the presentation's default 18pt text; rows are at least
+# TABLE_ROW_MIN_IN tall.
+TABLE_FONT_PT = 18
+TABLE_ROW_MIN_IN = 0.45
+# Default text-frame insets: 0.1in left/right, 0.05in top/bottom.
+_INSET_W_IN = 0.2
+_INSET_H_IN = 0.1
+
+
+def table_row_heights(table_data, fonts=None):
+    """Estimated height in inches of each row of `table_data`, header first.
+
+    Each cell's visible text is wrapped (see TextMetrics) into its share of
+    the table width; a row is as tall as its tallest cell.
+    """
+    table_data = _as_table(table_data)
+    metrics = text_metrics((fonts or DEFAULT_FONTS)['body'], TABLE_FONT_PT)
+    n_cols = len(table_data.header)
+    # Very wide tables leave no room after the insets; wrap at one glyph.
+    col_in = max(TABLE_WIDTH_IN / n_cols - _INSET_W_IN, metrics.width_in('M'))
+
+    def row_height(row):
+        lines = 1
+        for text in row[:n_cols]:
+            if text:
+                lines = max(lines, metrics.line_count(_visible_text(text), col_in))
+        return max(TABLE_ROW_MIN_IN, lines * metrics.line_in + _INSET_H_IN)
+
+    return [row_height(table_data.header)] + [row_height(row) for row in table_data.rows]
+
+
+# Code block boxes pitch lines at 1.44x the code size (0.22in at 11pt)
+# inside 0.15in padding top and bottom, and are capped at
+# CODE_MAX_HEIGHT_IN; lines past the cap are clipped. Text items in explicit
+# layout take at least TEXT_ITEM_MIN_IN. Code blocks, tables and images are
+# followed by ITEM_GAP_IN.
+CODE_LINE_SPACING = 1.44
+CODE_MAX_HEIGHT_IN = 3.5
+TEXT_ITEM_MIN_IN = 0.4
+ITEM_GAP_IN = 0.15
+# Body placeholders (bullet slides without code, tables or images) indent
+# each level and add 20% space before each paragraph.
+_PLACEHOLDER_INDENT_IN = (0.375, 0.4)
+_PLACEHOLDER_LINE_SPACING = 1.2
+
+
+def code_block_height_in(code, fonts, sizes):
+    """Natural height in inches of the box for fenced `code`, with every
+    line wrapped to the box width; the renderer caps it at
+    CODE_MAX_HEIGHT_IN."""
+    metrics = text_metrics(fonts['code'], sizes['code'])
+    lines = metrics.line_count(code, CONTENT_WIDTH_IN - 0.2 - _INSET_W_IN)
+    return lines * sizes['code'] * CODE_LINE_SPACING / 72 + 0.3
+
+
+def _item_text(item, *, bullet=True):
+    """The text an item shows, with its "• " (when `bullet`) or "N. " prefix."""
+    if item.type == BULLET and bullet:
+        return '• ' + item.text
+    if item.type == NUMBERED:
+        return f"{item.number}. {item.text}"
+    return item.text
+
+
+def text_item_height_in(item, fonts, sizes):
+    """Height in inches of a text, bullet or numbered item in explicit layout."""
+    metrics = text_metrics(fonts['body'], sizes['text'])
+    height = metrics.height_in(_visible_text(_item_text(as_node(item))), CONTENT_WIDTH_IN - _INSET_W_IN)
+    return max(TEXT_ITEM_MIN_IN, height + _INSET_H_IN)
+
+
+def _item_extent_in(item, fonts, sizes):
+    """(height, advance) in inches of `item` in explicit layout, where the
+    advance includes the gap after it. Images shrink to the space left, so
+    they count at their minimum height."""
+    kind = item.type
+    if kind == CODEBLOCK:
+        height = min(code_block_height_in(item.content, fonts, sizes), CODE_MAX_HEIGHT_IN)
+    elif kind == TABLE:
+        height = sum(table_row_heights(item, fonts))
+    elif kind == IMAGE:
+        height = IMAGE_MIN_HEIGHT_IN
+    else:
+        height = text_item_height_in(item, fonts, sizes)
+        return height, height
+    return height, height + ITEM_GAP_IN
+
+
+def _needs_explicit_layout(content):
+    # Code blocks, tables and images can't live in the body placeholder (it
+    # can't hold a GraphicFrame, picture or styled box).
+    return any(item.type in (CODEBLOCK, TABLE, IMAGE) for item in content)
 
-    gf = slide.shapes.add_table(n_rows, n_cols, Inches(0.5), top, Inches(9), height)
-    table = gf.table
 
-    for c, cell_text in enumerate(header):
-        style_table_cell(table.cell(0, c), cell_text, is_header=True, colors=colors, fonts=fonts)
+def _placeholder_item_height_in(item, metrics):
+    """Height in inches of `item` as a body-placeholder paragraph set with
+    `metrics`."""
+    first, step = _PLACEHOLDER_INDENT_IN
+    indent = first + step * item.indent if item.type != TEXT else 0.0
+    width = CONTENT_WIDTH_IN - _INSET_W_IN - indent
+    lines = metrics.line_count(_visible_text(_item_text(item, bullet=False)), width)
+    return lines * metrics.line_in * _PLACEHOLDER_LINE_SPACING
 
-    for r, row in enumerate(rows, start=1):
-        for c in range(n_cols):
-            cell_text = row[c] if c < len(row) else ''
-            style_table_cell(table.cell(r, c), cell_text, is_header=False, colors=colors, fonts=fonts)
 
-    return top + height + Inches(0.15)
+def slide_overflow_in(slide_data, fonts=None, sizes=None):
+    """How far, in inches, the content of `slide_data` is estimated to run
+    past CONTENT_BOTTOM_IN; 0.0 when it fits.
 
+    Lines clipped off the bottom of a capped code block count as overflow
+    too. Body-placeholder text is measured at the `text` size: the
+    placeholder shrinks text to fit, so only slides that would not fit even
+    at the size used elsewhere on the deck's slides are reported. Section
+    slides are not measured.
+    """
+    slide_data = as_slide(slide_data)
+    content = slide_data.content
+    if slide_data.is_section or not content:
+        return 0.0
+    fonts, sizes = fonts or DEFAULT_FONTS, sizes or DEFAULT_SIZES
+    y = bottom = CONTENT_TOP_IN
+    clipped = 0.0
+    if _needs_explicit_layout(content):
+        for item in content:
+            height, advance = _item_extent_in(item, fonts, sizes)
+            if item.type == CODEBLOCK:
+                clipped = max(clipped, code_block_height_in(item.content, fonts, sizes) - height)
+            bottom = y + height
+            y += advance
+    else:
+        metrics = text_metrics(fonts['body'], sizes['text'])
+        y += sum(_placeholder_item_height_in(item, metrics) for item in content)
+        bottom = y + _INSET_H_IN
+    return max(bottom - CONTENT_BOTTOM_IN, clipped, 0.0)
+
+
+def add_table_to_slide(slide, table_data, top, colors, fonts):
+    """Render a parsed table dict onto `slide` starting at vertical offset `top`.
 
-def add_section_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
+    `top` is an EMU length (e.g. the result of `Inches(1.5)`), not a float.
+    Returns the next y-offset (EMU) the caller should continue from.
+
+    The rows are generated as one XML string from shared per-table
+    templates (see _TableCellXml) and parsed in a single pass, rather than
+    styled cell by cell through python-pptx. The result matches
+    style_table_cell() applied to every cell, except that empty cells
+    carry no empty run. Each row is given its table_row_heights() estimate
+    so PowerPoint has little to reflow; long tables are split across
+    slides beforehand by paginate_slides().
+
+    Precondition: `table_data.header` is a non-empty list. The parser
+    guarantees this — a header-less table is never emitted.
+    """
+    table_data = _as_table(table_data)
+    header, rows = table_data.header, table_data.rows
+    assert header, "table_data.header must be non-empty (parser invariant)"
+
+    n_cols = len(header)
+    row_emus = [Inches(h) for h in table_row_heights(table_data, fonts)]
+    height = sum(row_emus)
+
+    # A one-row table gives the graphic frame, table style and column grid;
+    # its placeholder row is replaced by the generated ones.
+    gf = slide.shapes.add_table(1, n_cols, Inches(0.5), top, Inches(TABLE_WIDTH_IN), height)
+    tbl = gf._element.graphic.graphicData.tbl
+    for tr in tbl.tr_lst:
+        tbl.remove(tr)
+
+    cells = _TableCellXml(slide.part, colors, fonts)
+    xml = [f'<a:tbl {_TBL_NSDECLS}>', f'<a:tr h="{row_emus[0]}">']
+    xml.extend(cells.cell(text, True) for text in header)
+    xml.append('</a:tr>')
+    for row, row_emu in zip(rows, row_emus[1:]):
+        xml.append(f'<a:tr h="{row_emu}">')
+        xml.extend(cells.cell(row[c] if c < len(row) else '', False) for c in range(n_cols))
+        xml.append('</a:tr>')
+    xml.append('</a:tbl>')
+    tbl.extend(list(parse_xml(''.join(xml))))
+
+    return top + height + Inches(ITEM_GAP_IN)
+
+
+# Images are placed in the content area below the title: at most 9in wide
+# and no lower than 0.25in above the bottom of the 5.625in-tall slide.
+IMAGE_MAX_WIDTH_IN = 9.0
+IMAGE_BOTTOM_IN = CONTENT_BOTTOM_IN
+IMAGE_MIN_HEIGHT_IN = 1.0
+# Pixels per inch an image is downsampled to: 1920px across the 10in slide.
+IMAGE_DPI = 192
+# Formats embedded unchanged when they already fit; anything else Pillow can
+# read (BMP, TIFF, WebP, ...) is transcoded to PNG.
+_PASSTHROUGH_FORMATS = {'PNG', 'JPEG', 'GIF'}
+# Bump when _downsample() output changes, to invalidate cached results.
+_IMAGE_CACHE_VERSION = 1
+
+
+def _downsample(blob, max_px):
+    """Shrink `blob` to fit `max_px` (width, height) and/or transcode it.
+
+    Returns the new bytes, or None when the original should be embedded
+    as is: it already fits and is PNG/JPEG/GIF, Pillow can't read it, or
+    the resampled image would be no smaller (flat-colour screenshots can
+    grow as resampling smooths their edges).
+    """
+    try:
+        im = PILImage.open(io.BytesIO(blob))
+        fits = im.width <= max_px[0] and im.height <= max_px[1]
+        if (fits and im.format in _PASSTHROUGH_FORMATS) or getattr(im, 'is_animated', False):
+            return None
+        fmt = im.format
+        im.thumbnail(max_px, PILImage.LANCZOS)
+    except (OSError, ValueError, PILImage.DecompressionBombError):
+        return None
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        if im.mode not in ('RGB', 'L'):
+            im = im.convert('RGB')
+        im.save(out, 'JPEG', quality=85, optimize=True)
+    else:
+        if im.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            im = im.convert('RGBA')
+        im.save(out, 'PNG')
+    if fmt in _PASSTHROUGH_FORMATS and out.tell() >= len(blob):
+        return None
+    return out.getvalue()
+
+
+class ImageStore:
+    """Loads the local images a deck references, ready to embed.
+
+    `![alt](path)` paths are resolved against `base_dir`. With no
+    `base_dir` nothing is read from disk and every image renders as its
+    alt text, so converting markdown from an untrusted source (the HTTP
+    service) can't pull in local files. With Pillow installed, an image
+    larger than the content area at IMAGE_DPI is downsampled to fit, and
+    formats other than PNG/JPEG/GIF are transcoded to PNG. Results are
+    written to `cache_dir` (if given), keyed by the source bytes' hash and
+    the target size, so re-runs skip the decode and resample. Without
+    Pillow images are embedded unchanged. `hits` and `misses` count cache
+    lookups.
+    """
+
+    def __init__(self, base_dir=None, cache_dir=None):
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._loaded = {}
+        self.hits = self.misses = 0
+
+    def resolve(self, src):
+        """Local path for image reference `src`, or None if it isn't a readable file."""
+        if self.base_dir is None or '://' in src or src.startswith('data:'):
+            return None
+        path = self.base_dir / src
+        return path if path.is_file() else None
+
+    def load(self, src, max_px):
+        """Bytes to embed for `src` fitted to `max_px`, or None if unavailable."""
+        key = (src, max_px)
+        if key not in self._loaded:
+            path = self.resolve(src)
+            if path is None:
+                if self.base_dir is not None:
+                    if '://' in src or src.startswith('data:'):
+                        _warn('image', f"remote image not embedded: {src}", src=src)
+                    else:
+                        _warn('image', f"image not found: {src}", src=src)
+                self._loaded[key] = None
+            else:
+                try:
+                    blob = path.read_bytes()
+                except OSError as e:
+                    print(f"Warning: could not read image {src}: {e}")
+                    _record_warning('image', f"could not read image {src}: {e}", src=src)
+                    self._loaded[key] = None
+                else:
+                    self._loaded[key] = self._prepare(blob, max_px) if HAS_PIL else blob
+        return self._loaded[key]
+
+    def _prepare(self, blob, max_px):
+        cached = None
+        if self.cache_dir is not None:
+            digest = hashlib.sha256(blob).hexdigest()
+            cached = self.cache_dir / f'{digest}-{max_px[0]}x{max_px[1]}-v{_IMAGE_CACHE_VERSION}.img'
+            try:
+                data = cached.read_bytes()
+            except OSError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                return data or blob  # empty file: keep the original
+        result = _downsample(blob, max_px)
+        if cached is not None:
+            # Write-then-rename so concurrent conversions never see a partial file.
+            tmp = cached.with_name(f'{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp.write_bytes(result or b'')
+                os.replace(tmp, cached)
+            except OSError:
+                pass
+        return result or blob
+
+
+def add_image_to_slide(slide, item, top, images, colors, fonts):
+    """Place image `item` at vertical offset `top` (EMU), scaled to fit the
+    content area; returns the next y-offset. An image that can't be loaded
+    is shown as its alt text instead."""
+    item = as_node(item)
+    box_w = IMAGE_MAX_WIDTH_IN
+    box_h = max(IMAGE_BOTTOM_IN - top / Inches(1), IMAGE_MIN_HEIGHT_IN)
+    full_h = IMAGE_BOTTOM_IN - CONTENT_TOP_IN  # downsample for the largest box, so sizes are shared
+    data = images.load(item.src, (round(box_w * IMAGE_DPI), round(full_h * IMAGE_DPI)))
+    image = None
+    if data is not None:
+        try:
+            # from_blob() defers parsing the header until first use.
+            image = Image.from_blob(data)
+            (px_w, px_h), (dpi_x, dpi_y) = image.size, image.dpi
+        except Exception:
+            image = None
+            print(f"Warning: unsupported image format: {item.src}")
+            _record_warning('image', f"unsupported image format: {item.src}", src=item.src)
+    if image is None:
+        box = slide.shapes.add_textbox(Inches(0.5), top, Inches(9), Inches(0.5))
+        run = box.text_frame.paragraphs[0].add_run()
+        run.text = f"[image: {item.alt or item.src}]"
+        run.font.italic = True
+        run.font.name = fonts['body']
+        run.font.color.rgb = hex_to_rgb(colors['mutedText'])
+        return top + Inches(0.5)
+
+    width_in, height_in = px_w / dpi_x, px_h / dpi_y
+    scale = min(1.0, box_w / width_in, box_h / height_in)
+    width, height = Inches(width_in * scale), Inches(height_in * scale)
+    left = Inches(0.5) + (Inches(box_w) - width) // 2
+    picture = slide.shapes.add_picture(io.BytesIO(data), left, top, width, height)
+    if item.alt:
+        picture._element.nvPicPr.cNvPr.set('descr', item.alt)
+    return top + height + Inches(ITEM_GAP_IN)
+
+
+def add_section_slide(prs, slide_data, colors, fonts, *, style_overrides=None, layout_idx=None):
     """Add a section/title slide using Title Slide layout (index 0)"""
-    layout = prs.slide_layouts[0]  # Title Slide layout
+    if layout_idx is None:
+        layout_idx = DEFAULT_LAYOUTS['section']
+    layout = prs.slide_layouts[layout_idx]  # Title Slide layout by default
     slide = prs.slides.add_slide(layout)
     style_overrides = style_overrides or {}
+    slide_data = as_slide(slide_data)
 
     # Get title text
-    title_text = slide_data['title'].lstrip('# ').strip() if slide_data['title'] else ''
+    title_text = slide_data.title.lstrip('# ').strip() if slide_data.title else ''
 
     # Find and populate placeholders with formatting
     for shape in slide.placeholders:
@@ -944,19 +2313,19 @@ def add_section_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
             add_formatted_runs(p, title_text, colors, fonts)
             _apply_overrides_to_paragraph(p, 'h1', style_overrides, colors)
         elif idx == 1:  # Subtitle placeholder
-            if slide_data['subtitle']:
+            if slide_data.subtitle:
                 tf = shape.text_frame
                 tf.clear()
                 p = tf.paragraphs[0]
-                add_formatted_runs(p, slide_data['subtitle'], colors, fonts)
+                add_formatted_runs(p, slide_data.subtitle, colors, fonts)
                 _apply_overrides_to_paragraph(p, 'h3', style_overrides, colors)
             else:
                 shape.text = ''
 
     # Add speaker notes
-    if slide_data['notes']:
+    if slide_data.notes:
         notes_slide = slide.notes_slide
-        notes_slide.notes_text_frame.text = slide_data['notes']
+        notes_slide.notes_text_frame.text = slide_data.notes
 
     return slide
 
@@ -1001,15 +2370,26 @@ def _apply_body_overrides(paragraph, overrides, colors, fonts):
         elif body_default:
             _apply_run_style(run, body_default, colors)
 
-def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
-    """Add a content slide using Title and Content layout (index 1)"""
-    layout = prs.slide_layouts[1]  # Title and Content layout
+def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None, sizes=None,
+                      layout_idx=None, images=None):
+    """Add a content slide using Title and Content layout (index 1).
+
+    `images` is the ImageStore that image items are loaded from; without
+    one they render as their alt text.
+    """
+    if layout_idx is None:
+        layout_idx = DEFAULT_LAYOUTS['content']
+    layout = prs.slide_layouts[layout_idx]  # Title and Content layout by default
     slide = prs.slides.add_slide(layout)
     style_overrides = style_overrides or {}
+    sizes = sizes or DEFAULT_SIZES
+    slide_data = as_slide(slide_data)
+    code_size = Pt(sizes['code'])
+    text_size = Pt(sizes['text'])
 
     # Determine which heading selector this slide's title maps to.
     # Markdown `#` → h1 (used by the title slides); `##` → h2; `###` → h3.
-    raw_title = slide_data['title'] or ''
+    raw_title = slide_data.title or ''
     if raw_title.startswith('### '):
         title_selector = 'h3'
     elif raw_title.startswith('## '):
@@ -1018,7 +2398,7 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
         title_selector = 'h1'
 
     # Get title
-    title = slide_data['title']
+    title = slide_data.title
     if title:
         title = re.sub(r'^#+\s*', '', title).strip()
         title = re.sub(r'^\d+\.\s*', '', title)
@@ -1043,20 +2423,14 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
         _apply_overrides_to_paragraph(p, title_selector, style_overrides, colors)
     
     # Set body content
-    if body_shape and slide_data['content']:
+    if body_shape and slide_data.content:
         tf = body_shape.text_frame
         
-        # Code blocks and tables can't live in the body placeholder (it can't
-        # hold a GraphicFrame or styled box); both force explicit positioning.
-        needs_explicit_layout = any(
-            item['type'] in ('codeblock', 'table') for item in slide_data['content']
-        )
-
-        if not needs_explicit_layout:
+        if not _needs_explicit_layout(slide_data.content):
             # Use body placeholder
             first_para = True
 
-            for item in slide_data['content']:
+            for item in slide_data.content:
                 if first_para:
                     p = tf.paragraphs[0]
                     first_para = False
@@ -1064,20 +2438,16 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
                     p = tf.add_paragraph()
 
                 # Set indent level for bullets/numbered only
-                if item['type'] in ['bullet', 'numbered']:
-                    p.level = item.get('indent', 0)
+                if item.type in (BULLET, NUMBERED):
+                    p.level = item.indent
                 else:
                     # Plain text - disable bullet
                     p.level = 0
                     disable_bullet(p)
 
-                # Build text with number prefix for numbered items
-                text = item['text']
-                if item['type'] == 'numbered':
-                    text = f"{item.get('number', '1')}. {text}"
-
-                # Add formatted runs (bold, italic, code, links)
-                add_formatted_runs(p, text, colors, fonts)
+                # Add formatted runs (bold, italic, code, links), with the
+                # number prefix for numbered items
+                add_formatted_runs(p, _item_text(item, bullet=False), colors, fonts)
 
                 # Apply body-default overrides (the bare `""` selector) to
                 # every run, and the `code` selector to inline-code runs only.
@@ -1087,12 +2457,12 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
             p = tf.paragraphs[0]
             p.text = ""
             
-            y_pos = Inches(1.5)
+            y_pos = Inches(CONTENT_TOP_IN)
             
-            for item in slide_data['content']:
-                if item['type'] == 'codeblock':
-                    code_lines = item['content'].split('\n')
-                    code_height = min(len(code_lines) * 0.22 + 0.3, 3.5)
+            for item in slide_data.content:
+                if item.type == CODEBLOCK:
+                    code_height = min(code_block_height_in(item.content, fonts, sizes),
+                                      CODE_MAX_HEIGHT_IN)
                     
                     # Background rectangle
                     rect = slide.shapes.add_shape(
@@ -1114,36 +2484,32 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
                     p = code_tf.paragraphs[0]
                     
                     # Apply syntax highlighting
-                    highlighted = highlight_code(item['content'], item['lang'], colors)
+                    highlighted = highlight_code(item.content, item.lang, colors)
                     for seg in highlighted:
                         run = p.add_run()
                         run.text = seg['text']
-                        run.font.size = Pt(11)
+                        run.font.size = code_size
                         run.font.name = fonts['code']
                         run.font.color.rgb = hex_to_rgb(seg['color'])
 
-                    y_pos += Inches(code_height + 0.15)
-                elif item['type'] == 'table':
+                    y_pos += Inches(code_height + ITEM_GAP_IN)
+                elif item.type == TABLE:
                     y_pos = add_table_to_slide(slide, item, y_pos, colors, fonts)
+                elif item.type == IMAGE:
+                    y_pos = add_image_to_slide(slide, item, y_pos, images or ImageStore(), colors, fonts)
                 else:
-                    # Text content
+                    # Text content, sized to its wrapped lines
+                    text_height = text_item_height_in(item, fonts, sizes)
                     text_box = slide.shapes.add_textbox(
                         Inches(0.5), y_pos,
-                        Inches(9), Inches(0.5)
+                        Inches(9), Inches(text_height)
                     )
                     text_tf = text_box.text_frame
                     text_tf.word_wrap = True
                     p = text_tf.paragraphs[0]
                     
-                    # Build text with bullet/number prefix
-                    text = item['text']
-                    if item['type'] == 'bullet':
-                        text = '• ' + text
-                    elif item['type'] == 'numbered':
-                        text = f"{item.get('number', '1')}. {text}"
-                    
-                    # Add formatted runs
-                    add_formatted_runs(p, text, colors, fonts)
+                    # Add formatted runs, with the bullet/number prefix
+                    add_formatted_runs(p, _item_text(item), colors, fonts)
 
                     # Apply body-default + code overrides to this paragraph.
                     _apply_body_overrides(p, style_overrides, colors, fonts)
@@ -1151,18 +2517,236 @@ def add_content_slide(prs, slide_data, colors, fonts, *, style_overrides=None):
                     # Set font size for all runs that still don't have one
                     for run in p.runs:
                         if run.font.size is None:
-                            run.font.size = Pt(15)
+                            run.font.size = text_size
                     
-                    y_pos += Inches(0.4)
+                    y_pos += Inches(text_height)
     
     # Add speaker notes
-    if slide_data['notes']:
+    if slide_data.notes:
         notes_slide = slide.notes_slide
-        notes_slide.notes_text_frame.text = slide_data['notes']
+        notes_slide.notes_text_frame.text = slide_data.notes
     
     return slide
 
-def add_sections_to_pptx_file(filepath, sections_info):
+def _continuation(slide_data, content):
+    """A "(cont.)" slide carrying on from `slide_data` with `content`."""
+    title = slide_data.title
+    return slide_data.replace(title=f"{title} (cont.)" if title else title,
+                              content=content, notes=None, is_section=False)
+
+
+class _SlidePager:
+    """Lays one slide's content out onto as many slides as it needs.
+
+    Items are placed top to bottom with the same heights add_content_slide()
+    gives them (see _item_extent_in()); when the next one would end below
+    CONTENT_BOTTOM_IN the slide is closed and a continuation started.
+    Tables split between rows, each part repeating the header row; code
+    blocks split between lines, into parts no taller than
+    CODE_MAX_HEIGHT_IN. A table or code block that would fit whole at the
+    top of the next slide moves there rather than splitting. Bullets, text
+    and images are never split, and anything taller than a whole slide
+    still gets one to itself.
+    """
+
+    # Fewest code lines worth leaving at the bottom of a slide.
+    MIN_CODE_LINES = 3
+
+    def __init__(self, fonts, sizes):
+        self.fonts, self.sizes = fonts, sizes
+        self.pages, self.content = [], []
+        self.y = CONTENT_TOP_IN
+
+    def break_page(self):
+        self.pages.append(self.content)
+        self.content, self.y = [], CONTENT_TOP_IN
+
+    def place(self, item):
+        kind = item.type
+        if kind == TABLE:
+            rows = item.rows
+            heights = table_row_heights(item, self.fonts)
+            self._place_parts(item, heights[1:], heights[0], None, 1,
+                              lambda start, end: item.replace(rows=rows[start:end]))
+        elif kind == CODEBLOCK:
+            lines = item.content.split('\n')
+            metrics = text_metrics(self.fonts['code'], self.sizes['code'])
+            width = CONTENT_WIDTH_IN - 0.2 - _INSET_W_IN
+            pitch = self.sizes['code'] * CODE_LINE_SPACING / 72
+            heights = [metrics.line_count(line, width) * pitch for line in lines]
+            self._place_parts(item, heights, 0.3, CODE_MAX_HEIGHT_IN, self.MIN_CODE_LINES,
+                              lambda start, end: item.replace(content='\n'.join(lines[start:end])))
+        else:
+            height, advance = _item_extent_in(item, self.fonts, self.sizes)
+            if self.content and self.y + height > CONTENT_BOTTOM_IN:
+                self.break_page()
+            self.content.append(item)
+            self.y += advance
+
+    def place_paragraph(self, item, metrics):
+        """Place a body-placeholder paragraph measured with `metrics`."""
+        height = _placeholder_item_height_in(item, metrics)
+        if self.content and self.y + height + _INSET_H_IN > CONTENT_BOTTOM_IN:
+            self.break_page()
+        self.content.append(item)
+        self.y += height
+
+    def _room(self, overhead, cap, top):
+        room = CONTENT_BOTTOM_IN - top
+        return (room if cap is None else min(room, cap)) - overhead
+
+    def _place_parts(self, item, heights, overhead, cap, min_parts, part):
+        """Place `item`, made of parts (rows, lines) with `heights` under a
+        fixed `overhead`, at most `cap` tall; `part(start, end)` builds the
+        item holding parts start:end."""
+        n, start = len(heights), 0
+        while True:
+            room = self._room(overhead, cap, self.y)
+            end, used = start, 0.0
+            while end < n and used + heights[end] <= room:
+                used += heights[end]
+                end += 1
+            if self.content and (room < 0 or end < n and (
+                    end - start < min_parts
+                    or sum(heights[start:]) <= self._room(overhead, cap, CONTENT_TOP_IN))):
+                self.break_page()
+                continue
+            end = max(end, min(start + 1, n))
+            self.content.append(item if start == 0 and end == n else part(start, end))
+            height = overhead + sum(heights[start:end])
+            self.y += (height if cap is None else min(height, cap)) + ITEM_GAP_IN
+            start = end
+            if start >= n:
+                return
+            self.break_page()
+
+
+def _layout_pages(content, fonts, sizes):
+    """Lay `content` out with a _SlidePager; returns the content of each slide."""
+    pager = _SlidePager(fonts, sizes)
+    if not _needs_explicit_layout(content):
+        metrics = text_metrics(fonts['body'], sizes['text'])
+        for item in content:
+            pager.place_paragraph(item, metrics)
+        pager.break_page()
+        return pager.pages
+    for item in content:
+        pager.place(item)
+    pager.break_page()
+    # A part left with only text renders in the body placeholder, which
+    # sets it differently, so it is laid out again as such.
+    pages = []
+    for page in pager.pages:
+        if _needs_explicit_layout(page):
+            pages.append(page)
+        else:
+            pages.extend(_layout_pages(page, fonts, sizes))
+    return pages
+
+
+def _paginate(slide_data, fonts, sizes):
+    """Split `slide_data` across continuation slides so its content ends
+    above CONTENT_BOTTOM_IN (see _SlidePager). Returns a list of slide
+    dicts; only the first keeps the speaker notes."""
+    pages = _layout_pages(slide_data.content, fonts, sizes)
+    if len(pages) == 1:
+        return [slide_data]
+    return ([slide_data.replace(content=pages[0])]
+            + [_continuation(slide_data, page) for page in pages[1:]])
+
+
+def paginate_slides(slides_data, fonts=None, sizes=None):
+    """Return `slides_data` with overflowing slides split into "(cont.)" slides.
+
+    See _paginate(); heights are estimated for `fonts` and `sizes` (the
+    defaults if None). Continuation slides keep their slide's section, so
+    section markers still group them; deck-level `.style_overrides` and
+    `.theme_config` are carried over.
+    """
+    fonts, sizes = fonts or DEFAULT_FONTS, sizes or DEFAULT_SIZES
+    pages = _SlidesWithStyle()
+    pages.style_overrides = getattr(slides_data, 'style_overrides', {})
+    pages.theme_config = getattr(slides_data, 'theme_config', {})
+    for slide_data in map(as_slide, slides_data):
+        if slide_data.is_section or not slide_data.content:
+            pages.append(slide_data)
+        else:
+            pages.extend(_paginate(slide_data, fonts, sizes))
+    return pages
+
+
+_P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_P14_NS = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+_SECTION_EXT_URI = '{521415D9-36F7-43E2-AB2F-B90AF26B5E84}'
+
+
+def _section_guid(n):
+    """Stable GUID for the n-th section (PowerPoint wants 8-4-4-4-12 hex)."""
+    return f'{{{n:08X}-0000-0000-0000-000000000000}}'
+
+
+def _section_data(sections_info):
+    """Map `sections_info` ({idx: {'name', 'count'}}) to named sections with slide IDs."""
+    slide_id = 256  # PowerPoint slide IDs start at 256
+    section_data = []
+    for sec_idx in sorted(sections_info.keys()):
+        sec_info = sections_info[sec_idx]
+        if sec_info['name']:
+            slide_ids = list(range(slide_id, slide_id + sec_info['count']))
+            section_data.append({
+                'name': sec_info['name'],
+                'id': _section_guid(sec_idx),
+                'slide_ids': slide_ids
+            })
+        slide_id += sec_info['count']
+    return section_data
+
+
+def _add_section_list(root, section_data):
+    """Append a p14:sectionLst extension for `section_data` to presentation.xml's root."""
+    # Find or create extLst
+    extLst = root.find(f'{{{_P_NS}}}extLst')
+    if extLst is None:
+        extLst = etree.SubElement(root, f'{{{_P_NS}}}extLst')
+
+    # Create ext element with section URI
+    ext = etree.SubElement(extLst, f'{{{_P_NS}}}ext')
+    ext.set('uri', _SECTION_EXT_URI)
+
+    # Create sectionLst with proper namespace prefix
+    # Register the p14 namespace
+    etree.register_namespace('p14', _P14_NS)
+    sectionLst = etree.SubElement(ext, f'{{{_P14_NS}}}sectionLst')
+
+    # Add sections
+    for sec in section_data:
+        section = etree.SubElement(sectionLst, f'{{{_P14_NS}}}section')
+        section.set('name', sec['name'])
+        section.set('id', sec['id'])
+
+        sldIdLst = etree.SubElement(section, f'{{{_P14_NS}}}sldIdLst')
+        for sid in sec['slide_ids']:
+            sldId = etree.SubElement(sldIdLst, f'{{{_P14_NS}}}sldId')
+            sldId.set('id', str(sid))
+
+
+# Zip settings per --compression choice: (compression method, compresslevel).
+# 'default' matches what python-pptx's own save() produces.
+COMPRESSION_LEVELS = {
+    'store': (zipfile.ZIP_STORED, None),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'default': (zipfile.ZIP_DEFLATED, None),
+    'max': (zipfile.ZIP_DEFLATED, 9),
+}
+
+
+def _open_zip(target, compression='default'):
+    """Open `target` for writing with the zip settings for `compression`."""
+    method, level = COMPRESSION_LEVELS[compression]
+    return zipfile.ZipFile(target, 'w', method, compresslevel=level)
+
+
+def add_sections_to_pptx_file(filepath, sections_info, compression='default'):
     """Add section groupings to a saved PPTX file by modifying its XML"""
     import zipfile
     import tempfile
@@ -1170,18 +2754,7 @@ def add_sections_to_pptx_file(filepath, sections_info):
     
     try:
         # Calculate slide IDs for each section
-        slide_id = 256  # PowerPoint slide IDs start at 256
-        section_data = []
-        for sec_idx in sorted(sections_info.keys()):
-            sec_info = sections_info[sec_idx]
-            if sec_info['name']:
-                slide_ids = list(range(slide_id, slide_id + sec_info['count']))
-                section_data.append({
-                    'name': sec_info['name'],
-                    'id': f'{{0000000{sec_idx}-0000-0000-0000-000000000000}}',
-                    'slide_ids': slide_ids
-                })
-            slide_id += sec_info['count']
+        section_data = _section_data(sections_info)
         
         if not section_data:
             return
@@ -1190,42 +2763,14 @@ def add_sections_to_pptx_file(filepath, sections_info):
         with zipfile.ZipFile(filepath, 'r') as z_in:
             pres_xml = z_in.read('ppt/presentation.xml')
             root = etree.fromstring(pres_xml)
-            
-            # Namespaces
-            P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
-            P14_NS = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
-            
-            # Find or create extLst
-            extLst = root.find(f'{{{P_NS}}}extLst')
-            if extLst is None:
-                extLst = etree.SubElement(root, f'{{{P_NS}}}extLst')
-            
-            # Create ext element with section URI
-            ext = etree.SubElement(extLst, f'{{{P_NS}}}ext')
-            ext.set('uri', '{521415D9-36F7-43E2-AB2F-B90AF26B5E84}')
-            
-            # Create sectionLst with proper namespace prefix
-            # Register the p14 namespace
-            etree.register_namespace('p14', P14_NS)
-            sectionLst = etree.SubElement(ext, f'{{{P14_NS}}}sectionLst')
-            
-            # Add sections
-            for sec in section_data:
-                section = etree.SubElement(sectionLst, f'{{{P14_NS}}}section')
-                section.set('name', sec['name'])
-                section.set('id', sec['id'])
-                
-                sldIdLst = etree.SubElement(section, f'{{{P14_NS}}}sldIdLst')
-                for sid in sec['slide_ids']:
-                    sldId = etree.SubElement(sldIdLst, f'{{{P14_NS}}}sldId')
-                    sldId.set('id', str(sid))
+            _add_section_list(root, section_data)
             
             # Generate modified XML
             modified_xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
             
             # Write to temp file then replace original
             temp_path = filepath + '.tmp'
-            with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as z_out:
+            with _open_zip(temp_path, compression) as z_out:
                 for item in z_in.namelist():
                     if item == 'ppt/presentation.xml':
                         z_out.writestr(item, modified_xml)
@@ -1237,60 +2782,1118 @@ def add_sections_to_pptx_file(filepath, sections_info):
         
     except Exception as e:
         print(f"Note: Could not add section markers: {e}")
+        _record_warning('sections', f"could not add section markers: {e}")
 
-def main():
-    args = sys.argv[1:]
-    input_file = args[0] if args else 'slides.md'
-    output_file = args[1] if len(args) > 1 else input_file.replace('.md', '.pptx')
-    
-    if not Path(input_file).exists():
-        print(f"Error: Input file '{input_file}' not found")
-        print("Usage: python convert.py <input.md> [output.pptx]")
-        sys.exit(1)
-    
-    # Load config
-    config = load_config(input_file)
-    colors = {**DEFAULT_COLORS, **config.get('colors', {})}
-    fonts = {**DEFAULT_FONTS, **config.get('fonts', {})}
-    
-    # Read and parse markdown
-    content = Path(input_file).read_text(encoding='utf-8')
-    slides_data = parse_markdown(content)
+
+# --- streaming package writer ------------------------------------------------
+
+_CT_RELS = 'application/vnd.openxmlformats-package.relationships+xml'
+_CT_XML = 'application/xml'
+_CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+# Empty stand-ins swapped into parts that have already been written, so
+# their full XML trees can be garbage-collected.
+_STUB_XML = {
+    'sld': '<p:sld xmlns:p="%s"/>' % _P_NS,
+    'notes': '<p:notes xmlns:p="%s"/>' % _P_NS,
+}
+
+
+class MediaIndex:
+    """Content-addressed image parts of one package.
+
+    python-pptx finds an existing part for an image by walking every
+    relationship in the package, and names a new one by walking every part,
+    so each picture costs time proportional to the deck so far. This keeps
+    one ImagePart per distinct image (by SHA-1, as python-pptx does) in a
+    dict; a logo on every slide is stored once and found in O(1).
+    """
+
+    def __init__(self, package, parts=()):
+        self._package = package
+        # Only slide media; the package thumbnail is an ImagePart too.
+        self._parts = {part.sha1: part for part in parts
+                       if isinstance(part, ImagePart) and part.partname.startswith('/ppt/media/')}
+
+    def __len__(self):
+        return len(self._parts)
+
+    def get_or_add_image_part(self, image_file):
+        """Drop-in for Package.get_or_add_image_part()."""
+        image = Image.from_file(image_file)
+        part = self._parts.get(image.sha1)
+        if part is None:
+            partname = self._package.next_partname(f'/ppt/media/image%d.{image.ext}')
+            part = ImagePart(partname, image.content_type, self._package, image.blob, image.filename)
+            self._parts[image.sha1] = part
+        return part
+
+
+class StreamingPptxWriter:
+    """Write a presentation package to a zip as its slides are rendered.
+
+    python-pptx keeps every slide's XML tree alive until `prs.save()`.
+    Instead, call `flush_slide(slide)` right after rendering each slide: its
+    XML, rels and notes are serialized into the output zip immediately and
+    the in-memory trees are replaced by empty stubs. `close()` then writes
+    the remaining parts (presentation.xml with its section list, masters,
+    layouts, theme, notes master), `[Content_Types].xml` and the package
+    rels. Memory stays bounded by one slide regardless of deck length.
+
+    Slides must be flushed in order and not touched again afterwards. With no
+    flush_slide() calls at all, close() simply writes the whole package in
+    one pass. `compression` is a COMPRESSION_LEVELS key. Pictures added to
+    the presentation while a writer is attached are stored once per
+    distinct image (see MediaIndex).
+    """
+
+    def __init__(self, prs, target, compression='default'):
+        self._prs = prs
+        self._target = target
+        self._zip = _open_zip(target, compression)
+        self._content_types = {}
+        # python-pptx picks each new notes slide's partname by walking every
+        # part in the package, which makes long decks quadratic. Parts are only
+        # added through here while streaming, so scan once and count upwards.
+        package = prs.part.package
+        parts = list(package.iter_parts())
+        taken = {str(part.partname) for part in parts}
+        next_index = {}
+
+        def next_partname(tmpl):
+            n = next_index.get(tmpl, 1)
+            while tmpl % n in taken:
+                n += 1
+            next_index[tmpl] = n + 1
+            return PackURI(tmpl % n)
+
+        package.next_partname = next_partname
+        # Same for pictures: slide.shapes.add_picture() goes through the
+        # package to find or create the image part.
+        self.media = MediaIndex(package, parts)
+        package.get_or_add_image_part = self.media.get_or_add_image_part
+
+    def _write_part(self, part):
+        partname = str(part.partname)
+        self._zip.writestr(partname.lstrip('/'), part.blob)
+        if part.rels:
+            self._zip.writestr(part.partname.rels_uri.lstrip('/'), part.rels.xml)
+        self._content_types[partname] = part.content_type
+
+    @staticmethod
+    def _release(part, stub, proxy_attr):
+        part._element = parse_xml(_STUB_XML[stub])
+        # Drop python-pptx's cached proxy, which still points at the old tree.
+        part.__dict__.pop(proxy_attr, None)
+
+    def flush_slide(self, slide):
+        """Serialize `slide` (and its notes) into the zip and free their XML."""
+        part = slide.part
+        self._write_part(part)
+        notes_part = None
+        if part.has_notes_slide:
+            notes_part = part.part_related_by(RT.NOTES_SLIDE)
+            self._write_part(notes_part)
+            self._release(notes_part, 'notes', 'notes_slide')
+        self._release(part, 'sld', 'slide')
+
+    def close(self, section_info=None):
+        """Write everything not yet flushed and finish the zip."""
+        try:
+            try:
+                section_data = _section_data(section_info or {})
+                if section_data:
+                    _add_section_list(self._prs.part._element, section_data)
+            except Exception as e:
+                # The slides are still fine, just not grouped.
+                print(f"Note: Could not add section markers: {e}")
+                _record_warning('sections', f"could not add section markers: {e}")
+            for part in self._prs.part.package.iter_parts():
+                if str(part.partname) not in self._content_types:
+                    self._write_part(part)
+            self._zip.writestr('[Content_Types].xml', self._content_types_xml())
+            self._zip.writestr('_rels/.rels', self._prs.part.package._rels.xml)
+        finally:
+            self._zip.close()
+
+    def abort(self):
+        """Close the zip without finishing it and remove a partial output file."""
+        self._zip.close()
+        if isinstance(self._target, (str, os.PathLike)):
+            try:
+                os.remove(self._target)
+            except OSError:
+                pass
+
+    def _content_types_xml(self):
+        types = etree.Element(f'{{{_CT_NS}}}Types', nsmap={None: _CT_NS})
+        for ext, content_type in (('rels', _CT_RELS), ('xml', _CT_XML)):
+            etree.SubElement(types, f'{{{_CT_NS}}}Default', Extension=ext, ContentType=content_type)
+        for partname, content_type in sorted(self._content_types.items()):
+            etree.SubElement(types, f'{{{_CT_NS}}}Override', PartName=partname, ContentType=content_type)
+        return etree.tostring(types, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+@functools.lru_cache(maxsize=None)
+def renderer_version():
+    """Digest identifying this renderer: convert.py's source and the
+    python-pptx version. Anything cached from render_deck() output should
+    be keyed on it so upgrades invalidate old entries."""
+    import pptx
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(pptx.__version__.encode())
+    return digest.hexdigest()
+
+
+# --- package concatenation ---------------------------------------------------
+
+_PKG_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+
+def _rels_name(partname):
+    """Zip member holding the rels of `partname` ('' for the package)."""
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, '_rels', name + '.rels').lstrip('/')
+
+
+class _PackageReader:
+    """Raw read access to the parts and rels of one PPTX zip."""
+
+    def __init__(self, source):
+        self.zip = zipfile.ZipFile(source)
+        types = etree.fromstring(self.zip.read('[Content_Types].xml'))
+        self.defaults = {}
+        self.overrides = {}
+        for el in types:
+            if el.tag == f'{{{_CT_NS}}}Default':
+                self.defaults[el.get('Extension').lower()] = el.get('ContentType')
+            elif el.tag == f'{{{_CT_NS}}}Override':
+                self.overrides[el.get('PartName')] = el.get('ContentType')
+        self._rels = {}
+        self.main = next((target for _, reltype, target in self.rels('/')
+                          if reltype == RT.OFFICE_DOCUMENT), None)
+        if self.main is None:
+            raise ValueError(f"{source}: package has no presentation part")
+
+    def read(self, partname):
+        return self.zip.read(partname.lstrip('/'))
+
+    def content_type(self, partname):
+        return self.overrides.get(partname) or self.defaults[partname.rsplit('.', 1)[-1].lower()]
+
+    def rels(self, partname):
+        """[(rId, reltype, target partname)] for the internal rels of
+        `partname`, in rId order."""
+        rels = self._rels.get(partname)
+        if rels is None:
+            root = self.rels_xml(partname)
+            base = posixpath.dirname(partname)
+            rels = self._rels[partname] = sorted(
+                ((rel.get('Id'), rel.get('Type'), posixpath.normpath(posixpath.join(base, rel.get('Target'))))
+                 for rel in (root if root is not None else ()) if rel.get('TargetMode') != 'External'),
+                key=lambda rel: (len(rel[0]), rel[0]),
+            )
+        return rels
+
+    def rels_xml(self, partname):
+        try:
+            return etree.fromstring(self.zip.read(_rels_name(partname)))
+        except KeyError:
+            return None
+
+    def has_rels(self, partname):
+        return _rels_name(partname) in self.zip.NameToInfo
+
+    def closure(self, root, stop=()):
+        """`root` and the parts reachable from it, breadth first in rId
+        order, without entering parts in `stop`. The order only depends on
+        the package's structure, not on its partnames."""
+        order = [root]
+        seen = {root}
+        for partname in order:
+            for _, _, target in self.rels(partname):
+                if target not in seen and target not in stop:
+                    seen.add(target)
+                    order.append(target)
+        return order
+
+    def close(self):
+        self.zip.close()
+
+
+def _shared_parts(pkg):
+    """Partnames reachable without going through a slide: the presentation,
+    masters, layouts, themes, notes master, doc props and so on."""
+    shared = set()
+    stack = [pkg.main] + [target for _, _, target in pkg.rels('/')]
+    while stack:
+        partname = stack.pop()
+        if partname in shared:
+            continue
+        shared.add(partname)
+        stack.extend(target for _, reltype, target in pkg.rels(partname) if reltype != RT.SLIDE)
+    return shared
+
+
+def concat_packages(sources, target, *, compression='default'):
+    """Concatenate the slides of PPTX `sources` into one package at `target`.
+
+    The presentation settings (slide size, doc props) come from the first
+    source. Each source's slide masters and notes master are compared by
+    content with those already written, including their layouts and
+    themes, and only masters not seen before are added, so decks built
+    from the same template share one copy of it. Slides and the parts they
+    own (notes slides, media) are copied under fresh partnames; parts
+    without relationships, such as images and themes, are stored once per
+    distinct content. Slide IDs, rIds and layout IDs are renumbered and
+    each source's p14 section list is carried over. Parts are copied as
+    bytes and sources are opened one at a time, so the cost is linear in
+    the total size. A later source's notes master that differs from the
+    first one is replaced by it. Returns the number of slides written.
+    """
+    out = _open_zip(target, compression)
+    try:
+        count = _PackageConcatenator(out).run(sources)
+    except BaseException:
+        out.close()
+        if isinstance(target, (str, os.PathLike)):
+            os.remove(target)
+        raise
+    out.close()
+    return count
+
+
+class _PackageConcatenator:
+    """Writes the parts of several packages into one zip; see concat_packages()."""
+
+    def __init__(self, out):
+        self.out = out
+        self.content_types = {}  # output partname -> content type
+        self.defaults = {}
+        self.taken = set()
+        self.next_index = {}
+        self.by_blob = {}  # (content type, sha256) -> output partname, for leaf parts
+        self.groups = {}  # master group digest -> output partnames, in closure order
+        self.next_master_id = None  # shared ID space of sldMasterId and sldLayoutId
+        self.new_masters = []  # (output partname, sldMasterId) added after the first source
+        self.notes_master = None
+        self.notes_master_adopted = False
+        self.slides = []  # output slide partnames, in order
+        self.sections = []  # (name, [positions in self.slides])
+
+    def run(self, sources):
+        base = _PackageReader(sources[0])
+        try:
+            base_mapping = self.add_template(base, is_base=True)
+            self.add_slides(base, base_mapping)
+            pres = etree.fromstring(base.read(base.main))
+            pres_rels = base.rels_xml(base.main)
+            main_type = base.content_type(base.main)
+            package_rels = base.rels_xml('/')
+        finally:
+            base.close()
+        for source in sources[1:]:
+            pkg = _PackageReader(source)
+            try:
+                self.add_slides(pkg, self.add_template(pkg, is_base=False))
+            finally:
+                pkg.close()
+        self.write_presentation(base.main, main_type, pres, pres_rels, base_mapping)
+        self.retarget(package_rels, '/', '/', base_mapping)
+        self.out.writestr('_rels/.rels', _xml_bytes(package_rels))
+        self.write_content_types()
+        return len(self.slides)
+
+    # --- naming and writing ---------------------------------------------------
+
+    def claim(self, partname, keep):
+        """Reserve an output partname: `partname` itself if `keep` and it is
+        free, else the next free name with the same stem."""
+        if keep and partname not in self.taken:
+            self.taken.add(partname)
+            return partname
+        directory, name = posixpath.split(partname)
+        stem, ext = posixpath.splitext(name)
+        prefix = posixpath.join(directory, stem.rstrip('0123456789'))
+        n = self.next_index.get(prefix, 1)
+        while f'{prefix}{n}{ext}' in self.taken:
+            n += 1
+        self.next_index[prefix] = n + 1
+        self.taken.add(f'{prefix}{n}{ext}')
+        return f'{prefix}{n}{ext}'
+
+    @staticmethod
+    def retarget(rels, old_name, new_name, mapping):
+        """Point the internal rels of a part moved from `old_name` to
+        `new_name` at the output names in `mapping`."""
+        old_dir, new_dir = posixpath.dirname(old_name), posixpath.dirname(new_name)
+        for rel in rels:
+            if rel.get('TargetMode') == 'External':
+                continue
+            linked = posixpath.normpath(posixpath.join(old_dir, rel.get('Target')))
+            if linked not in mapping:
+                raise ValueError(f"{old_name} links to {linked}, which is not in the merged package")
+            rel.set('Target', posixpath.relpath(mapping[linked], new_dir))
+
+    def copy_parts(self, pkg, parts, mapping, *, keep, rewrite=None):
+        """Copy `parts` of `pkg`, recording their output names in `mapping`.
+
+        Parts already in `mapping` are written under that name. Parts
+        without rels that match one already written are not written again.
+        `rewrite` maps a partname to a function applied to its bytes.
+        """
+        written = []
+        for part in parts:
+            content_type = pkg.content_type(part)
+            blob = pkg.read(part)
+            if rewrite and part in rewrite:
+                blob = rewrite[part](blob)
+            if part in mapping:
+                name = mapping[part]
+            elif pkg.has_rels(part):
+                name = mapping[part] = self.claim(part, keep)
+            else:
+                key = (content_type, hashlib.sha256(blob).digest())
+                if key in self.by_blob:
+                    mapping[part] = self.by_blob[key]
+                    continue
+                name = mapping[part] = self.by_blob[key] = self.claim(part, keep)
+            written.append((part, name, blob, content_type))
+        for part, name, blob, content_type in written:
+            self.out.writestr(name.lstrip('/'), blob)
+            self.content_types[name] = content_type
+            rels = pkg.rels_xml(part)
+            if rels is not None:
+                self.retarget(rels, part, name, mapping)
+                self.out.writestr(_rels_name(name), _xml_bytes(rels))
+
+    # --- template -------------------------------------------------------------
+
+    @staticmethod
+    def group_digest(pkg, order):
+        """Content hash of the parts in `order` and the links between them."""
+        index = {part: i for i, part in enumerate(order)}
+        digest = hashlib.sha256()
+        for part in order:
+            digest.update(pkg.content_type(part).encode())
+            digest.update(hashlib.sha256(pkg.read(part)).digest())
+            for rid, reltype, target in pkg.rels(part):
+                digest.update(f'{rid} {reltype} {index.get(target, target)}\n'.encode())
+        return digest.hexdigest()
+
+    def renumber_layouts(self, blob):
+        master = etree.fromstring(blob)
+        for layout_id in master.iter(f'{{{_P_NS}}}sldLayoutId'):
+            layout_id.set('id', str(self.next_master_id))
+            self.next_master_id += 1
+        return _xml_bytes(master)
+
+    def add_template(self, pkg, is_base):
+        """Write the masters of `pkg` not already in the output; return the
+        mapping of its template partnames to output partnames."""
+        self.defaults.update(pkg.defaults)
+        mapping = {pkg.main: pkg.main} if is_base else {}
+        pres_rels = pkg.rels(pkg.main)
+        masters = [target for _, reltype, target in pres_rels if reltype == RT.SLIDE_MASTER]
+        notes_masters = [target for _, reltype, target in pres_rels if reltype == RT.NOTES_MASTER]
+        if is_base:
+            pres = etree.fromstring(pkg.read(pkg.main))
+            ids = [int(el.get('id')) for el in pres.iter(f'{{{_P_NS}}}sldMasterId')]
+            for master in masters:
+                ids += [int(el.get('id')) for el in
+                        etree.fromstring(pkg.read(master)).iter(f'{{{_P_NS}}}sldLayoutId')]
+            self.next_master_id = max(ids, default=2147483647) + 1
+
+        for root in masters + notes_masters:
+            order = pkg.closure(root, stop=mapping)
+            digest = self.group_digest(pkg, order)
+            if digest in self.groups:
+                mapping.update(zip(order, self.groups[digest]))
+                continue
+            if root in notes_masters and self.notes_master is not None:
+                # A presentation has one notes master; use the first one.
+                mapping[root] = self.notes_master
+                continue
+            rewrite = None
+            if root in masters and not is_base:
+                rewrite = {root: self.renumber_layouts}
+            self.copy_parts(pkg, order, mapping, keep=True, rewrite=rewrite)
+            self.groups[digest] = [mapping[part] for part in order]
+            if root in notes_masters:
+                self.notes_master = mapping[root]
+                self.notes_master_adopted = not is_base
+            elif not is_base:
+                self.new_masters.append((mapping[root], self.next_master_id))
+                self.next_master_id += 1
+
+        if is_base:
+            # Presentation-level parts (props, table styles, doc props).
+            rest = sorted(_shared_parts(pkg) - set(mapping))
+            self.copy_parts(pkg, rest, mapping, keep=True)
+        return mapping
+
+    # --- slides ---------------------------------------------------------------
+
+    def add_slides(self, pkg, mapping):
+        pres = etree.fromstring(pkg.read(pkg.main))
+        slide_parts = {rid: part for rid, reltype, part in pkg.rels(pkg.main) if reltype == RT.SLIDE}
+        order = [slide_parts[el.get(f'{{{_R_NS}}}id')]
+                 for el in pres.iterfind(f'{{{_P_NS}}}sldIdLst/{{{_P_NS}}}sldId')]
+        # Name every slide first so links between slides can be retargeted.
+        start = len(self.slides)
+        for part in order:
+            mapping[part] = self.claim(part, keep=False)
+            self.slides.append(mapping[part])
+        for part in order:
+            self.copy_parts(pkg, pkg.closure(part, stop=mapping), mapping, keep=False)
+        position = {el.get('id'): start + i for i, el in
+                    enumerate(pres.iterfind(f'{{{_P_NS}}}sldIdLst/{{{_P_NS}}}sldId'))}
+        for section in pres.iter(f'{{{_P14_NS}}}section'):
+            self.sections.append((section.get('name'), [
+                position[el.get('id')] for el in section.iter(f'{{{_P14_NS}}}sldId')]))
+
+    # --- package-level parts --------------------------------------------------
+
+    def write_presentation(self, main, main_type, pres, pres_rels, mapping):
+        for rel in list(pres_rels):
+            if rel.get('Type') == RT.SLIDE:
+                pres_rels.remove(rel)
+        self.retarget(pres_rels, main, main, mapping)
+        used = {rel.get('Id') for rel in pres_rels}
+        rids = (f'rId{n}' for n in itertools.count(1) if f'rId{n}' not in used)
+        pres_dir = posixpath.dirname(main)
+
+        def relate(reltype, partname):
+            rid = next(rids)
+            etree.SubElement(pres_rels, f'{{{_PKG_RELS_NS}}}Relationship', Id=rid, Type=reltype,
+                             Target=posixpath.relpath(partname, pres_dir))
+            return rid
+
+        def id_list(tag, after):
+            el = pres.find(f'{{{_P_NS}}}{tag}')
+            if el is None:
+                el = etree.Element(f'{{{_P_NS}}}{tag}')
+                anchors = [pres.find(f'{{{_P_NS}}}{name}') for name in after]
+                [a for a in anchors if a is not None][-1].addnext(el)
+            return el
+
+        for master, master_id in self.new_masters:
+            etree.SubElement(pres.find(f'{{{_P_NS}}}sldMasterIdLst'), f'{{{_P_NS}}}sldMasterId',
+                             {'id': str(master_id), f'{{{_R_NS}}}id': relate(RT.SLIDE_MASTER, master)})
+        if self.notes_master_adopted:
+            etree.SubElement(id_list('notesMasterIdLst', ['sldMasterIdLst']), f'{{{_P_NS}}}notesMasterId',
+                             {f'{{{_R_NS}}}id': relate(RT.NOTES_MASTER, self.notes_master)})
+        sld_id_lst = id_list('sldIdLst', ['sldMasterIdLst', 'notesMasterIdLst', 'handoutMasterIdLst'])
+        sld_id_lst.clear()
+        for i, slide in enumerate(self.slides):
+            etree.SubElement(sld_id_lst, f'{{{_P_NS}}}sldId',
+                             {'id': str(256 + i), f'{{{_R_NS}}}id': relate(RT.SLIDE, slide)})
+
+        for ext in pres.iter(f'{{{_P_NS}}}ext'):
+            if ext.get('uri') == _SECTION_EXT_URI:
+                ext.getparent().remove(ext)
+                break
+        if self.sections:
+            _add_section_list(pres, [
+                {'name': name, 'id': _section_guid(n), 'slide_ids': [256 + i for i in members]}
+                for n, (name, members) in enumerate(self.sections, 1)
+            ])
+        self.out.writestr(main.lstrip('/'), _xml_bytes(pres))
+        self.content_types[main] = main_type
+        self.out.writestr(_rels_name(main), _xml_bytes(pres_rels))
+
+    def write_content_types(self):
+        types = etree.Element(f'{{{_CT_NS}}}Types', nsmap={None: _CT_NS})
+        for ext, content_type in sorted(self.defaults.items()):
+            etree.SubElement(types, f'{{{_CT_NS}}}Default', Extension=ext, ContentType=content_type)
+        for partname, content_type in sorted(self.content_types.items()):
+            if self.defaults.get(partname.rsplit('.', 1)[-1].lower()) != content_type:
+                etree.SubElement(types, f'{{{_CT_NS}}}Override', PartName=partname,
+                                 ContentType=content_type)
+        self.out.writestr('[Content_Types].xml', _xml_bytes(types))
+
+
+def _xml_bytes(element):
+    return etree.tostring(element, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def _slide_title(slide_data):
+    """`slide_data`'s title without its heading marker."""
+    return (slide_data.title or '').lstrip('#').strip()
+
+
+class ConversionReport:
+    """Structured record of one conversion, for aggregating over many runs.
+
+    Pass one to convert_file() (or render_deck()); as_dict() gives a
+    JSON-serialisable record:
+      input, output    as given
+      error            why the conversion failed, or None
+      timings_s        seconds spent in each of PHASES
+      slides, shapes, runs
+                       counts over the written deck, continuation slides
+                       included
+      output_bytes     size of the PPTX (None if written to a pipe)
+      cache            {'parse': 'hit', 'miss' or None if not cached,
+                        'images': {'hits', 'misses'} or None}
+      warnings         each distinct warning once, as {'kind', 'message',
+                       'count', ...}; see _record_warning()
+      overflows        as collected by render_deck()
+    With `streaming`, slides are written out during 'render', so 'write'
+    only covers the parts written at the end.
+    """
+
+    PHASES = ('config', 'parse', 'layout', 'render', 'write', 'total')
+
+    def __init__(self, input=None, output=None):
+        self.input = input
+        self.output = output
+        self.error = None
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+        self.slides = self.shapes = self.runs = 0
+        self.output_bytes = None
+        self.parse_cache = None
+        self.image_cache = None
+        self.overflows = []
+        self._warnings = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Add the time spent in the `with` block to phase `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+
+    @contextlib.contextmanager
+    def collect(self):
+        """Record the warnings raised in the `with` block in this report.
+        Only this thread (or asyncio task) is affected."""
+        token = _WARNINGS.set(self._warnings)
+        try:
+            yield self
+        finally:
+            _WARNINGS.reset(token)
+
+    def count_slide(self, slide):
+        self.slides += 1
+        self.shapes += len(slide.shapes)
+        self.runs += sum(1 for _ in slide._element.iter(qn('a:r')))
+
+    @property
+    def warnings(self):
+        return list(self._warnings.values())
+
+    def as_dict(self):
+        return {
+            'input': self.input,
+            'output': self.output,
+            'error': self.error,
+            'timings_s': {name: round(t, 4) for name, t in self.timings.items()},
+            'slides': self.slides,
+            'shapes': self.shapes,
+            'runs': self.runs,
+            'output_bytes': self.output_bytes,
+            'cache': {'parse': self.parse_cache, 'images': self.image_cache},
+            'warnings': self.warnings,
+            'overflows': self.overflows,
+        }
+
+
+def render_deck(slides_data, theme, target, *, streaming=False, compression='default',
+                on_slide=None, base_dir=None, image_cache=None, overflows=None, report=None):
+    """Render parsed `slides_data` with `theme` into `target` as a PPTX.
+
+    `target` is a path or a writable binary file object; the package is
+    written in one pass, so nothing is re-read afterwards and file objects
+    need not be seekable. `on_slide(index, total, slide_data)` is called
+    after each slide is rendered; an exception raised from it aborts the
+    conversion. Image paths are resolved against `base_dir` (no local
+    images are read without one) and processed images are cached in
+    `image_cache`; see ImageStore. Content that doesn't fit on its slide
+    continues on "(cont.)" slides (see paginate_slides()), so the number of
+    slides written, which is returned, can exceed len(slides_data). If `overflows` is a list, each
+    slide whose content is estimated to run off the bottom of the slide
+    (see slide_overflow_in()) is appended to it as {'slide': 1-based
+    number, 'title', 'overflow_in'}. A ConversionReport passed as `report`
+    gets the 'layout', 'render' and 'write' timings, the slide, shape and
+    run counts and the image cache counters.
+    """
+    if report is None:
+        report = ConversionReport()  # discarded; keeps the loop below branch-free
     style_overrides = getattr(slides_data, 'style_overrides', {})
-    if style_overrides:
-        print(f"Loaded style overrides: {sorted(style_overrides.keys())}")
+    colors, fonts, sizes = theme.colors, theme.fonts, theme.sizes
+    with report.phase('layout'):
+        slides_data = paginate_slides(slides_data, fonts, sizes)
 
     # Create presentation
     prs = Presentation()
     prs.slide_width = Inches(10)
     prs.slide_height = Inches(5.625)  # 16:9
+    for kind, idx in theme.layouts.items():
+        if idx >= len(prs.slide_layouts):
+            raise ConfigError(f"layouts.{kind}: template has no layout {idx} "
+                              f"(it has {len(prs.slide_layouts)})")
 
     # Track sections for grouping
     section_info = {}
+    # The package is written in one pass by StreamingPptxWriter, so the zip
+    # settings apply to every member and the section list goes straight into
+    # presentation.xml (no re-open and rewrite of a saved file).
+    writer = StreamingPptxWriter(prs, target, compression)
+    images = ImageStore(base_dir, image_cache)
 
     # Add slides
-    for slide_data in slides_data:
-        if slide_data['is_section']:
-            add_section_slide(prs, slide_data, colors, fonts, style_overrides=style_overrides)
+    try:
+        with report.phase('render'):
+            for index, slide_data in enumerate(slides_data):
+                if slide_data.is_section:
+                    slide = add_section_slide(prs, slide_data, colors, fonts,
+                                              style_overrides=style_overrides,
+                                              layout_idx=theme.layouts['section'])
+                else:
+                    slide = add_content_slide(prs, slide_data, colors, fonts,
+                                              style_overrides=style_overrides, sizes=sizes,
+                                              layout_idx=theme.layouts['content'], images=images)
+                report.count_slide(slide)
+                if streaming:
+                    writer.flush_slide(slide)
+                if overflows is not None:
+                    overflow = slide_overflow_in(slide_data, fonts, sizes)
+                    if overflow > 0:
+                        overflows.append({'slide': index + 1, 'title': _slide_title(slide_data),
+                                          'overflow_in': round(overflow, 2)})
+                if on_slide is not None:
+                    on_slide(index, len(slides_data), slide_data)
+
+                # Track slides per section
+                sec_idx = slide_data.section_idx
+                if sec_idx not in section_info:
+                    section_info[sec_idx] = {'name': slide_data.section, 'count': 0}
+                section_info[sec_idx]['count'] += 1
+    except BaseException:
+        writer.abort()
+        raise
+    report.image_cache = {'hits': images.hits, 'misses': images.misses}
+
+    with report.phase('write'):
+        writer.close(section_info)
+    return len(slides_data)
+
+
+def theme_from_config(config=None, deck_config=None):
+    """Return the Theme for an in-memory `config` mapping plus a deck's
+    frontmatter theme block, without looking at any config files. Results
+    are cached like resolve_theme()'s."""
+    fingerprint = ('<config>',) + tuple(
+        json.dumps(layer or {}, sort_keys=True, default=str) for layer in (config, deck_config))
+    return _cached_theme(
+        fingerprint, lambda: build_theme((config, 'config'), (deck_config, 'frontmatter')))
+
+
+def convert_markdown(text, config=None, *, output=None, streaming=False, compression='default',
+                     on_slide=None, base_dir=None, image_cache=None, overflows=None):
+    """Convert markdown `text` to PPTX entirely in memory.
+
+    `config` is a mapping shaped like config.json, layered over the defaults
+    (config files on disk are not consulted); a `pptx:` frontmatter block in
+    `text` is layered over it. Returns the PPTX as bytes, or, if `output` is
+    a writable binary file object, writes it there and returns None.
+    `on_slide`, `base_dir`, `image_cache` and `overflows` are passed through
+    to render_deck(); local images are only embedded when `base_dir` is given.
+    """
+    theme = theme_from_config(config)
+    slides_data = parse_markdown(text)
+    deck_config = getattr(slides_data, 'theme_config', {})
+    if deck_config:
+        theme = theme_from_config(config, deck_config)
+    options = dict(streaming=streaming, compression=compression, on_slide=on_slide,
+                   base_dir=base_dir, image_cache=image_cache, overflows=overflows)
+    if output is not None:
+        render_deck(slides_data, theme, output, **options)
+        return None
+    buf = io.BytesIO()
+    render_deck(slides_data, theme, buf, **options)
+    return buf.getvalue()
+
+
+class _Cancelled(Exception):
+    """Raised inside a worker thread to stop a cancelled convert_async()."""
+
+
+async def convert_async(markdown, config=None, *, on_progress=None, executor=None,
+                        compression='default'):
+    """Convert markdown to PPTX bytes without blocking the running event loop.
+
+    Parsing, rendering and zipping run in `executor` (the loop's default
+    thread pool if None). `on_progress(event)` is called on the event loop
+    for each rendered slide with {'event': 'slide', 'index', 'total',
+    'title'}, then once with {'event': 'done', 'bytes'}.
+    Cancelling the awaiting task stops the worker at the next slide.
+
+    A ProcessPoolExecutor also works, for true CPU parallelism, but then
+    only the 'done' event is reported and a conversion that has already
+    started runs to completion in its process (its result is discarded).
+    """
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+
+    def report(event):
+        if on_progress is not None:
+            loop.call_soon_threadsafe(on_progress, event)
+
+    def on_slide(index, total, slide_data):
+        if cancelled.is_set():
+            raise _Cancelled()
+        report({'event': 'slide', 'index': index, 'total': total,
+                'title': _slide_title(slide_data)})
+
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        job = functools.partial(convert_markdown, markdown, config, compression=compression)
+    else:
+        job = functools.partial(convert_markdown, markdown, config, compression=compression,
+                                on_slide=on_slide)
+    future = loop.run_in_executor(executor, job)
+    try:
+        data = await future
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+    if on_progress is not None:
+        # Runs after any slide events already queued by the worker.
+        on_progress({'event': 'done', 'bytes': len(data)})
+    return data
+
+
+def convert_file(input_file, output_file, *, streaming=False, compression='default',
+                 image_cache=None, parse_cache=None, report=None):
+    """Convert one markdown file to PPTX. Returns the number of slides written.
+
+    `output_file` is a path or a writable binary file object. With
+    `streaming=True`, each slide is written out as soon as it is rendered
+    (see StreamingPptxWriter) instead of being held in memory until the end.
+    `compression` is a COMPRESSION_LEVELS key. Image paths are relative to
+    the markdown file; processed images are cached in `image_cache` and
+    parsed slides in `parse_cache` (see ParseCache) if given. Slides
+    estimated to run off the bottom (see slide_overflow_in()) are listed
+    after the summary line. A ConversionReport passed as `report` is filled
+    in, including when the conversion fails.
+    """
+    if report is None:
+        report = ConversionReport(str(input_file))
+    try:
+        with report.collect(), report.phase('total'):
+            count = _convert_file(input_file, output_file, report, streaming=streaming,
+                                  compression=compression, image_cache=image_cache,
+                                  parse_cache=parse_cache)
+    except Exception as e:
+        report.error = str(e)
+        raise
+    if isinstance(output_file, (str, os.PathLike)):
+        report.output_bytes = os.path.getsize(output_file)
+    else:
+        try:
+            report.output_bytes = output_file.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+    return count
+
+
+def _convert_file(input_file, output_file, report, *, streaming, compression, image_cache,
+                  parse_cache):
+    # Resolve and validate the config files up front so a bad config fails
+    # before any parsing or rendering work is done.
+    with report.phase('config'):
+        theme, sources = resolve_theme(input_file)
+    for source in sources:
+        print(f"Loaded config from {source}")
+
+    # Read and parse markdown
+    with report.phase('parse'):
+        if parse_cache is not None:
+            cache = ParseCache(parse_cache)
+            slides_data = cache.parse_file(input_file)
+            report.parse_cache = 'hit' if cache.hits else 'miss'
         else:
-            add_content_slide(prs, slide_data, colors, fonts, style_overrides=style_overrides)
-        
-        # Track slides per section
-        sec_idx = slide_data.get('section_idx', 0)
-        if sec_idx not in section_info:
-            section_info[sec_idx] = {'name': slide_data.get('section', 'Section'), 'count': 0}
-        section_info[sec_idx]['count'] += 1
-    
-    # Add sections to presentation for collapsible grouping
-    # (done after save by modifying the PPTX file)
-    
-    # Save presentation
-    prs.save(output_file)
-    
-    # Add section markers to the saved file
-    add_sections_to_pptx_file(output_file, section_info)
-    
-    print(f"Created {output_file} with {len(slides_data)} slides")
+            slides_data = parse_markdown_file(input_file)
+    style_overrides = getattr(slides_data, 'style_overrides', {})
+    if style_overrides:
+        print(f"Loaded style overrides: {sorted(style_overrides.keys())}")
+    deck_config = getattr(slides_data, 'theme_config', {})
+    if deck_config:
+        with report.phase('config'):
+            theme, _ = resolve_theme(input_file, deck_config)
+        print(f"Loaded frontmatter theme: {sorted(deck_config.keys())}")
+
+    overflows = report.overflows
+    count = render_deck(slides_data, theme, output_file, streaming=streaming, compression=compression,
+                        base_dir=Path(input_file).parent, image_cache=image_cache, overflows=overflows,
+                        report=report)
+    name = output_file if isinstance(output_file, (str, os.PathLike)) else '<stdout>'
+    print(f"Created {name} with {count} slides")
+    if overflows:
+        print(f"Warning: {len(overflows)} slide(s) may overflow the slide:")
+        for entry in overflows:
+            print(f"  slide {entry['slide']} ({entry['title'] or 'untitled'}): "
+                  f"about {entry['overflow_in']:.2f}in too tall")
+    return count
+
+
+# Fence languages that deliberately get no highlighting.
+_PLAIN_LANGUAGES = frozenset({'text', 'plain', 'plaintext', 'txt', 'none'})
+# check_deck() kinds that are worth a look but render fine (title-only
+# slides are common as dividers and closing slides), so --check doesn't
+# fail on them.
+CHECK_NOTICES = frozenset({'empty'})
+
+
+def check_deck(slides_data, theme):
+    """Problems converting `slides_data` with `theme` would run into, found
+    without rendering anything.
+
+    Returns a list of {'slide', 'title', 'kind', 'message'} where 'slide'
+    is the 1-based slide number in the output deck (continuation slides
+    included), or None for deck-wide problems. Kinds:
+      - 'color': a style-block colour that is unrecognised, or that fails
+        the contrast guard and so is dropped
+      - 'language': a code block in a language with no highlighting
+      - 'empty': a content slide with a title and nothing else; one of
+        CHECK_NOTICES, which don't make --check fail
+      - 'overflow': content estimated to run off the slide even after
+        splitting into continuation slides (see slide_overflow_in())
+    """
+    problems = []
+    bg = _resolve_slide_bg(theme.colors)
+    for selector, decls in sorted(getattr(slides_data, 'style_overrides', {}).items()):
+        color = decls.get('color')
+        if not color:
+            continue
+        hex_val = css_parse_color(color)
+        name = selector or 'body'
+        if hex_val is None:
+            message = f"<style> colour {color!r} for {name} is not recognised and is ignored"
+        elif not _color_passes_contrast(hex_val, theme.colors):
+            ratio = css_contrast_ratio(hex_val, bg)
+            message = (f"<style> colour #{hex_val} for {name} is dropped: contrast "
+                       f"{ratio:.1f}:1 against #{bg} is below {_WCAG_AA_NORMAL}:1")
+        else:
+            continue
+        problems.append({'slide': None, 'title': None, 'kind': 'color', 'message': message})
+
+    number = 0
+    for slide_data in map(as_slide, slides_data):
+        if slide_data.is_section or not slide_data.content:
+            pages = [slide_data]
+        else:
+            pages = _paginate(slide_data, theme.fonts, theme.sizes)
+        title = _slide_title(slide_data)
+
+        def report(slide, kind, message):
+            problems.append({'slide': slide, 'title': title, 'kind': kind, 'message': message})
+
+        if not slide_data.is_section and not slide_data.content:
+            report(number + 1, 'empty', 'slide has a title but no content')
+        unknown = set()
+        for item in slide_data.content:
+            if item.type == CODEBLOCK and item.lang:
+                lang = item.lang.lower().strip()
+                if (lang not in SYNTAX_KEYWORDS and lang != 'diff'
+                        and lang not in _PLAIN_LANGUAGES and lang not in unknown):
+                    unknown.add(lang)
+                    report(number + 1, 'language',
+                           f"unknown code language {item.lang!r}, shown without highlighting")
+        for page in pages:
+            number += 1
+            overflow = slide_overflow_in(page, theme.fonts, theme.sizes)
+            if overflow > 0:
+                report(number, 'overflow', f"content runs about {overflow:.2f}in past the bottom of the slide")
+    return problems
+
+
+def check_file(input_file, *, parse_cache=None):
+    """check_deck() for markdown file `input_file` with the theme its config
+    files and frontmatter give it. Raises ConfigError for an invalid config."""
+    theme, _ = resolve_theme(input_file)
+    if parse_cache is not None:
+        slides_data = ParseCache(parse_cache).parse_file(input_file)
+    else:
+        slides_data = parse_markdown_file(input_file)
+    deck_config = getattr(slides_data, 'theme_config', {})
+    if deck_config:
+        theme, _ = resolve_theme(input_file, deck_config)
+    return check_deck(slides_data, theme)
+
+
+def _run_checks(inputs, parse_cache):
+    """--check: report every problem in `inputs`; returns the exit status."""
+    files = problems = notices = 0
+    for md_path, _ in _expand_batch_inputs(inputs):
+        files += 1
+        try:
+            found = check_file(str(md_path), parse_cache=parse_cache)
+        except ConfigError as e:
+            found = [{'slide': None, 'title': None, 'kind': 'config', 'message': str(e)}]
+        for problem in found:
+            notice = problem['kind'] in CHECK_NOTICES
+            message = f"note: {problem['message']}" if notice else problem['message']
+            if problem['slide'] is None:
+                print(f"{md_path}: {message}")
+            else:
+                print(f"{md_path}: slide {problem['slide']} ({problem['title'] or 'untitled'}): {message}")
+            notices += notice
+            problems += not notice
+    noted = f", {notices} notice(s)" if notices else ''
+    if problems:
+        print(f"{problems} problem(s){noted} in {files} file(s)")
+        return 1
+    print(f"Checked {files} file(s): no problems{noted}")
+    return 0
+
+
+def _expand_batch_inputs(inputs):
+    """Yield (markdown_path, root) for each batch input.
+
+    Files are yielded as-is with their own parent as root; directories are
+    walked recursively for `*.md` in sorted order so runs are reproducible.
+    """
+    for raw in inputs:
+        path = Path(raw)
+        if path.is_dir():
+            for md in sorted(path.rglob('*.md')):
+                yield md, path
+        else:
+            yield path, path.parent
+
+
+def _batch_output_path(md_path, root, output_dir):
+    if output_dir is None:
+        return md_path.with_suffix('.pptx')
+    return Path(output_dir) / md_path.relative_to(root).with_suffix('.pptx')
+
+
+def _default_cache_dir(kind):
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'hackmd-to-pptx', kind)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert HackMD/Marp markdown slides to PowerPoint.',
+        usage='%(prog)s <input.md> [output.pptx|-]\n'
+              '       %(prog)s --batch <input.md|dir>... [--output-dir DIR]\n'
+              '       %(prog)s --check <input.md|dir>...',
+    )
+    parser.add_argument('inputs', nargs='*', metavar='input',
+                        help="Markdown file (and optional output path, '-' for stdout); with --batch, "
+                             'any number of markdown files or directories')
+    parser.add_argument('--batch', action='store_true',
+                        help='Convert every input in one process, sharing config caches')
+    parser.add_argument('--check', action='store_true',
+                        help='Parse and lay out the inputs without writing PPTX; report overflowing '
+                             'slides, unknown code languages and dropped <style> colours, and exit 1 '
+                             'if there are any (title-only slides are listed as notes)')
+    parser.add_argument('--report', choices=('text', 'json'), default='text',
+                        help="'json': print one JSON record per conversion (timings, counts, "
+                             'output size, cache hits, warnings) to stdout, with the progress '
+                             'messages on stderr')
+    parser.add_argument('--output-dir', default=None,
+                        help='With --batch: write PPTX files here (mirroring directory '
+                             'layout) instead of next to each input')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Write each slide to the output as soon as it is rendered, '
+                             'keeping memory bounded for very long decks')
+    parser.add_argument('--compression', choices=list(COMPRESSION_LEVELS), default='default',
+                        help="Zip compression for the output: 'store' (none), 'fast', "
+                             "'default' or 'max'")
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep downsampled images and parsed decks on disk and reuse them '
+                             f"across runs, under {_default_cache_dir('')} (nothing is written "
+                             'there otherwise)')
+    parser.add_argument('--image-cache', default=None, metavar='DIR',
+                        help='Cache downsampled images in DIR (implies caching images)')
+    parser.add_argument('--no-image-cache', dest='image_cache', action='store_const', const=False,
+                        help='With --cache: process images without reading or writing the image cache')
+    parser.add_argument('--parse-cache', default=None, metavar='DIR',
+                        help='Cache parsed decks in DIR, reused while the markdown is unchanged '
+                             '(implies caching parses)')
+    parser.add_argument('--no-parse-cache', dest='parse_cache', action='store_const', const=False,
+                        help='With --cache: always parse the markdown, without reading or writing '
+                             'the parse cache')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    for kind, dest in (('images', 'image_cache'), ('parsed', 'parse_cache')):
+        if getattr(args, dest) is None and args.cache:
+            setattr(args, dest, _default_cache_dir(kind))
+        elif getattr(args, dest) is False:
+            setattr(args, dest, None)
+    options = dict(streaming=args.streaming, compression=args.compression,
+                   image_cache=args.image_cache, parse_cache=args.parse_cache)
+    json_report = args.report == 'json'
+    records = sys.stdout
+
+    def convert(md_path, out_path):
+        if not json_report:
+            return convert_file(md_path, out_path, **options)
+        report = ConversionReport(md_path, out_path)
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                return convert_file(md_path, out_path, report=report, **options)
+        finally:
+            print(json.dumps(report.as_dict()), file=records, flush=True)
+
+    if args.check:
+        inputs = args.inputs or ['slides.md']
+        missing = [p for p in inputs if not Path(p).exists()]
+        if missing:
+            print(f"Error: Input file '{missing[0]}' not found")
+            sys.exit(1)
+        sys.exit(_run_checks(inputs, args.parse_cache))
+
+    if args.batch:
+        if not args.inputs:
+            parser.error('--batch needs at least one input file or directory')
+        missing = [p for p in args.inputs if not Path(p).exists()]
+        if missing:
+            print(f"Error: Input file '{missing[0]}' not found")
+            sys.exit(1)
+        converted = 0
+        for md_path, root in _expand_batch_inputs(args.inputs):
+            out_path = _batch_output_path(md_path, root, args.output_dir)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                convert(str(md_path), str(out_path))
+            except ConfigError as e:
+                print(f"Error: {md_path}: {e}", file=sys.stderr)
+                sys.exit(1)
+            converted += 1
+        print(f"Converted {converted} file(s)", file=sys.stderr if json_report else sys.stdout)
+        return
+
+    if len(args.inputs) > 2:
+        parser.error('too many arguments (use --batch to convert several files)')
+    input_file = args.inputs[0] if args.inputs else 'slides.md'
+    output_file = args.inputs[1] if len(args.inputs) > 1 else input_file.replace('.md', '.pptx')
+    if output_file == '-' and json_report:
+        parser.error("--report json prints to stdout, so it can't be combined with '-' output")
+
+    if not Path(input_file).exists():
+        print(f"Error: Input file '{input_file}' not found")
+        print("Usage: python convert.py <input.md> [output.pptx]")
+        sys.exit(1)
+
+    try:
+        if output_file == '-':
+            # PPTX bytes go to stdout, so progress messages move to stderr.
+            stdout = sys.stdout.buffer
+            with contextlib.redirect_stdout(sys.stderr):
+                convert_file(input_file, stdout, **options)
+            stdout.flush()
+        else:
+            convert(input_file, output_file)
+    except ConfigError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
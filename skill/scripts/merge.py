@@ -3,6 +3,8 @@
 # requires-python = ">=3.9"
 # dependencies = [
 #   "PyYAML>=6.0",
+#   "python-pptx>=0.6.21",
+#   "lxml>=4.9.0",
 # ]
 # ///
 """Merge multiple HackMD/Marp decks into a single deck.
@@ -15,6 +17,9 @@ PowerPoint.
 Usage:
     uv run scripts/merge.py deck1.md deck2.md deck3.md -o merged.md
     uv run scripts/merge.py *.md -o merged.md --title "Combined Deck"
+    uv run scripts/merge.py *.md -o merged.pptx   # render directly, no merged.md
+    uv run scripts/merge.py *.md -o merged.pptx --cache-dir .merge-cache
+    uv run scripts/merge.py a.pptx b.pptx -o merged.pptx   # join converted decks
 
 Paths are resolved relative to the current working directory.
 """
@@ -22,15 +27,32 @@ Paths are resolved relative to the current working directory.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
+import itertools
+import json
+import os
 import re
 import sys
-from collections.abc import Iterator
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple, TextIO, TypeVar
 from pathlib import Path
 
 import yaml
 
 FRONTMATTER_RE = re.compile(r"\A---\n(.*?)\n---\n", re.DOTALL)
 STYLE_BLOCK_RE = re.compile(r"<style>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+H1_LINE_RE = re.compile(r"^# ", re.MULTILINE)
+# Line starts scan_deck() cares about: fence toggles (same rule as
+# _is_fence_line), H1 headings and `---` separator lines.
+_SCAN_RE = re.compile(r"^(?:(?P<fence>[^\S\n]*```)|(?P<h1># )|(?P<sep>---$))", re.MULTILINE)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class MergeError(Exception):
@@ -50,15 +72,66 @@ def _is_fence_line(line: str) -> bool:
     return line.lstrip().startswith("```")
 
 
-def _iter_lines_outside_fences(text: str) -> Iterator[tuple[int, str]]:
-    """Yield (index, line) for each line outside a fenced code block."""
+def _first_content_line(text: str, pos: int = 0) -> str | None:
+    """Return the first non-blank line at or after `pos` that is outside a
+    fenced code block (fence lines themselves are skipped), or None."""
     in_fence = False
-    for idx, line in enumerate(text.split("\n")):
+    for line in _iter_lines(text, pos):
         if _is_fence_line(line):
             in_fence = not in_fence
+        elif not in_fence and line.strip():
+            return line
+    return None
+
+
+def _iter_lines(text: str, pos: int) -> Iterator[str]:
+    """Yield the lines of `text` from offset `pos` on, without splitting the
+    whole remainder up front (callers usually stop after a line or two)."""
+    while pos <= len(text):
+        end = text.find("\n", pos)
+        if end == -1:
+            end = len(text)
+        yield text[pos:end]
+        pos = end + 1
+
+
+class DeckScan(NamedTuple):
+    """What one pass over a deck body finds; see scan_deck()."""
+
+    title: str | None  # derive_deck_title()'s result, None if there is no H1
+    separators: list[int]  # offsets of `---` lines outside fenced blocks
+    first_content: str | None  # first non-blank line outside fenced blocks
+
+
+def scan_deck(body: str) -> DeckScan:
+    """Collect everything derive_deck_title() and flatten_deck() need from
+    `body` in a single fence-aware pass.
+
+    The pass is driven by one regex over line starts, so only fence, H1 and
+    `---` lines are visited in Python; plain content lines are skipped in C.
+    """
+    in_fence = False
+    title: str | None = None
+    separators: list[int] = []
+    for m in _SCAN_RE.finditer(body):
+        kind = m.lastgroup
+        if kind == "fence":
+            in_fence = not in_fence
+        elif in_fence:
             continue
-        if not in_fence:
-            yield idx, line
+        elif kind == "sep":
+            separators.append(m.start())
+        elif title is None:
+            line_end = body.find("\n", m.start())
+            if line_end == -1:
+                line_end = len(body)
+            h1 = body[m.start() + 2:line_end].strip()
+            following = _first_content_line(body, line_end + 1) if line_end < len(body) else None
+            if following is not None and following.startswith("## "):
+                title = _join_title_with_subtitle(h1, following[3:].strip())
+            else:
+                title = h1
+    return DeckScan(title, separators, _first_content_line(body))
 
 
 def extract_style_block(body: str) -> tuple[str | None, str]:
@@ -71,21 +144,10 @@ def extract_style_block(body: str) -> tuple[str | None, str]:
 
     Returns (None, body) if no qualifying style block is found.
     """
-    first_h1_offset: int | None = None
-    offset = 0
-    for line in body.split("\n"):
-        if not _is_fence_line(line) and line.startswith("# "):
-            # Computed only via lines we've already walked, so accumulating
-            # offset as we go keeps the slice boundary aligned with the body.
-            first_h1_offset = offset
-            break
-        offset += len(line) + 1
-    # NB: this loop can't reuse _iter_lines_outside_fences — that iterator
-    # discards fence-toggle lines, but the offset accumulator needs every line
-    # (including fences) to stay in sync with the source bytes.
-
-    search_window = body if first_h1_offset is None else body[:first_h1_offset]
-    m = STYLE_BLOCK_RE.search(search_window)
+    # A fence line never starts with "# ", so the first line-initial "# " is
+    # the first heading line the search window ends at.
+    h1 = H1_LINE_RE.search(body)
+    m = STYLE_BLOCK_RE.search(body, 0, len(body) if h1 is None else h1.start())
     if not m:
         return None, body
 
@@ -145,20 +207,21 @@ def derive_deck_title(body: str, fallback: str) -> str:
     `----`), HTML/Marp directive comments, or other heading levels — so we
     never pull a subtitle from an unrelated slide.
     """
-    pending_h1: str | None = None
-    for _, line in _iter_lines_outside_fences(body):
-        if pending_h1 is not None:
-            if not line.strip():
-                continue
-            if line.startswith("## "):
-                return _join_title_with_subtitle(pending_h1, line[3:].strip())
-            return pending_h1
-        if line.startswith("# "):
-            pending_h1 = line[2:].strip()
-    return pending_h1 if pending_h1 is not None else fallback
+    title = scan_deck(body).title
+    return title if title is not None else fallback
 
 
-def flatten_deck(body: str, deck_title: str) -> str:
+def _check_preamble(scan: DeckScan) -> None:
+    """Raise flatten_deck()'s MergeError if the deck has content before its
+    first H1."""
+    if scan.title is not None and not scan.first_content.startswith("# "):
+        raise MergeError(
+            "deck has content before its first H1; remove the preamble or "
+            "move the `# Title` to the top of the file"
+        )
+
+
+def flatten_deck(body: str, deck_title: str, scan: DeckScan | None = None) -> str:
     """Convert a single deck's body into a flat sequence of `----`-separated slides.
 
     Rules:
@@ -179,29 +242,25 @@ def flatten_deck(body: str, deck_title: str) -> str:
             (e.g. a paragraph then a `# Title`). The two reasonable
             interpretations — synthesise a cover, or use the later H1 — both
             corrupt the deck. Caller must clean up the input.
+
+    `scan` is scan_deck(body), if the caller already has it.
     """
-    lines = body.split("\n")
-    first_meaningful: str | None = None
-    has_h1 = False
-    for idx, line in _iter_lines_outside_fences(body):
-        if line == "---":
-            lines[idx] = "----"
-        if first_meaningful is None and line.strip():
-            first_meaningful = line
-        if line.startswith("# "):
-            has_h1 = True
-
-    if first_meaningful is None:
+    if scan is None:
+        scan = scan_deck(body)
+    _check_preamble(scan)
+    if scan.first_content is None:
         return f"# {deck_title}"
 
-    if not first_meaningful.startswith("# ") and has_h1:
-        raise MergeError(
-            "deck has content before its first H1; remove the preamble or "
-            "move the `# Title` to the top of the file"
-        )
-
-    flattened = "\n".join(lines).strip()
-    return f"# {deck_title}\n\n----\n\n{flattened}"
+    pieces = [f"# {deck_title}\n\n----\n\n"]
+    last = 0
+    for offset in scan.separators:
+        pieces.append(body[last:offset])
+        pieces.append("----")
+        last = offset + 3
+    pieces.append(body[last:])
+    pieces[1] = pieces[1].lstrip()
+    pieces[-1] = pieces[-1].rstrip()
+    return "".join(pieces)
 
 
 def build_toc_slide(merged_title: str, deck_titles: list[str]) -> str:
@@ -225,58 +284,271 @@ def build_toc_slide(merged_title: str, deck_titles: list[str]) -> str:
     return f"# {merged_title}\n\nTOC\n{bullets}"
 
 
-def merge_decks(
+def _read_deck(path: Path) -> tuple[str | None, str | None, str]:
+    """Return (frontmatter, style_html, body) for the deck at `path`."""
+    # Text mode's universal newlines already turn CRLF/CR into LF, so
+    # downstream offset math (e.g. in extract_style_block) can trust line
+    # breaks are single characters without extra replace() passes.
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as exc:
+        raise MergeError(f"{path}: cannot read: {exc}") from None
+    fm, body = split_frontmatter(raw)
+    style, body = extract_style_block(body)
+    return fm, style, body
+
+
+def _scan_path(path: Path) -> tuple[str | None, str | None, str]:
+    """First-pass work for one deck: return (frontmatter, style_html, title)
+    after checking that the deck flattens cleanly."""
+    fm, style, body = _read_deck(path)
+    scan = scan_deck(body)
+    try:
+        _check_preamble(scan)
+    except MergeError as exc:
+        raise MergeError(f"{path}: {exc}") from None
+    return fm, style, scan.title if scan.title is not None else path.stem
+
+
+def _flatten_path(item: tuple[Path, str]) -> str:
+    """Second-pass work for one deck: its flattened markdown."""
+    path, deck_title = item
+    _, _, body = _read_deck(path)
+    try:
+        return flatten_deck(body, deck_title)
+    except MergeError as exc:
+        raise MergeError(f"{path}: {exc}") from None
+
+
+def _ordered_map(fn: Callable[[T], R], items: Iterable[T], jobs: int) -> Iterator[R]:
+    """Like map(fn, items), but runs up to `jobs` calls in a thread pool.
+
+    Results are yielded in input order, and an exception surfaces at the
+    position of the item that raised it. Only about 2 * jobs results are
+    pending at once, so a slow consumer doesn't make finished decks pile up
+    in memory.
+    """
+    if jobs <= 1:
+        yield from map(fn, items)
+        return
+    pending: deque[Future[R]] = deque()
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for item in itertools.islice(items, 2 * jobs):
+            pending.append(pool.submit(fn, item))
+        while pending:
+            future = pending.popleft()
+            try:
+                result = future.result()
+            except BaseException:
+                for other in pending:
+                    other.cancel()
+                raise
+            for item in itertools.islice(items, 1):
+                pending.append(pool.submit(fn, item))
+            yield result
+
+
+class _MergePlan(NamedTuple):
+    """Result of the first merge pass."""
+
+    frontmatter: str | None  # merged frontmatter YAML, without fences
+    style: str | None  # the first deck's <style> block
+    deck_titles: list[str]
+
+
+def _plan_merge(paths: list[Path], explicit_title: str | None, jobs: int) -> _MergePlan:
+    """First pass: derive every deck title (the TOC comes first in the
+    output) and validate each deck, so a MergeError is raised before
+    anything is written."""
+    if not paths:
+        raise ValueError("merge_decks requires at least one input path")
+    scanned = list(_ordered_map(_scan_path, paths, jobs))
+    first_fm, first_style, _ = scanned[0]
+    fm_yaml = override_title(first_fm, explicit_title) if explicit_title is not None else first_fm
+    return _MergePlan(fm_yaml, first_style, [deck_title for _, _, deck_title in scanned])
+
+
+def _iter_sections(
+    paths: list[Path],
+    plan: _MergePlan,
+    explicit_title: str | None,
+    emit_toc: bool,
+    jobs: int,
+) -> Iterator[str]:
+    """Second pass: yield the merged deck's `---` sections in order (the TOC
+    slide, then each deck re-read and flattened)."""
+    if emit_toc:
+        toc_title = explicit_title if explicit_title is not None else plan.deck_titles[0]
+        yield build_toc_slide(toc_title, plan.deck_titles)
+    yield from _ordered_map(_flatten_path, zip(paths, plan.deck_titles), jobs)
+
+
+def write_merged(
     paths: list[Path],
+    out: TextIO,
     explicit_title: str | None,
     *,
     emit_toc: bool = True,
-) -> str:
-    """Merge decks at `paths` into one markdown string."""
-    if not paths:
-        raise ValueError("merge_decks requires at least one input path")
-
-    first_fm: str | None = None
-    first_style: str | None = None
-    flattened_bodies: list[str] = []
-    deck_titles: list[str] = []
-
-    for idx, path in enumerate(paths):
-        # Normalize CRLF/CR to LF so downstream byte-offset math (e.g. in
-        # extract_style_block) can trust line breaks are single characters.
-        raw = path.read_text(encoding="utf-8").replace("\r\n", "\n").replace("\r", "\n")
-        fm, body = split_frontmatter(raw)
-        style, body = extract_style_block(body)
-        if idx == 0:
-            first_fm = fm
-            first_style = style
-        deck_title = derive_deck_title(body, fallback=path.stem)
-        deck_titles.append(deck_title)
+    jobs: int = 1,
+) -> None:
+    """Merge decks at `paths`, writing the markdown to the text stream `out`.
+
+    Works in two passes so only one deck is in memory at a time. The first
+    pass derives every deck title (the TOC comes first in the output) and
+    validates each deck, so a MergeError is raised before anything is
+    written. The second pass re-reads each deck and writes its flattened
+    body straight to `out`. With `jobs` > 1, the per-deck work of each pass
+    runs in that many threads (overlapping reads from slow storage); output
+    order and error reporting are unchanged.
+    """
+    plan = _plan_merge(paths, explicit_title, jobs)
+    if plan.frontmatter is not None:
+        out.write(f"---\n{plan.frontmatter}\n---\n\n")
+    if plan.style is not None:
+        out.write(plan.style + "\n\n")
+
+    separator = ""
+    for section in _iter_sections(paths, plan, explicit_title, emit_toc, jobs):
+        out.write(separator)
+        out.write(section)
+        separator = "\n\n---\n\n"
+    out.write("\n")
+
+
+def _unit_key(convert, slides, theme, images) -> str:
+    """Cache key for one rendered unit: its parsed slides, the images they
+    embed, everything that styles them, and the renderer version."""
+    digest = hashlib.sha256(convert.renderer_version().encode())
+    image_digests = []
+    for slide in slides:
+        for item in slide.content:
+            if item.type == convert.IMAGE:
+                path = images.resolve(item.src)
+                image_digests.append(hashlib.sha256(path.read_bytes()).hexdigest() if path else None)
+    payload = [
+        image_digests,
+        [dict(theme.colors), dict(theme.fonts), dict(theme.sizes), dict(theme.layouts)],
+    ]
+    digest.update(convert.dump_slides(slides))  # includes the style overrides
+    digest.update(json.dumps(payload, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+
+def _render_cached(convert, slides, theme, cache_dir: Path, base_dir: Path) -> Path:
+    """Return the cached PPTX for `slides`, rendering it first on a miss."""
+    # Section indexes count from the start of the whole merge; make them
+    # relative so a deck's render doesn't depend on its position.
+    offset = slides[0].section_idx
+    for slide in slides:
+        slide.section_idx -= offset
+    path = cache_dir / f"{_unit_key(convert, slides, theme, convert.ImageStore(base_dir))}.pptx"
+    if not path.exists():
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
         try:
-            flattened_bodies.append(flatten_deck(body, deck_title))
-        except MergeError as exc:
-            raise MergeError(f"{path}: {exc}") from None
+            convert.render_deck(slides, theme, str(tmp), compression="fast", base_dir=base_dir)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+    return path
 
-    sections: list[str] = []
-    if emit_toc:
-        toc_title = explicit_title if explicit_title is not None else deck_titles[0]
-        sections.append(build_toc_slide(toc_title, deck_titles))
-    sections.extend(flattened_bodies)
-    merged_body = "\n\n---\n\n".join(sections)
-
-    head_parts: list[str] = []
-    if explicit_title is not None or first_fm is not None:
-        fm_yaml = (
-            override_title(first_fm, explicit_title)
-            if explicit_title is not None
-            else first_fm
-        )
-        head_parts.append(f"---\n{fm_yaml}\n---")
-    if first_style is not None:
-        head_parts.append(first_style)
 
-    if head_parts:
-        return "\n\n".join(head_parts) + "\n\n" + merged_body + "\n"
-    return merged_body + "\n"
+def merge_to_pptx(
+    paths: list[Path],
+    output,
+    explicit_title: str | None,
+    *,
+    emit_toc: bool = True,
+    jobs: int = 1,
+    compression: str = "default",
+    cache_dir: Path | None = None,
+) -> int:
+    """Merge decks at `paths` straight into a PPTX at `output`.
+
+    Equivalent to write_merged() followed by convert.py on the result, but
+    each deck's flattened text is parsed on its own and handed to the
+    renderer, so the merged markdown is never built or re-parsed. Config
+    files and images are looked up as if the merged markdown sat next to
+    `output`.
+
+    With `cache_dir`, each deck is rendered to its own PPTX there, keyed on
+    a hash of its parsed slides, the theme and the renderer version, and
+    the output is stitched together from those files; decks whose key is
+    already cached are not rendered again, so after editing one deck only
+    that deck and the TOC slide are re-rendered. Stale entries are never
+    removed; clear the directory to reclaim space.
+    Returns the number of slides written.
+    """
+    import convert  # needs python-pptx; only this path of merge.py uses it
+
+    plan = _plan_merge(paths, explicit_title, jobs)
+    sections = _iter_sections(paths, plan, explicit_title, emit_toc, jobs)
+    base_dir = Path(output).parent
+    try:
+        if cache_dir is None:
+            slides = convert.parse_markdown_sections(
+                sections, frontmatter=plan.frontmatter, style_block=plan.style)
+            theme, _ = convert.resolve_theme(output, slides.theme_config or None)
+            return convert.render_deck(slides, theme, output, compression=compression,
+                                       base_dir=base_dir)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        theme = None
+        sources = []
+        parts = convert.iter_markdown_sections(
+            sections, frontmatter=plan.frontmatter, style_block=plan.style)
+        for index, part in enumerate(parts):
+            if not part:
+                continue
+            if theme is None:
+                theme, _ = convert.resolve_theme(output, part.theme_config or None)
+            if index == 0 and emit_toc:
+                # The TOC lists every deck, so it changes whenever any deck
+                # is added, removed or retitled; it is cheap to re-render.
+                toc = io.BytesIO()
+                convert.render_deck(part, theme, toc, compression="store")
+                sources.append(toc)
+            else:
+                sources.append(_render_cached(convert, part, theme, cache_dir, base_dir))
+        return convert.concat_packages(sources, output, compression=compression)
+    except convert.ConfigError as exc:
+        raise MergeError(str(exc)) from None
+
+
+def merge_pptx_files(paths: list[Path], output, *, compression: str = "default") -> int:
+    """Concatenate already-converted PPTX decks at `paths` into `output`.
+
+    No markdown is involved: slides, notes and sections are copied from
+    each package as-is (see convert.concat_packages()), with masters,
+    layouts, themes and media shared wherever they are identical. There is
+    no TOC slide. Returns the number of slides written.
+    """
+    import convert  # needs python-pptx; only this path of merge.py uses it
+    from lxml import etree
+
+    if not paths:
+        raise ValueError("merge_pptx_files requires at least one input path")
+    for path in paths:
+        if not zipfile.is_zipfile(path):
+            raise MergeError(f"{path}: not a PPTX file")
+    try:
+        return convert.concat_packages([str(path) for path in paths], output, compression=compression)
+    except (KeyError, ValueError, zipfile.BadZipFile, etree.XMLSyntaxError) as exc:
+        raise MergeError(f"cannot merge PPTX inputs: {exc}") from None
+
+
+def merge_decks(
+    paths: list[Path],
+    explicit_title: str | None,
+    *,
+    emit_toc: bool = True,
+    jobs: int = 1,
+) -> str:
+    """Merge decks at `paths` into one markdown string."""
+    buf = io.StringIO()
+    write_merged(paths, buf, explicit_title, emit_toc=emit_toc, jobs=jobs)
+    return buf.getvalue()
 
 
 def main(argv: list[str]) -> int:
@@ -284,8 +556,19 @@ def main(argv: list[str]) -> int:
         description=__doc__,
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    parser.add_argument("inputs", nargs="+", type=Path, help="Input deck markdown files (order preserved)")
-    parser.add_argument("-o", "--output", type=Path, required=True, help="Output merged markdown file")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        type=Path,
+        help="Input deck markdown files, or already-converted .pptx decks (order preserved)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        help="Output merged markdown file, or a .pptx to render the merge directly",
+    )
     parser.add_argument("--title", default=None, help="Override the `title:` field in the merged frontmatter")
     parser.add_argument(
         "--no-toc",
@@ -293,7 +576,39 @@ def main(argv: list[str]) -> int:
         action="store_false",
         help="Suppress the auto-generated Table of Contents slide (emitted by default)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Read and flatten up to N decks concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="With a .pptx output, keep each deck's render in DIR and reuse it while the deck is unchanged",
+    )
     args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    to_pptx = args.output.suffix.lower() == ".pptx"
+    if args.cache_dir is not None and not to_pptx:
+        parser.error("--cache-dir only applies to .pptx output")
+    pptx_inputs = sum(p.suffix.lower() == ".pptx" for p in args.inputs)
+    if pptx_inputs and pptx_inputs != len(args.inputs):
+        parser.error("inputs must be all markdown or all .pptx")
+    if pptx_inputs and not to_pptx:
+        parser.error(".pptx inputs can only be merged into a .pptx output")
+    if pptx_inputs:
+        # Converted decks are concatenated as they are: no frontmatter to
+        # retitle, no TOC slide, nothing to read concurrently or render.
+        ignored = [flag for flag, used in (("--title", args.title is not None),
+                                           ("--no-toc", not args.emit_toc),
+                                           ("--jobs", args.jobs != 1),
+                                           ("--cache-dir", args.cache_dir is not None)) if used]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} only apply to markdown inputs")
 
     for p in args.inputs:
         if not p.is_file():
@@ -304,17 +619,33 @@ def main(argv: list[str]) -> int:
             return 2
 
     title = args.title or None  # treat --title "" as if --title was not passed
+    # Stream into a temp file beside the output and move it into place at
+    # the end, so a failure never leaves a truncated merge behind.
+    tmp_output = args.output.with_name(args.output.name + ".tmp")
     try:
-        merged = merge_decks(args.inputs, explicit_title=title, emit_toc=args.emit_toc)
+        if pptx_inputs:
+            merge_pptx_files(args.inputs, str(tmp_output))
+        elif to_pptx:
+            merge_to_pptx(args.inputs, str(tmp_output), explicit_title=title,
+                          emit_toc=args.emit_toc, jobs=args.jobs, cache_dir=args.cache_dir)
+        else:
+            with open(tmp_output, "w", encoding="utf-8", newline="\n") as out:
+                write_merged(args.inputs, out, explicit_title=title, emit_toc=args.emit_toc,
+                             jobs=args.jobs)
+        os.replace(tmp_output, args.output)
     except MergeError as exc:
         print(f"error: {exc}", file=sys.stderr)
         return 2
-
-    try:
-        args.output.write_text(merged, encoding="utf-8")
+    except ValueError as exc:
+        # A package concat_packages() can't make sense of.
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
     except OSError as exc:
         print(f"error: cannot write {args.output}: {exc}", file=sys.stderr)
         return 2
+    finally:
+        if tmp_output.exists():
+            tmp_output.unlink()
     print(f"merged {len(args.inputs)} deck(s) -> {args.output}")
     return 0
 
@@ -0,0 +1,352 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.9"
+# dependencies = [
+#   "python-pptx>=0.6.21",
+#   "lxml>=4.9.0",
+#   "PyYAML>=6.0",
+# ]
+# ///
+"""Local HTTP service that converts HackMD/Marp markdown to PPTX.
+
+Conversions run in a pool of worker processes that are started and warmed
+up (modules imported, default template and highlighter exercised) before
+the server accepts connections. Requests beyond the pool size wait in a
+bounded queue; when that is full the server answers 503 straight away.
+
+Endpoints:
+    POST /convert   body is the markdown itself, or a JSON object
+                    {"markdown": "...", "config": {...}} where `config` has
+                    the same shape as config.json. Returns the PPTX bytes.
+    GET  /metrics   JSON counters and latency percentiles.
+    GET  /healthz   "ok".
+
+Usage:
+    uv run scripts/serve.py --port 8000 --workers 4
+    curl --data-binary @slides.md http://127.0.0.1:8000/convert -o slides.pptx
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import convert
+
+PPTX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    408: 'Request Timeout', 411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+
+# Exercises the parser, highlighter, tables, notes and the zip writer once
+# per worker so the first real request doesn't pay for it.
+_WARMUP_DECK = """# Warm-up
+
+----
+
+## Slide
+
+- **bold** _italic_ `code` [link](https://example.com)
+
+```python
+def f(x):
+    return x + 1
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+note:
+warm-up
+"""
+
+
+def _warm_worker():
+    """Pool initializer: run one throwaway conversion in the new process."""
+    convert.convert_markdown(_WARMUP_DECK)
+
+
+def _convert_job(markdown, config, compression):
+    """Worker entry point. Returns the PPTX bytes."""
+    return convert.convert_markdown(markdown, config, compression=compression)
+
+
+class HttpError(Exception):
+    """Raised while handling a request to send an error response."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ConversionServer:
+    """asyncio HTTP front end over a warm process pool.
+
+    At most `workers` conversions run at once; up to `max_queue` more wait
+    for a free worker. A request that has not been converted `timeout`
+    seconds after it was queued, whether still waiting for a worker or
+    still converting, gets a 504. A conversion that was started keeps its
+    worker busy (and counted as in flight) until the job actually
+    finishes, so a burst of slow decks cannot oversubscribe the pool. If a worker dies (out of memory, a crash in a native
+    library), the pool is replaced with a fresh one so later requests are
+    served again.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, *, workers=None, max_queue=16,
+                 timeout=30.0, max_body=10 * 1024 * 1024, compression='default'):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_body = max_body
+        self.compression = compression
+        self._pool = None
+        self._server = None
+        self._slots = None
+        self._in_flight = 0
+        self._queued = 0
+        self._latencies = deque(maxlen=1000)
+        self._counters = {'requests': 0, 'converted': 0, 'bad_request': 0,
+                          'rejected': 0, 'timeouts': 0, 'errors': 0, 'pool_restarts': 0}
+        self._started = None
+
+    async def start(self):
+        """Start and warm the worker pool, then begin accepting connections."""
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._pool = self._new_pool()
+        # Submitting one job per worker makes the pool spawn (and warm) every
+        # process now rather than on the first requests.
+        await asyncio.gather(*(loop.run_in_executor(self._pool, int) for _ in range(self.workers)))
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(self.workers, initializer=_warm_worker)
+
+    def _restart_pool(self, broken):
+        """Replace `broken` with a fresh pool, unless that was already done
+        for another request that failed with it."""
+        if self._pool is not broken:
+            return
+        self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._counters['pool_restarts'] += 1
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    def metrics(self):
+        """Counters plus latency percentiles (ms) over the last 1000 conversions."""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            **self._counters,
+            'in_flight': self._in_flight,
+            'queued': self._queued,
+            'workers': self.workers,
+            'uptime_s': round(time.monotonic() - self._started, 1) if self._started else 0,
+            'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95),
+                           'p99': percentile(0.99), 'max': percentile(1.0)},
+        }
+
+    # --- HTTP -----------------------------------------------------------------
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                method, path, headers, body = await asyncio.wait_for(
+                    self._read_request(reader), self.timeout)
+                status, content_type, payload = await self._route(method, path, headers, body)
+            except HttpError as e:
+                status, content_type, payload = e.status, 'text/plain; charset=utf-8', f"{e}\n".encode()
+            except asyncio.TimeoutError:
+                status, content_type, payload = 408, 'text/plain; charset=utf-8', b"request timeout\n"
+            await self._write_response(writer, status, content_type, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, path, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HttpError(400, 'malformed request line')
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', 'identity').lower() != 'identity':
+            # Chunked bodies aren't decoded; reading them as empty would
+            # silently convert an empty deck.
+            raise HttpError(411, 'send the body with a Content-Length (chunked encoding is not supported)')
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'bad Content-Length')
+        if length > self.max_body:
+            raise HttpError(413, f'body exceeds {self.max_body} bytes')
+        body = await reader.readexactly(length) if length else b''
+        return method, path.split('?', 1)[0], headers, body
+
+    @staticmethod
+    async def _write_response(writer, status, content_type, payload):
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + payload
+        )
+        await writer.drain()
+
+    async def _route(self, method, path, headers, body):
+        if path == '/healthz':
+            return 200, 'text/plain; charset=utf-8', b'ok\n'
+        if path == '/metrics':
+            return 200, 'application/json', json.dumps(self.metrics()).encode()
+        if path != '/convert':
+            raise HttpError(404, f'no such endpoint: {path}')
+        if method != 'POST':
+            raise HttpError(405, 'use POST')
+        self._counters['requests'] += 1
+        markdown, config = self._decode_body(headers, body)
+        return 200, PPTX_CONTENT_TYPE, await self._convert(markdown, config)
+
+    def _decode_body(self, headers, body):
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            self._counters['bad_request'] += 1
+            raise HttpError(400, 'body must be UTF-8')
+        if not headers.get('content-type', '').startswith('application/json'):
+            return text, None
+        try:
+            request = json.loads(text)
+        except ValueError as e:
+            self._counters['bad_request'] += 1
+            raise HttpError(400, f'invalid JSON: {e}')
+        if not isinstance(request, dict) or not isinstance(request.get('markdown'), str):
+            self._counters['bad_request'] += 1
+            raise HttpError(400, 'JSON body needs a "markdown" string')
+        return request['markdown'], request.get('config')
+
+    async def _convert(self, markdown, config):
+        if self._queued >= self.max_queue and self._slots.locked():
+            self._counters['rejected'] += 1
+            raise HttpError(503, 'server busy, try again later')
+        started = time.monotonic()
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._counters['timeouts'] += 1
+            raise HttpError(504, f'no worker became free within {self.timeout}s')
+        finally:
+            self._queued -= 1
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            try:
+                future = loop.run_in_executor(pool, _convert_job, markdown, config, self.compression)
+            except BrokenProcessPool:
+                # A worker died since the last job finished; retry on a fresh pool.
+                self._restart_pool(pool)
+                pool = self._pool
+                future = loop.run_in_executor(pool, _convert_job, markdown, config, self.compression)
+        except BaseException:
+            self._in_flight -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release_slot)
+        try:
+            # shield() keeps the job (and its slot) alive past a timeout.
+            remaining = max(0.0, self.timeout - (time.monotonic() - started))
+            data = await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            self._counters['timeouts'] += 1
+            raise HttpError(504, f'request took longer than {self.timeout}s')
+        except convert.ConfigError as e:
+            self._counters['bad_request'] += 1
+            raise HttpError(400, str(e))
+        except BrokenProcessPool:
+            self._counters['errors'] += 1
+            self._restart_pool(pool)
+            raise HttpError(500, 'conversion worker died; workers have been restarted')
+        except Exception as e:
+            self._counters['errors'] += 1
+            raise HttpError(500, f'conversion failed: {e}')
+        self._counters['converted'] += 1
+        self._latencies.append(time.monotonic() - started)
+        return data
+
+    def _release_slot(self, future):
+        if not future.cancelled():
+            future.exception()  # mark retrieved; errors are reported by _convert
+        self._in_flight -= 1
+        self._slots.release()
+
+
+async def _serve(args):
+    server = ConversionServer(args.host, args.port, workers=args.workers, max_queue=args.max_queue,
+                              timeout=args.timeout, compression=args.compression)
+    await server.start()
+    print(f"Serving on http://{server.host}:{server.port} with {server.workers} worker(s)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve markdown-to-PPTX conversion over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes, i.e. concurrent conversions (default: CPU count)')
+    parser.add_argument('--max-queue', type=int, default=16,
+                        help='Requests allowed to wait for a worker before answering 503')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Seconds per conversion, including time queued for a worker, '
+                             'before answering 504')
+    parser.add_argument('--compression', choices=list(convert.COMPRESSION_LEVELS), default='default',
+                        help='Zip compression for returned decks')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,6 @@
+import struct
 import sys
+import zlib
 from pathlib import Path
 
 import pytest
@@ -9,6 +11,12 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "skill" / "scrip
 from convert import DEFAULT_COLORS, DEFAULT_FONTS
 
 
+@pytest.fixture(autouse=True)
+def _isolated_cache_home(tmp_path, monkeypatch):
+    # With --cache the CLI keeps parsed decks and images under $XDG_CACHE_HOME.
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
+
+
 @pytest.fixture
 def colors():
     return dict(DEFAULT_COLORS)
@@ -41,3 +49,27 @@ def sample_content_md():
 @pytest.fixture
 def tmp_output_dir(tmp_path):
     return tmp_path
+
+
+def _png(width=4, height=4, rgb=(255, 0, 0)):
+    """Encode a solid-colour RGB PNG with the stdlib only."""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    rows = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+@pytest.fixture
+def make_png():
+    return _png
+
+
+@pytest.fixture
+def png_bytes():
+    return _png()
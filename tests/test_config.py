@@ -2,7 +2,18 @@ import json
 
 import pytest
 
-from convert import load_config
+import convert
+from convert import (
+    DEFAULT_COLORS,
+    DEFAULT_SIZES,
+    ConfigError,
+    build_theme,
+    clear_config_cache,
+    hex_to_rgb,
+    load_config,
+    resolve_config,
+    resolve_theme,
+)
 
 
 class TestLoadConfig:
@@ -36,3 +47,165 @@ class TestLoadConfig:
         cfg.write_text("{invalid json!!")
         result = load_config(str(md))
         assert result == {}
+
+
+class TestConfigCache:
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        clear_config_cache()
+        yield
+        clear_config_cache()
+
+    def test_resolve_reports_source(self, tmp_path):
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+        cfg = tmp_path / "slides-config.json"
+        cfg.write_text(json.dumps({"fonts": {"body": "Arial"}}))
+        config, sources = resolve_config(str(md))
+        assert config["fonts"]["body"] == "Arial"
+        assert sources == [cfg]
+
+    def test_resolve_without_config_has_no_source(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+        assert resolve_config(str(md)) == ({}, [])
+
+    def test_parsed_once_per_unchanged_file(self, tmp_path, monkeypatch):
+        cfg = tmp_path / "config.json"
+        cfg.write_text(json.dumps({"colors": {"primary": "FF0000"}}))
+        decks = []
+        for i in range(5):
+            md = tmp_path / f"deck{i}.md"
+            md.write_text("# test")
+            decks.append(md)
+
+        calls = []
+        real_loads = convert.json.loads
+        monkeypatch.setattr(convert.json, "loads", lambda s: calls.append(s) or real_loads(s))
+        for md in decks:
+            assert load_config(str(md))["colors"]["primary"] == "FF0000"
+        assert len(calls) == 1
+
+    def test_directory_listed_once(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config.json").write_text("{}")
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+
+        listed = []
+        real_scandir = convert.os.scandir
+        monkeypatch.setattr(convert.os, "scandir", lambda p: listed.append(p) or real_scandir(p))
+        for _ in range(3):
+            resolve_config(str(md))
+        assert listed == [str(tmp_path)]
+
+    def test_edit_invalidates_cache(self, tmp_path):
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+        cfg = tmp_path / "config.json"
+        cfg.write_text(json.dumps({"colors": {"primary": "FF0000"}}))
+        assert load_config(str(md))["colors"]["primary"] == "FF0000"
+        # Different size guarantees a new cache key even on coarse-mtime filesystems.
+        cfg.write_text(json.dumps({"colors": {"primary": "00FF00", "accent": "000000"}}))
+        assert load_config(str(md))["colors"]["primary"] == "00FF00"
+
+    def test_returned_config_is_private_copy(self, tmp_path):
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+        (tmp_path / "config.json").write_text(json.dumps({"colors": {"primary": "FF0000"}}))
+        load_config(str(md))["colors"]["primary"] = "mutated"
+        assert load_config(str(md))["colors"]["primary"] == "FF0000"
+
+
+class TestLayeredConfig:
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        clear_config_cache()
+        yield
+        clear_config_cache()
+
+    def test_directory_layer_overrides_working_directory(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config.json").write_text(json.dumps({
+            "colors": {"primary": "111111", "accent": "222222"},
+            "fonts": {"body": "Arial"},
+        }))
+        deck_dir = tmp_path / "unit1"
+        deck_dir.mkdir()
+        (deck_dir / "config.json").write_text(json.dumps({"colors": {"accent": "333333"}}))
+        md = deck_dir / "slides.md"
+        md.write_text("# test")
+
+        config, sources = resolve_config(str(md))
+        assert sources == [tmp_path / "config.json", deck_dir / "config.json"]
+        # Nested sections merge per key rather than replacing wholesale.
+        assert config["colors"] == {"primary": "111111", "accent": "333333"}
+        assert config["fonts"] == {"body": "Arial"}
+
+    def test_same_directory_counts_once(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "config.json").write_text("{}")
+        md = tmp_path / "slides.md"
+        md.write_text("# test")
+        assert resolve_config(str(md))[1] == [tmp_path / "config.json"]
+
+
+class TestBuildTheme:
+    def test_defaults(self):
+        theme = build_theme()
+        assert dict(theme.colors) == DEFAULT_COLORS
+        assert dict(theme.sizes) == DEFAULT_SIZES
+        assert theme.rgb["accent"] == hex_to_rgb(DEFAULT_COLORS["accent"])
+
+    def test_normalises_hex(self):
+        theme = build_theme({"colors": {"accent": "#00d9ff"}})
+        assert theme.colors["accent"] == "00D9FF"
+
+    def test_later_layers_win(self):
+        theme = build_theme(
+            {"colors": {"accent": "111111"}, "sizes": {"code": 10}},
+            {"colors": {"accent": "222222"}},
+        )
+        assert theme.colors["accent"] == "222222"
+        assert theme.sizes["code"] == 10
+
+    def test_theme_is_immutable(self):
+        theme = build_theme()
+        with pytest.raises(TypeError):
+            theme.colors["accent"] = "000000"
+
+    def test_collects_all_errors_with_source(self):
+        with pytest.raises(ConfigError) as exc:
+            build_theme(({"colors": {"accent": "blue", "primary": "12345"},
+                          "fonts": {"body": ""},
+                          "sizes": {"code": -1}}, "deck/config.json"))
+        msg = str(exc.value)
+        assert "deck/config.json: colors.accent" in msg
+        assert "colors.primary" in msg
+        assert "fonts.body" in msg
+        assert "sizes.code" in msg
+
+    def test_section_must_be_mapping(self):
+        with pytest.raises(ConfigError, match="colors: expected a mapping"):
+            build_theme({"colors": ["FF0000"]})
+
+    def test_theme_shared_between_decks(self, tmp_path):
+        clear_config_cache()
+        (tmp_path / "config.json").write_text(json.dumps({"colors": {"accent": "FF0000"}}))
+        a = tmp_path / "a.md"
+        b = tmp_path / "b.md"
+        a.write_text("# a")
+        b.write_text("# b")
+        assert resolve_theme(str(a))[0] is resolve_theme(str(b))[0]
+
+    def test_theme_cache_is_bounded(self, monkeypatch):
+        import convert
+
+        clear_config_cache()
+        monkeypatch.setattr(convert, "_THEME_CACHE_MAX", 3)
+        first = convert.theme_from_config({"colors": {"accent": "000000"}})
+        for i in range(1, 10):
+            convert.theme_from_config({"colors": {"accent": f"{i:06d}"}})
+        assert len(convert._THEME_CACHE) == 3
+        assert convert.theme_from_config({"colors": {"accent": "000000"}}) is not first
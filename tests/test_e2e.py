@@ -1,3 +1,5 @@
+import asyncio
+import io
 import json
 import subprocess
 import sys
@@ -49,6 +51,17 @@ class TestEndToEnd:
         title_text = first_slide.placeholders[0].text_frame.text
         assert "My Awesome Presentation" in title_text
 
+    def test_overflow_warning_in_summary(self, tmp_output_dir):
+        md = tmp_output_dir / "long.md"
+        md.write_text("## Long\n\n- " + "word " * 2000 + "\n")
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, str(md), str(tmp_output_dir / "long.pptx")],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert "Warning: 1 slide(s) may overflow" in result.stdout
+        assert "slide 1 (Long)" in result.stdout
+
     def test_missing_input_exits_1(self, tmp_output_dir):
         result = subprocess.run(
             [sys.executable, CONVERT_SCRIPT, "/nonexistent/file.md"],
@@ -108,3 +121,322 @@ class TestEndToEnd:
         )
         assert result.returncode == 0
         assert Path(out).exists()
+
+    def test_batch_converts_directory_tree(self, tmp_output_dir):
+        src = tmp_output_dir / "decks"
+        (src / "unit1").mkdir(parents=True)
+        (src / "unit2").mkdir()
+        (src / "unit1" / "a.md").write_text("# Unit 1\n\n## Slide\n\n- item\n")
+        (src / "unit2" / "b.md").write_text("# Unit 2\n\n## Slide\n\n- item\n")
+        (src / "unit2" / "config.json").write_text(json.dumps({"colors": {"accent": "FF0000"}}))
+        out_dir = tmp_output_dir / "out"
+
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, "--batch", str(src), "--output-dir", str(out_dir)],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert zipfile.is_zipfile(out_dir / "unit1" / "a.pptx")
+        assert zipfile.is_zipfile(out_dir / "unit2" / "b.pptx")
+        assert "Converted 2 file(s)" in result.stdout
+
+    def test_invalid_config_fails_before_rendering(self, tmp_output_dir):
+        md_file = tmp_output_dir / "test.md"
+        md_file.write_text("# Title\n\n- item\n")
+        (tmp_output_dir / "config.json").write_text(json.dumps({"colors": {"accent": "not-a-color"}}))
+        out = tmp_output_dir / "out.pptx"
+
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, str(md_file), str(out)],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 1
+        assert "colors.accent" in result.stderr
+        assert not out.exists()
+
+    def test_frontmatter_theme_applies_per_deck(self, tmp_output_dir):
+        from convert import hex_to_rgb
+
+        table = "## T\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+        (tmp_output_dir / "config.json").write_text(json.dumps({"colors": {"accent": "00FF00"}}))
+        (tmp_output_dir / "themed.md").write_text(
+            "---\ntitle: Themed\npptx:\n  colors:\n    accent: FF0000\n---\n\n" + table
+        )
+        (tmp_output_dir / "plain.md").write_text(table)
+
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, "--batch",
+             str(tmp_output_dir / "themed.md"), str(tmp_output_dir / "plain.md")],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+        def header_fill(name):
+            prs = Presentation(str(tmp_output_dir / name))
+            shape = next(sh for sh in prs.slides[0].shapes if sh.has_table)
+            return shape.table.cell(0, 0).fill.fore_color.rgb
+
+        # Frontmatter beats the directory config, but only for its own deck.
+        assert header_fill("themed.pptx") == hex_to_rgb("FF0000")
+        assert header_fill("plain.pptx") == hex_to_rgb("00FF00")
+
+    def test_streaming_matches_default_output(self, tmp_output_dir):
+        outputs = {}
+        for flag in ([], ["--streaming"]):
+            out = str(tmp_output_dir / f"demo{len(flag)}.pptx")
+            result = subprocess.run(
+                [sys.executable, CONVERT_SCRIPT, *flag, DEMO_MD, out],
+                capture_output=True, text=True,
+            )
+            assert result.returncode == 0, result.stderr
+            prs = Presentation(out)
+            outputs[bool(flag)] = [
+                [sh.text_frame.text for sh in slide.shapes if sh.has_text_frame] for slide in prs.slides
+            ]
+        assert outputs[True] == outputs[False]
+
+    def test_compression_store(self, tmp_output_dir):
+        out = tmp_output_dir / "stored.pptx"
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, "--compression", "store", DEMO_MD, str(out)],
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        with zipfile.ZipFile(out) as z:
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in z.infolist())
+        assert len(Presentation(str(out)).slides) >= 8
+
+    def test_dash_writes_pptx_to_stdout(self, tmp_output_dir):
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, DEMO_MD, "-"],
+            capture_output=True,
+        )
+        assert result.returncode == 0, result.stderr
+        prs = Presentation(io.BytesIO(result.stdout))
+        assert len(prs.slides) >= 8
+        assert b"Created" in result.stderr
+        assert not (tmp_output_dir / "-").exists()
+
+    def test_images_relative_to_markdown(self, tmp_output_dir, png_bytes):
+        (tmp_output_dir / "img").mkdir()
+        (tmp_output_dir / "img" / "logo.png").write_bytes(png_bytes)
+        md = tmp_output_dir / "deck.md"
+        md.write_text("## One\n\n![logo](img/logo.png)\n\n---\n\n## Two\n\n![logo](img/logo.png)\n")
+        out = tmp_output_dir / "deck.pptx"
+        result = subprocess.run(
+            [sys.executable, CONVERT_SCRIPT, str(md), str(out)],
+            capture_output=True, text=True, cwd="/",
+        )
+        assert result.returncode == 0, result.stderr
+        pictures = [sh for slide in Presentation(str(out)).slides for sh in slide.shapes if sh.shape_type == 13]
+        assert len(pictures) == 2
+        with zipfile.ZipFile(out) as z:
+            assert [n for n in z.namelist() if n.startswith("ppt/media/")] == ["ppt/media/image1.png"]
+
+
+class TestConvertMarkdown:
+    MD = "# Intro\n\n----\n\n## Slide\n\n- item\n\nnote:\nsay hi\n"
+
+    def test_returns_pptx_bytes_with_sections(self):
+        from convert import convert_markdown
+
+        data = convert_markdown(self.MD)
+        prs = Presentation(io.BytesIO(data))
+        assert len(prs.slides) == 2
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            assert "Intro" in z.read("ppt/presentation.xml").decode()
+
+    def test_writes_to_file_object_with_config(self):
+        from convert import convert_markdown, hex_to_rgb
+
+        md = "## T\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+        buf = io.BytesIO()
+        assert convert_markdown(md, {"colors": {"accent": "123456"}}, output=buf) is None
+        shape = next(sh for sh in Presentation(buf).slides[0].shapes if sh.has_table)
+        assert shape.table.cell(0, 0).fill.fore_color.rgb == hex_to_rgb("123456")
+
+    def test_local_images_need_base_dir(self, tmp_path, png_bytes):
+        from convert import convert_markdown
+
+        (tmp_path / "a.png").write_bytes(png_bytes)
+        md = "## T\n\n![a](a.png)\n"
+        without = Presentation(io.BytesIO(convert_markdown(md))).slides[0]
+        with_dir = Presentation(io.BytesIO(convert_markdown(md, base_dir=tmp_path))).slides[0]
+        assert not [sh for sh in without.shapes if sh.shape_type == 13]
+        assert [sh for sh in with_dir.shapes if sh.shape_type == 13]
+
+    def test_reports_overflowing_slides(self):
+        from convert import convert_markdown
+
+        overflows = []
+        long_text = "word " * 2000  # one paragraph, taller than a slide
+        convert_markdown(f"## Fits\n\n- a\n\n---\n\n## Long\n\n{long_text}\n", overflows=overflows)
+        assert [(o["slide"], o["title"]) for o in overflows] == [(2, "Long")]
+        assert overflows[0]["overflow_in"] > 0
+
+    def test_invalid_config_raises(self):
+        from convert import ConfigError, convert_markdown
+
+        with pytest.raises(ConfigError):
+            convert_markdown(self.MD, {"sizes": {"text": -1}})
+
+
+class TestCheck:
+    DECK = (
+        "<style>\nh2 { color: #ffffff; }\np { color: bogus; }\n</style>\n\n"
+        "## Code\n\n```cobol\nDISPLAY 'HI'.\n```\n\n```text\nplain\n```\n\n---\n\n"
+        "## Empty\n\n---\n\n"
+        "## Long\n\n" + "word " * 2000 + "\n"
+    )
+
+    def test_check_deck_finds_each_kind(self, tmp_path):
+        from convert import check_file
+
+        md = tmp_path / "deck.md"
+        md.write_text(self.DECK)
+        problems = check_file(str(md))
+        assert [(p["slide"], p["kind"]) for p in problems] == [
+            (None, "color"), (None, "color"), (1, "language"), (2, "empty"), (3, "overflow")]
+        assert "#FFFFFF for h2 is dropped" in problems[0]["message"]
+        assert "'cobol'" in problems[2]["message"]
+
+    def test_cli_exit_status(self, tmp_output_dir):
+        bad = tmp_output_dir / "bad.md"
+        bad.write_text(self.DECK)
+        good = tmp_output_dir / "good.md"
+        good.write_text("## Fine\n\n- item\n\n```python\nx = 1\n```\n")
+
+        result = subprocess.run([sys.executable, CONVERT_SCRIPT, "--check", str(good)],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout
+        assert "Checked 1 file(s): no problems" in result.stdout
+
+        result = subprocess.run([sys.executable, CONVERT_SCRIPT, "--check", str(tmp_output_dir)],
+                                capture_output=True, text=True)
+        assert result.returncode == 1
+        assert f"{bad}: slide 2 (Empty): note: slide has a title but no content" in result.stdout
+        assert "4 problem(s), 1 notice(s) in 2 file(s)" in result.stdout
+        assert not list(tmp_output_dir.glob("*.pptx"))
+
+    def test_title_only_slides_do_not_fail(self, tmp_output_dir):
+        md = tmp_output_dir / "talk.md"
+        md.write_text("# Talk\n\n---\n\n## Point\n\n- item\n\n---\n\n## Thank you\n")
+        result = subprocess.run([sys.executable, CONVERT_SCRIPT, "--check", str(md)],
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout
+        assert "note: slide has a title but no content" in result.stdout
+        assert "Checked 1 file(s): no problems, 1 notice(s)" in result.stdout
+
+
+class TestConversionReport:
+    def test_json_report_per_conversion(self, tmp_output_dir):
+        src = tmp_output_dir / "decks"
+        src.mkdir()
+        (src / "a.md").write_text("# A\n\n---\n\n## Slide\n\n- **one** two\n")
+        (src / "b.md").write_text("## B\n\n- item\n")
+        command = [sys.executable, CONVERT_SCRIPT, "--batch", str(src), "--report", "json", "--cache"]
+
+        result = subprocess.run(command, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [Path(r["input"]).name for r in records] == ["a.md", "b.md"]
+        first = records[0]
+        assert (first["slides"], first["error"], first["warnings"]) == (2, None, [])
+        assert first["shapes"] >= 4 and first["runs"] >= 3
+        assert first["output_bytes"] == (src / "a.pptx").stat().st_size
+        assert set(first["timings_s"]) == {"config", "parse", "layout", "render", "write", "total"}
+        assert first["cache"]["parse"] == "miss"
+        assert "Converted 2 file(s)" in result.stderr
+
+        again = subprocess.run(command, capture_output=True, text=True)
+        assert json.loads(again.stdout.splitlines()[0])["cache"]["parse"] == "hit"
+
+    def test_collects_warnings(self, tmp_path, monkeypatch):
+        import convert
+        from pptx.opc.package import Part
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        relate_to = Part.relate_to
+
+        def relate_to_internal_only(self, target, reltype, is_external=False):
+            if is_external:
+                fail()
+            return relate_to(self, target, reltype, is_external)
+
+        monkeypatch.setattr(Part, "relate_to", relate_to_internal_only)
+        monkeypatch.setattr(convert, "_add_section_list", fail)
+        md = tmp_path / "deck.md"
+        md.write_text(
+            "<style>\nh2 { color: #ffffff; }\n</style>\n\n"
+            "# Intro\n\n---\n\n## One\n\n- [a](https://a.example) [b](https://a.example)\n\n---\n\n## Two\n\n- x\n")
+        report = convert.ConversionReport(str(md))
+        convert.convert_file(str(md), str(tmp_path / "deck.pptx"), report=report)
+
+        by_kind = {w["kind"]: w for w in report.warnings}
+        assert set(by_kind) == {"dropped_color", "hyperlink", "sections"}
+        assert (by_kind["dropped_color"]["color"], by_kind["dropped_color"]["count"]) == ("FFFFFF", 2)
+        assert (by_kind["hyperlink"]["url"], by_kind["hyperlink"]["count"]) == ("https://a.example", 2)
+        assert len(Presentation(str(tmp_path / "deck.pptx")).slides) == 3
+
+    def test_failed_conversion_records_error(self, tmp_path):
+        from convert import ConfigError, ConversionReport, convert_file
+
+        md = tmp_path / "deck.md"
+        md.write_text("## T\n")
+        (tmp_path / "config.json").write_text(json.dumps({"sizes": {"text": -1}}))
+        report = ConversionReport(str(md))
+        with pytest.raises(ConfigError):
+            convert_file(str(md), str(tmp_path / "deck.pptx"), report=report)
+        assert "sizes.text" in report.as_dict()["error"]
+
+
+class TestConvertAsync:
+    DECK = "".join(f"## Slide {i}\n\n- item {i}\n\n---\n\n" for i in range(5))
+
+    def test_progress_events_per_slide(self):
+        from convert import convert_async
+
+        events = []
+        data = asyncio.run(convert_async(self.DECK, on_progress=events.append))
+        assert len(Presentation(io.BytesIO(data)).slides) == 5
+        slides = [e for e in events if e["event"] == "slide"]
+        assert [e["index"] for e in slides] == list(range(5))
+        assert slides[0]["total"] == 5 and slides[0]["title"] == "Slide 0"
+        assert events[-1] == {"event": "done", "bytes": len(data)}
+
+    def test_concurrent_conversions(self):
+        from convert import convert_async
+
+        async def main():
+            return await asyncio.gather(*(convert_async(self.DECK) for _ in range(3)))
+
+        assert all(len(Presentation(io.BytesIO(d)).slides) == 5 for d in asyncio.run(main()))
+
+    def test_cancellation_stops_worker(self):
+        from convert import convert_async
+
+        deck = "".join(f"## Slide {i}\n\n- item\n\n---\n\n" for i in range(2000))
+        seen = []
+
+        async def main():
+            first = asyncio.Event()
+
+            def on_progress(event):
+                seen.append(event)
+                first.set()
+
+            task = asyncio.create_task(convert_async(deck, on_progress=on_progress))
+            await first.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            count = len(seen)
+            await asyncio.sleep(0.2)
+            return count
+
+        count_at_cancel = asyncio.run(main())
+        assert len(seen) < 2000
+        # The worker stops at the next slide boundary instead of finishing.
+        assert len(seen) - count_at_cancel <= 20
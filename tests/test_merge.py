@@ -1,8 +1,13 @@
+import io
+import re
+import zipfile
 from pathlib import Path
 
 import pytest
 
-from convert import parse_markdown
+from pptx import Presentation
+
+from convert import convert_file, parse_markdown
 from merge import (
     MergeError,
     _join_title_with_subtitle,
@@ -12,8 +17,11 @@ from merge import (
     flatten_deck,
     main,
     merge_decks,
+    merge_to_pptx,
     override_title,
+    scan_deck,
     split_frontmatter,
+    write_merged,
 )
 
 
@@ -195,6 +203,24 @@ class TestFlattenDeck:
         assert flatten_deck("", "mydeck") == "# mydeck"
 
 
+class TestScanDeck:
+    def test_collects_title_separators_and_first_content(self):
+        body = "# Unit 1\n\n## Intro\n\n---\n\n```\n---\n# not a title\n```\n\n---"
+        scan = scan_deck(body)
+        assert scan.title == _join_title_with_subtitle("Unit 1", "Intro")
+        assert [body[i:i + 4] for i in scan.separators] == ["---\n", "---"]
+        assert len(scan.separators) == 2
+        assert scan.first_content == "# Unit 1"
+
+    def test_indented_fence_toggles(self):
+        scan = scan_deck("  ```\n# hidden\n---\n  ```\n# Shown")
+        assert scan.title == "Shown"
+        assert scan.separators == []
+
+    def test_empty_body(self):
+        assert scan_deck("\n\n") == (None, [], None)
+
+
 class TestMergeDecks:
     def test_three_decks_produce_three_sections(self, tmp_path):
         d1 = tmp_path / "d1.md"
@@ -252,6 +278,215 @@ class TestMergeDecks:
         assert "# Internal" in titles
 
 
+class TestWriteMerged:
+    def test_matches_merge_decks(self, tmp_path):
+        d1 = tmp_path / "d1.md"
+        d2 = tmp_path / "d2.md"
+        d1.write_text("---\ntitle: One\n---\n<style>\n.x{}\n</style>\n# Deck One\n\n---\n\n## 1.1")
+        d2.write_text("# Deck Two\n\n----\n\n## 2.1")
+        for emit_toc in (True, False):
+            out = io.StringIO()
+            write_merged([d1, d2], out, "T", emit_toc=emit_toc)
+            assert out.getvalue() == merge_decks([d1, d2], "T", emit_toc=emit_toc)
+
+    def test_validates_every_deck_before_writing(self, tmp_path):
+        good = tmp_path / "good.md"
+        bad = tmp_path / "bad.md"
+        good.write_text("# Good\n\n## slide")
+        bad.write_text("preamble\n\n# Bad")
+        out = io.StringIO()
+        with pytest.raises(MergeError, match="bad.md"):
+            write_merged([good, bad], out, None)
+        assert out.getvalue() == ""
+
+
+class TestParallelMerge:
+    def _decks(self, tmp_path, n):
+        paths = []
+        for i in range(n):
+            path = tmp_path / f"d{i:02d}.md"
+            path.write_text(f"# Deck {i}\n\n---\n\n## {i}.1\n\n```\n---\n```")
+            paths.append(path)
+        return paths
+
+    def test_jobs_preserve_order(self, tmp_path):
+        paths = self._decks(tmp_path, 25)
+        assert merge_decks(paths, "T", jobs=4) == merge_decks(paths, "T")
+
+    def test_first_failing_deck_in_input_order_is_reported(self, tmp_path):
+        paths = self._decks(tmp_path, 10)
+        paths[3].write_text("preamble\n\n# Three")
+        paths[7].write_text("preamble\n\n# Seven")
+        with pytest.raises(MergeError, match="d03.md"):
+            merge_decks(paths, None, jobs=4)
+
+    def test_unreadable_deck_raises_merge_error(self, tmp_path):
+        paths = self._decks(tmp_path, 3)
+        paths[1].write_bytes(b"# Bad \xff\n")
+        with pytest.raises(MergeError, match="d01.md: cannot read"):
+            merge_decks(paths, None, jobs=2)
+
+
+class TestMergeToPptx:
+    def _texts(self, path):
+        return [
+            [sh.text_frame.text for sh in slide.shapes if sh.has_text_frame]
+            for slide in Presentation(str(path)).slides
+        ]
+
+    def test_matches_merge_then_convert(self, tmp_path):
+        d1 = tmp_path / "d1.md"
+        d2 = tmp_path / "d2.md"
+        d1.write_text(
+            "---\ntitle: One\n---\n<style>\nh2 { color: #C62828; }\n</style>\n\n"
+            "# Deck One\n\n---\n\n## 1.1\n\n- a\n\n\n\n- b\n\nnote:\nsay\n----\n"
+        )
+        d2.write_text("# Deck Two\n## Sub\n\n----\n\n## 2.1\n\n```py\nx = 1\n```\n")
+        merged_md = tmp_path / "merged.md"
+        merged_md.write_text(merge_decks([d1, d2], "Course"))
+        convert_file(str(merged_md), str(tmp_path / "two_step.pptx"))
+
+        count = merge_to_pptx([d1, d2], str(tmp_path / "direct.pptx"), "Course")
+
+        assert count == len(Presentation(str(tmp_path / "direct.pptx")).slides)
+        assert self._texts(tmp_path / "direct.pptx") == self._texts(tmp_path / "two_step.pptx")
+        with zipfile.ZipFile(tmp_path / "direct.pptx") as z:
+            pres_xml = z.read("ppt/presentation.xml").decode()
+        assert "Deck One" in pres_xml and "Deck Two" in pres_xml
+
+    def test_cli_pptx_output(self, tmp_path):
+        d = tmp_path / "d.md"
+        d.write_text("# Deck One\n\n----\n\n## 1.1")
+        out = tmp_path / "merged.pptx"
+        rc = main([str(d), "-o", str(out)])
+        assert rc == 0
+        assert len(Presentation(str(out)).slides) == 4
+        assert not (tmp_path / "merged.md").exists()
+
+
+class TestMergeCache:
+    DECKS = {
+        "a.md": "---\ntitle: A\n---\n# Deck A\n\n----\n\n## A.1\n\n- x\n\nnote:\nhello\n",
+        "b.md": "# Deck B\n\n----\n\n## B.1\n\n| h |\n|---|\n| v |\n",
+        "c.md": "# Deck C\n\n---\n\n## C.1\n\n```python\nx = 1\n```\n",
+    }
+
+    def _decks(self, tmp_path):
+        paths = []
+        for name, text in self.DECKS.items():
+            (tmp_path / name).write_text(text)
+            paths.append(tmp_path / name)
+        return paths
+
+    def _summary(self, path):
+        prs = Presentation(str(path))
+        slides = [
+            ([sh.text_frame.text for sh in slide.shapes if sh.has_text_frame],
+             slide.notes_slide.notes_text_frame.text if slide.has_notes_slide else None)
+            for slide in prs.slides
+        ]
+        with zipfile.ZipFile(path) as z:
+            pres_xml = z.read("ppt/presentation.xml").decode()
+        return slides, re.findall(r'<p14:section name="([^"]*)".*?</p14:section>', pres_xml)
+
+    def test_matches_uncached_output(self, tmp_path):
+        paths = self._decks(tmp_path)
+        merge_to_pptx(paths, str(tmp_path / "plain.pptx"), "All")
+        count = merge_to_pptx(paths, str(tmp_path / "cached.pptx"), "All", cache_dir=tmp_path / "cache")
+        assert count == len(Presentation(str(tmp_path / "cached.pptx")).slides)
+        assert self._summary(tmp_path / "cached.pptx") == self._summary(tmp_path / "plain.pptx")
+
+    def test_only_changed_deck_is_rendered(self, tmp_path):
+        paths = self._decks(tmp_path)
+        cache = tmp_path / "cache"
+        merge_to_pptx(paths, str(tmp_path / "first.pptx"), "All", cache_dir=cache)
+        entries = {p: p.stat().st_mtime_ns for p in cache.iterdir()}
+        assert len(entries) == 3  # one per deck; the TOC is never cached
+
+        paths[1].write_text(self.DECKS["b.md"] + "\n----\n\n## B.2\n")
+        merge_to_pptx(paths, str(tmp_path / "second.pptx"), "All", cache_dir=cache)
+        assert len(set(cache.iterdir()) - set(entries)) == 1
+        assert all(p.stat().st_mtime_ns == mtime for p, mtime in entries.items())
+        slides, _ = self._summary(tmp_path / "second.pptx")
+        assert ["B.2", ""] in [texts for texts, _ in slides]
+
+    def test_cli_cache_dir_requires_pptx(self, tmp_path, capsys):
+        d = tmp_path / "d.md"
+        d.write_text("# D\n")
+        with pytest.raises(SystemExit):
+            main([str(d), "-o", str(tmp_path / "m.md"), "--cache-dir", str(tmp_path / "c")])
+        assert "--cache-dir" in capsys.readouterr().err
+
+
+class TestMergePptxFiles:
+    def test_cli_joins_converted_decks(self, tmp_path):
+        for name, md in [("a", "# A\n\n----\n\n## A.1\n"), ("b", "# B\n\n----\n\n## B.1\n\nnote:\nb\n")]:
+            (tmp_path / f"{name}.md").write_text(md)
+            convert_file(str(tmp_path / f"{name}.md"), str(tmp_path / f"{name}.pptx"))
+        out = tmp_path / "joined.pptx"
+        rc = main([str(tmp_path / "a.pptx"), str(tmp_path / "b.pptx"), "-o", str(out)])
+        assert rc == 0
+        prs = Presentation(str(out))
+        assert [slide.slide_id for slide in prs.slides] == [256, 257, 258, 259]
+        assert prs.slides[3].notes_slide.notes_text_frame.text == "b"
+        with zipfile.ZipFile(out) as z:
+            pres_xml = z.read("ppt/presentation.xml").decode()
+        assert re.findall(r'<p14:section name="([^"]*)"', pres_xml) == ["A", "B"]
+
+    def test_not_a_pptx(self, tmp_path, capsys):
+        bad = tmp_path / "bad.pptx"
+        bad.write_text("not a zip")
+        rc = main([str(bad), "-o", str(tmp_path / "out.pptx")])
+        assert rc == 2
+        assert "not a PPTX file" in capsys.readouterr().err
+        assert not (tmp_path / "out.pptx").exists()
+
+    @pytest.mark.parametrize("flags", [["--title", "T"], ["--no-toc"], ["--jobs", "4"],
+                                       ["--cache-dir", "c"]])
+    def test_cli_rejects_markdown_only_flags(self, tmp_path, capsys, flags):
+        (tmp_path / "a.md").write_text("# A\n")
+        convert_file(str(tmp_path / "a.md"), str(tmp_path / "a.pptx"))
+        with pytest.raises(SystemExit):
+            main([str(tmp_path / "a.pptx"), "-o", str(tmp_path / "out.pptx"), *flags])
+        assert f"{flags[0]} only apply to markdown inputs" in capsys.readouterr().err
+        assert not (tmp_path / "out.pptx").exists()
+
+    def test_zip_without_presentation(self, tmp_path, capsys):
+        fake = tmp_path / "fake.pptx"
+        with zipfile.ZipFile(fake, "w") as z:
+            z.writestr("[Content_Types].xml",
+                       '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+            z.writestr("_rels/.rels",
+                       '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>')
+        rc = main([str(fake), "-o", str(tmp_path / "out.pptx")])
+        assert rc == 2
+        assert "no presentation part" in capsys.readouterr().err
+        assert list(tmp_path.iterdir()) == [fake]
+
+    def test_cli_reports_concat_value_error(self, tmp_path, capsys, monkeypatch):
+        import convert
+
+        def broken(sources, output, **kwargs):
+            with open(output, "wb") as f:
+                f.write(b"partial")
+            raise ValueError("slide1 links to nowhere")
+
+        monkeypatch.setattr(convert, "concat_packages", broken)
+        (tmp_path / "a.md").write_text("# A\n\n----\n\n## A.1\n")
+        rc = main([str(tmp_path / "a.md"), "-o", str(tmp_path / "out.pptx"),
+                   "--cache-dir", str(tmp_path / "cache")])
+        assert rc == 1
+        assert "Error: slide1 links to nowhere" in capsys.readouterr().err
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.md", "cache"]
+
+    def test_cli_rejects_mixed_inputs(self, tmp_path, capsys):
+        (tmp_path / "a.md").write_text("# A\n")
+        (tmp_path / "b.pptx").write_bytes(b"x")
+        with pytest.raises(SystemExit):
+            main([str(tmp_path / "a.md"), str(tmp_path / "b.pptx"), "-o", str(tmp_path / "o.pptx")])
+        assert "all markdown or all .pptx" in capsys.readouterr().err
+
+
 class TestExtractStyleBlock:
     def test_no_style(self):
         style, body = extract_style_block("# Title\n\ncontent")
@@ -394,6 +629,7 @@ class TestMainCli:
         err = capsys.readouterr().err
         assert "bad.md" in err
         assert "preamble" in err
+        assert list(tmp_path.iterdir()) == [bad]
 
     def test_happy_path_writes_output(self, tmp_path):
         d1 = tmp_path / "d1.md"
@@ -418,6 +654,16 @@ class TestMainCli:
         assert rc == 0
         assert "TOC\n-" not in out.read_text()
 
+    def test_jobs_flag(self, tmp_path):
+        d1 = tmp_path / "d1.md"
+        d2 = tmp_path / "d2.md"
+        d1.write_text("# Deck One\n\n----\n\n## 1.1")
+        d2.write_text("# Deck Two\n\n----\n\n## 2.1")
+        out = tmp_path / "merged.md"
+        rc = main([str(d1), str(d2), "-o", str(out), "--jobs", "2"])
+        assert rc == 0
+        assert out.read_text() == merge_decks([d1, d2], None)
+
     def test_empty_title_treated_as_absent(self, tmp_path):
         # Regression: `--title ""` must not produce `---\nNone\n---` in the
         # merged frontmatter. Empty string collapses to None at the CLI boundary.
@@ -1,4 +1,13 @@
-from convert import parse_slide, parse_markdown
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+import convert
+from convert import parse_frontmatter_theme, parse_markdown, parse_markdown_file, parse_slide
 
 
 class TestParseSlide:
@@ -132,6 +141,18 @@ class TestParseSlide:
         bullets = [c for c in slide["content"] if c["type"] == "bullet"]
         assert len(bullets) == 1
 
+    def test_image_line(self):
+        slide = parse_slide("## T\n![Architecture](img/arch.png)\n")
+        assert slide["content"] == [{"type": "image", "alt": "Architecture", "src": "img/arch.png"}]
+
+    def test_image_angle_brackets_and_title(self):
+        slide = parse_slide('## T\n![](<my shots/a b.png> "Screenshot")\n')
+        assert slide["content"] == [{"type": "image", "alt": "", "src": "my shots/a b.png"}]
+
+    def test_inline_image_stays_text(self):
+        slide = parse_slide("## T\nSee ![icon](i.png) here\n")
+        assert [c["type"] for c in slide["content"]] == ["text"]
+
 
 class TestParseMarkdown:
     def test_frontmatter_removal(self):
@@ -173,4 +194,197 @@ class TestParseMarkdown:
         assert len(slides) >= 8
 
 
-from pathlib import Path
+class TestSlideIR:
+    MD = (
+        "<style>\nh2 { color: #112233; }\n</style>\n\n# Part\n\n----\n\n## T\n\n- a\n  - b\n1. one\n"
+        "plain\n\n```py\nx = 1\n```\n\n| h |\n|---|\n| c |\n\n![alt](p.png)\n\nnote:\nsay\n"
+    )
+
+    def test_nodes_use_slots_and_interned_tags(self):
+        slide = parse_markdown(self.MD)[1]
+        assert isinstance(slide, convert.Slide)
+        assert [type(item).__name__ for item in slide.content] == [
+            "Bullet", "Bullet", "Numbered", "Bullet", "CodeBlock", "Table", "ImageRef"]
+        assert all(not hasattr(item, "__dict__") for item in slide.content)
+        assert slide.content[0].type is convert.BULLET
+        assert slide.content[3].type is convert.TEXT
+
+    def test_reads_like_a_dict(self):
+        slide = parse_markdown(self.MD)[1]
+        assert slide["notes"] == "say" and slide.get("section") == "Part"
+        assert slide["content"][2] == {"type": "numbered", "number": "1", "text": "one", "indent": 0}
+        slide["section_idx"] = 7
+        assert slide.section_idx == 7
+        with pytest.raises(KeyError):
+            slide["nope"]
+
+    def test_dump_and_load_round_trip(self):
+        slides = parse_markdown(self.MD)
+        loaded = convert.load_slides(convert.dump_slides(slides))
+        assert list(loaded) == list(slides)
+        assert loaded.style_overrides == slides.style_overrides
+        assert loaded[1].content[0].type is convert.BULLET
+
+    def test_load_rejects_other_data(self):
+        with pytest.raises(ValueError):
+            convert.load_slides(b"not marshal")
+
+    def test_dict_slides_still_render(self):
+        data = {"title": "## T", "subtitle": None, "notes": None, "is_section": False,
+                "content": [{"type": "bullet", "text": "x", "indent": 0}]}
+        assert convert.as_slide(data) == convert.Slide("## T", content=[convert.Bullet("x")],
+                                                         section="Section")
+
+
+class TestFrontmatterTheme:
+    def test_pptx_block_exposed(self):
+        md = (
+            "---\ntitle: Deck\npptx:\n  colors:\n    accent: FF6600\n"
+            "  sizes:\n    code: 9\n---\n\n## Hello\n- world"
+        )
+        slides = parse_markdown(md)
+        assert slides.theme_config == {"colors": {"accent": "FF6600"}, "sizes": {"code": 9}}
+        assert slides[0]["title"] == "## Hello"
+
+    def test_no_frontmatter_gives_empty_config(self):
+        assert parse_markdown("## Hello\n- world").theme_config == {}
+
+    def test_fast_path_skips_yaml(self, monkeypatch):
+        def boom(_):
+            raise AssertionError("yaml parsed without a pptx: key")
+        monkeypatch.setattr(convert.yaml, "safe_load", boom)
+        assert parse_frontmatter_theme("\ntitle: Deck\ntags: a, b\n") == {}
+
+    def test_nested_pptx_key_not_matched(self):
+        assert parse_frontmatter_theme("\nmeta:\n  pptx: x\n") == {}
+
+    def test_malformed_yaml_warns(self, capsys):
+        assert parse_frontmatter_theme("\npptx: [unclosed\n") == {}
+        assert "Could not parse frontmatter" in capsys.readouterr().out
+
+    def test_non_mapping_ignored(self, capsys):
+        assert parse_frontmatter_theme("\npptx: dark\n") == {}
+        assert "must be a mapping" in capsys.readouterr().out
+
+
+class TestParseMarkdownFile:
+    @pytest.mark.parametrize("md", [
+        "# Sec\n\n---\n\n## A\n- one\n\n----\n\n## B\n```py\nx = 1\n```",
+        "---\ntitle: x\n---\n\n<style>h1 { color: red }</style>\n\n\n# Title\n\n\n\n- a",
+        "前言 ü\n\n---\n\n## 中文標題\n- 項目",
+        "",
+        "## A\r\n- one\r\n\r\n---\r\n\r\n## B\r\n- two\r\n\r\n----\r\n\r\n## C\r\n",
+        "---\ntitle: x\n---\n\u3000\n---\n## A\n- one\n\u3000",
+    ], ids=["sections", "style", "utf8", "empty", "crlf", "unicode-space"])
+    def test_matches_parse_markdown(self, tmp_path, md):
+        path = tmp_path / "deck.md"
+        path.write_bytes(md.encode("utf-8"))
+        from_file = parse_markdown_file(path)
+        from_text = parse_markdown(path.read_text(encoding="utf-8"))
+        assert list(from_file) == list(from_text)
+        assert from_file.style_overrides == from_text.style_overrides
+        assert from_file.theme_config == from_text.theme_config
+
+    def test_crlf_deck(self, tmp_path):
+        path = tmp_path / "deck.md"
+        path.write_bytes(b"## A\r\n- one\r\n\r\n---\r\n\r\n## B\r\n- two\r\n\r\n---\r\n\r\n## C\r\n- three\r\n")
+        slides = parse_markdown_file(path)
+        assert [s["title"] for s in slides] == ["## A", "## B", "## C"]
+        assert [item["text"] for s in slides for item in s["content"]] == ["one", "two", "three"]
+
+    def test_demo(self):
+        demo = Path(__file__).resolve().parent.parent / "examples" / "demo.md"
+        assert list(parse_markdown_file(demo)) == list(parse_markdown(demo.read_text(encoding="utf-8")))
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads peak RSS via resource")
+    def test_peak_rss_stays_near_one_copy(self, tmp_path):
+        # 64 MB keeps CI fast; set HACKMD_PPTX_RSS_TEST_MB=500 for the full
+        # generated-deck scenario. Reading the file into a str and splitting
+        # it peaks at roughly three copies of the input; the mmap path should
+        # only hold the parsed slides (one copy) plus small per-slide buffers.
+        size_mb = int(os.environ.get("HACKMD_PPTX_RSS_TEST_MB", "64"))
+        path = tmp_path / "big.md"
+        line = "    log_entry(%d, 'request handled', status=200, elapsed_ms=12.5)\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("---\ntitle: generated\n---\n\n")
+            written, i = 0, 0
+            while written < size_mb * 2**20:
+                chunk = f"## Listing {i}\n\n```python\n" + "".join(line % j for j in range(2000)) + "```\n\n----\n\n"
+                f.write(chunk)
+                written += len(chunk)
+                i += 1
+
+        script = textwrap.dedent(f"""
+            import resource, sys
+            sys.path.insert(0, {str(Path(convert.__file__).parent)!r})
+            import convert
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            slides = convert.parse_markdown_file({str(path)!r})
+            after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(len(slides), (after - before) * 1024)
+        """)
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        n_slides, peak_growth = map(int, result.stdout.split())
+        assert n_slides == i
+        assert peak_growth < 1.5 * written, f"peak RSS grew {peak_growth / 2**20:.0f} MB for a {written / 2**20:.0f} MB deck"
+
+
+class TestParseCache:
+    MD = "---\npptx:\n  colors:\n    accent: 'FF6600'\n---\n<style>h2 { color: #112233; }</style>\n\n## A\n\n- one\n"
+
+    def test_second_parse_is_a_hit(self, tmp_path):
+        path = tmp_path / "deck.md"
+        path.write_text(self.MD)
+        cache = convert.ParseCache(tmp_path / "cache")
+        first, second = cache.parse_file(path), cache.parse_file(path)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert list(second) == list(first) == list(parse_markdown(self.MD))
+        assert second.style_overrides == first.style_overrides
+        assert second.theme_config == {"colors": {"accent": "FF6600"}}
+
+    def test_edit_misses(self, tmp_path):
+        path = tmp_path / "deck.md"
+        path.write_text(self.MD)
+        cache = convert.ParseCache(tmp_path / "cache")
+        cache.parse_file(path)
+        path.write_text(self.MD + "- two\n")
+        assert len(cache.parse_file(path)[0]["content"]) == 2
+        assert cache.misses == 2
+
+    def test_corrupt_entry_is_reparsed(self, tmp_path):
+        path = tmp_path / "deck.md"
+        path.write_text(self.MD)
+        cache = convert.ParseCache(tmp_path / "cache")
+        cache.parse_file(path)
+        (entry,) = (tmp_path / "cache").iterdir()
+        entry.write_bytes(b"junk")
+        assert list(cache.parse_file(path)) == list(parse_markdown(self.MD))
+        assert cache.misses == 2 and entry.read_bytes() != b"junk"
+
+    def test_hit_reports_the_same_warnings(self, tmp_path, capsys):
+        path = tmp_path / "deck.md"
+        path.write_text("---\npptx: [1, 2]\n---\n<style>h2 { color: #ffffff; }</style>\n\n## A\n\n- one\n")
+        runs = []
+        for _ in range(2):
+            report = convert.ConversionReport(str(path))
+            convert.convert_file(str(path), str(tmp_path / "deck.pptx"), parse_cache=tmp_path / "cache",
+                                 report=report)
+            runs.append((report.parse_cache, report.warnings, capsys.readouterr().out))
+        (miss, miss_warnings, miss_out), (hit, hit_warnings, hit_out) = runs
+        assert (miss, hit) == ("miss", "hit")
+        assert hit_warnings == miss_warnings
+        assert {w["kind"] for w in hit_warnings} == {"frontmatter", "dropped_color"}
+        assert "must be a mapping" in hit_out and hit_out == miss_out
+
+    def test_cli_cache_is_opt_in(self, tmp_path):
+        path = tmp_path / "deck.md"
+        path.write_text(self.MD)
+        cli = [sys.executable, str(Path(convert.__file__)), str(path), str(tmp_path / "deck.pptx")]
+        subprocess.run(cli, check=True, capture_output=True)
+        assert not (tmp_path / "xdg-cache").exists()
+        subprocess.run(cli + ["--cache"], check=True, capture_output=True)
+        entries = list((tmp_path / "xdg-cache" / "hackmd-to-pptx" / "parsed").iterdir())
+        assert len(entries) == 1
+        subprocess.run(cli + ["--cache", "--no-parse-cache"], check=True, capture_output=True)
+        assert list((tmp_path / "xdg-cache" / "hackmd-to-pptx" / "parsed").iterdir()) == entries
@@ -25,6 +25,7 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 SCRIPTS = [
     REPO_ROOT / "skill" / "scripts" / "convert.py",
     REPO_ROOT / "skill" / "scripts" / "merge.py",
+    REPO_ROOT / "skill" / "scripts" / "serve.py",
 ]
 
 PEP723_BLOCK = re.compile(
@@ -1,8 +1,18 @@
+import hashlib
+import io
+import re
 import zipfile
 
+import pytest
 from pptx import Presentation
 
-from convert import add_content_slide, add_sections_to_pptx_file
+from convert import (
+    StreamingPptxWriter,
+    add_content_slide,
+    add_sections_to_pptx_file,
+    concat_packages,
+    convert_markdown,
+)
 
 
 class TestAddSectionsToPptxFile:
@@ -54,3 +64,137 @@ class TestAddSectionsToPptxFile:
         with zipfile.ZipFile(str(out), "r") as z:
             pres_xml = z.read("ppt/presentation.xml").decode()
             assert "sectionLst" not in pres_xml
+
+
+class TestStreamingPptxWriter:
+    def _slide(self, title, notes=None):
+        return {
+            "title": title,
+            "subtitle": None,
+            "content": [{"type": "bullet", "text": "[link](https://example.com)", "indent": 0}],
+            "notes": notes,
+            "is_section": False,
+        }
+
+    def test_streamed_package_opens(self, tmp_path, colors, fonts):
+        prs = Presentation()
+        out = tmp_path / "stream.pptx"
+        writer = StreamingPptxWriter(prs, str(out))
+        for i in range(3):
+            slide = add_content_slide(prs, self._slide(f"## Slide {i}", notes=f"notes {i}"), colors, fonts)
+            writer.flush_slide(slide)
+        writer.close({1: {"name": "Section A", "count": 3}})
+
+        reopened = Presentation(str(out))
+        assert len(reopened.slides) == 3
+        assert reopened.slides[2].notes_slide.notes_text_frame.text == "notes 2"
+        assert "example.com" in reopened.slides[0].part.rels.xml.decode()
+        with zipfile.ZipFile(str(out)) as z:
+            assert "Section A" in z.read("ppt/presentation.xml").decode()
+            # Every part is written exactly once.
+            assert len(z.namelist()) == len(set(z.namelist()))
+
+    def test_flushed_slide_xml_released(self, tmp_path, colors, fonts):
+        prs = Presentation()
+        writer = StreamingPptxWriter(prs, str(tmp_path / "stream.pptx"))
+        slide = add_content_slide(prs, self._slide("## Big"), colors, fonts)
+        part = slide.part
+        writer.flush_slide(slide)
+        assert len(part._element.xpath(".//p:sp")) == 0
+        writer.close()
+
+    @pytest.mark.parametrize("compression, method", [
+        ("store", zipfile.ZIP_STORED),
+        ("fast", zipfile.ZIP_DEFLATED),
+        ("max", zipfile.ZIP_DEFLATED),
+    ])
+    def test_compression_applies_to_every_member(self, tmp_path, colors, fonts, compression, method):
+        prs = Presentation()
+        out = tmp_path / "out.pptx"
+        writer = StreamingPptxWriter(prs, str(out), compression)
+        add_content_slide(prs, self._slide("## T", notes="n"), colors, fonts)
+        writer.close()
+
+        with zipfile.ZipFile(str(out)) as z:
+            assert {info.compress_type for info in z.infolist()} == {method}
+        assert len(Presentation(str(out)).slides) == 1
+
+    def test_identical_images_stored_once(self, tmp_path, colors, fonts, png_bytes, make_png):
+        prs = Presentation()
+        out = tmp_path / "media.pptx"
+        writer = StreamingPptxWriter(prs, str(out))
+        other = make_png(rgb=(0, 0, 255))
+        for i in range(4):
+            slide = add_content_slide(prs, self._slide(f"## Slide {i}"), colors, fonts)
+            slide.shapes.add_picture(io.BytesIO(png_bytes), 0, 0)
+            slide.shapes.add_picture(io.BytesIO(png_bytes), 0, 0)
+            if i % 2:
+                slide.shapes.add_picture(io.BytesIO(other), 0, 0)
+            writer.flush_slide(slide)
+        writer.close()
+
+        assert len(writer.media) == 2
+        with zipfile.ZipFile(str(out)) as z:
+            media = sorted(n for n in z.namelist() if n.startswith("ppt/media/"))
+            assert media == ["ppt/media/image1.png", "ppt/media/image2.png"]
+            assert z.read(media[0]) == png_bytes
+        reopened = Presentation(str(out))
+        pictures = [sh for slide in reopened.slides for sh in slide.shapes if sh.shape_type == 13]
+        assert len(pictures) == 10
+        assert {pic.image.sha1 for pic in pictures} == {
+            hashlib.sha1(png_bytes).hexdigest(), hashlib.sha1(other).hexdigest()}
+
+
+class TestConcatPackages:
+    def test_slides_notes_and_sections_carried_over(self, tmp_path):
+        first = io.BytesIO(convert_markdown("# One\n\n----\n\n## A\n\n- a\n"))
+        second = io.BytesIO(convert_markdown("# Two\n\n----\n\n## B\n\nnote:\nsay b\n"))
+        out = tmp_path / "cat.pptx"
+        assert concat_packages([first, second], str(out)) == 4
+
+        prs = Presentation(str(out))
+        assert [slide.slide_id for slide in prs.slides] == [256, 257, 258, 259]
+        assert prs.slides[3].notes_slide.notes_text_frame.text == "say b"
+        with zipfile.ZipFile(out) as z:
+            pres_xml = z.read("ppt/presentation.xml").decode()
+        assert pres_xml.count("<p14:section ") == 2
+        assert '<p14:section name="Two" id="{00000002-0000-0000-0000-000000000000}">' in pres_xml
+        assert '<p14:sldId id="258"/><p14:sldId id="259"/>' in pres_xml
+
+    def _with_picture(self, markdown, image, layout_name=None):
+        prs = Presentation(io.BytesIO(convert_markdown(markdown)))
+        if layout_name:
+            prs.slide_masters[0].slide_layouts[1].name = layout_name
+        for slide in prs.slides:
+            slide.shapes.add_picture(io.BytesIO(image), 0, 0)
+        buf = io.BytesIO()
+        prs.save(buf)
+        buf.seek(0)
+        return buf
+
+    def test_identical_templates_and_media_stored_once(self, tmp_path, png_bytes):
+        sources = [self._with_picture(f"# D{i}\n\n----\n\n## S\n", png_bytes) for i in range(3)]
+        out = tmp_path / "cat.pptx"
+        concat_packages(sources, str(out))
+        with zipfile.ZipFile(out) as z:
+            names = z.namelist()
+        assert [n for n in names if n.startswith("ppt/media/")] == ["ppt/media/image1.png"]
+        assert sum(n.startswith("ppt/slideMasters/slideMaster") for n in names) == 1
+        assert sum(n.startswith("ppt/slideLayouts/slideLayout") for n in names) == 11
+
+    def test_different_master_is_added_with_unique_ids(self, tmp_path, png_bytes):
+        plain = self._with_picture("# A\n\n----\n\n## S\n", png_bytes)
+        custom = self._with_picture("# B\n\n----\n\n## S\n", png_bytes, layout_name="Custom")
+        out = tmp_path / "cat.pptx"
+        concat_packages([plain, custom], str(out))
+
+        prs = Presentation(str(out))
+        assert len(prs.slide_masters) == 2
+        assert [slide.slide_layout.name for slide in prs.slides] == [
+            "Title Slide", "Title and Content", "Title Slide", "Custom"]
+        with zipfile.ZipFile(out) as z:
+            xml = "".join(z.read(n).decode() for n in z.namelist()
+                          if n.endswith(".xml") and ("slideMaster" in n or n == "ppt/presentation.xml"))
+            assert sum(n.startswith("ppt/media/") for n in z.namelist()) == 1
+        ids = re.findall(r'<p:sld(?:Master|Layout)Id id="(\d+)"', xml)
+        assert len(ids) == len(set(ids)) == 24
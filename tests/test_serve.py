@@ -0,0 +1,156 @@
+import asyncio
+import io
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from pptx import Presentation
+
+import convert
+from serve import ConversionServer
+
+DECK = "# Intro\n\n----\n\n## Slide\n\n- item\n"
+
+
+def _post(port, body, content_type="text/markdown"):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/convert", data=body, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _get_json(port, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=30) as response:
+        return json.loads(response.read())
+
+
+def _run_with_server(scenario, **options):
+    async def main():
+        server = ConversionServer(port=0, workers=1, **options)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestConversionServer:
+    def test_converts_markdown_body(self):
+        async def scenario(server):
+            status, body = await asyncio.to_thread(_post, server.port, DECK.encode())
+            metrics = await asyncio.to_thread(_get_json, server.port, "/metrics")
+            return status, body, metrics
+
+        status, body, metrics = _run_with_server(scenario)
+        assert status == 200
+        assert len(Presentation(io.BytesIO(body)).slides) == 2
+        assert metrics["converted"] == 1
+        assert metrics["latency_ms"]["p50"] is not None
+
+    def test_json_body_with_config(self):
+        md = "## T\n\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+        payload = json.dumps({"markdown": md, "config": {"colors": {"accent": "123456"}}}).encode()
+
+        async def scenario(server):
+            return await asyncio.to_thread(_post, server.port, payload, "application/json")
+
+        status, body = _run_with_server(scenario)
+        assert status == 200
+        shape = next(sh for sh in Presentation(io.BytesIO(body)).slides[0].shapes if sh.has_table)
+        assert shape.table.cell(0, 0).fill.fore_color.rgb == convert.hex_to_rgb("123456")
+
+    def test_invalid_config_is_400(self):
+        payload = json.dumps({"markdown": DECK, "config": {"colors": {"accent": "nope"}}}).encode()
+
+        async def scenario(server):
+            return await asyncio.to_thread(_post, server.port, payload, "application/json")
+
+        status, body = _run_with_server(scenario)
+        assert status == 400
+        assert b"colors.accent" in body
+
+    def test_queue_full_is_503(self):
+        async def scenario(server):
+            calls = [asyncio.to_thread(_post, server.port, DECK.encode()) for _ in range(6)]
+            return [status for status, _ in await asyncio.gather(*calls)]
+
+        statuses = _run_with_server(scenario, max_queue=0)
+        assert 200 in statuses
+        assert set(statuses) <= {200, 503}
+
+    def test_slow_conversion_is_504(self):
+        deck = "".join(f"## Slide {i}\n\n- item\n\n---\n\n" for i in range(300))
+
+        async def scenario(server):
+            status, _ = await asyncio.to_thread(_post, server.port, deck.encode())
+            return status, server.metrics()
+
+        status, metrics = _run_with_server(scenario, timeout=0.01)
+        assert status == 504
+        assert metrics["timeouts"] == 1
+
+    def test_queued_request_times_out(self):
+        slow = "".join(f"## Slide {i}\n\n- item\n\n---\n\n" for i in range(300))
+
+        async def scenario(server):
+            busy = asyncio.ensure_future(asyncio.to_thread(_post, server.port, slow.encode()))
+            while not server._slots.locked():
+                await asyncio.sleep(0.01)
+            started = time.monotonic()
+            status, body = await asyncio.to_thread(_post, server.port, DECK.encode())
+            elapsed = time.monotonic() - started
+            await busy
+            return status, body, elapsed, server.metrics()
+
+        status, body, elapsed, metrics = _run_with_server(scenario, timeout=0.2)
+        assert status == 504
+        assert elapsed < 2
+        assert metrics["queued"] == 0
+
+    def test_chunked_body_is_411(self):
+        async def scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"POST /convert HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+                         b"5\r\n## Hi\r\n0\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+        response = _run_with_server(scenario)
+        assert response.startswith(b"HTTP/1.1 411 ")
+
+    def test_recovers_from_dead_worker(self):
+        async def scenario(server):
+            for process in list(server._pool._processes.values()):
+                process.kill()
+                process.join()
+            first, _ = await asyncio.to_thread(_post, server.port, DECK.encode())
+            second, body = await asyncio.to_thread(_post, server.port, DECK.encode())
+            return first, second, body, server.metrics()
+
+        first, second, body, metrics = _run_with_server(scenario)
+        assert first in (200, 500)
+        assert second == 200
+        assert len(Presentation(io.BytesIO(body)).slides) == 2
+        assert metrics["pool_restarts"] == 1
+
+    @pytest.mark.parametrize("path, status", [("/healthz", 200), ("/nope", 404)])
+    def test_other_endpoints(self, path, status):
+        async def scenario(server):
+            def get():
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}") as r:
+                        return r.status
+                except urllib.error.HTTPError as e:
+                    return e.code
+            return await asyncio.to_thread(get)
+
+        assert _run_with_server(scenario) == status
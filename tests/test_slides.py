@@ -1,7 +1,13 @@
+import io
+
+import pytest
 from pptx import Presentation
 from pptx.oxml.ns import qn
+from pptx.util import Inches
 
+import convert
 from convert import (
+    ImageStore,
     add_content_slide,
     add_formatted_runs,
     add_section_slide,
@@ -113,6 +119,287 @@ class TestAddContentSlide:
         assert slide.notes_slide.notes_text_frame.text == "Note text"
 
 
+
+class TestImages:
+    def _slide_with(self, images, colors, fonts, src="logo.png", alt="Logo"):
+        data = {
+            "title": "## Picture",
+            "subtitle": None,
+            "content": [{"type": "image", "alt": alt, "src": src}],
+            "notes": None,
+            "is_section": False,
+        }
+        return add_content_slide(_make_prs(), data, colors, fonts, images=images)
+
+    def _pictures(self, slide):
+        return [sh for sh in slide.shapes if sh.shape_type == 13]
+
+    def test_embeds_local_image(self, tmp_path, colors, fonts, png_bytes):
+        (tmp_path / "logo.png").write_bytes(png_bytes)
+        slide = self._slide_with(ImageStore(tmp_path), colors, fonts)
+        (picture,) = self._pictures(slide)
+        assert picture.image.blob == png_bytes
+        assert picture._element.nvPicPr.cNvPr.get("descr") == "Logo"
+        assert picture.top == Inches(1.5)
+        assert picture.left + picture.width // 2 == Inches(5)
+
+    @pytest.mark.parametrize("store", [ImageStore(), ImageStore("/nonexistent")])
+    def test_unavailable_image_renders_alt_text(self, store, colors, fonts):
+        slide = self._slide_with(store, colors, fonts)
+        assert not self._pictures(slide)
+        assert "[image: Logo]" in [sh.text_frame.text for sh in slide.shapes if sh.has_text_frame]
+
+    def test_unreadable_image_renders_alt_text(self, tmp_path, colors, fonts, png_bytes, monkeypatch, capsys):
+        from pathlib import Path
+
+        (tmp_path / "logo.png").write_bytes(png_bytes)
+
+        def unreadable(self):
+            raise PermissionError(13, "Permission denied", str(self))
+
+        monkeypatch.setattr(Path, "read_bytes", unreadable)
+        slide = self._slide_with(ImageStore(tmp_path), colors, fonts)
+        assert not self._pictures(slide)
+        assert "[image: Logo]" in [sh.text_frame.text for sh in slide.shapes if sh.has_text_frame]
+        assert "could not read image logo.png" in capsys.readouterr().out
+
+    def test_remote_image_has_its_own_warning(self, tmp_path, colors, fonts, capsys):
+        slide = self._slide_with(ImageStore(tmp_path), colors, fonts, src="https://example.com/a.png")
+        assert not self._pictures(slide)
+        out = capsys.readouterr().out
+        assert "remote image not embedded: https://example.com/a.png" in out
+        assert "not found" not in out
+
+    @pytest.mark.parametrize("blob", [b"not an image at all", b"\x89PNG\r\n\x1a\n\x00\x00"])
+    def test_garbage_image_renders_alt_text(self, tmp_path, colors, fonts, blob, capsys):
+        (tmp_path / "logo.png").write_bytes(blob)
+        slide = self._slide_with(ImageStore(tmp_path), colors, fonts)
+        assert not self._pictures(slide)
+        assert "[image: Logo]" in [sh.text_frame.text for sh in slide.shapes if sh.has_text_frame]
+        assert "unsupported image format: logo.png" in capsys.readouterr().out
+
+    def test_large_image_is_downsampled_and_cached(self, tmp_path, colors, fonts, make_png, monkeypatch):
+        pytest.importorskip("PIL")
+        big = make_png(4000, 1000, (0, 128, 255))
+        (tmp_path / "big.png").write_bytes(big)
+        cache = tmp_path / "cache"
+        slide = self._slide_with(ImageStore(tmp_path, cache), colors, fonts, src="big.png")
+        (picture,) = self._pictures(slide)
+        assert picture.image.size[0] == 9 * convert.IMAGE_DPI
+        assert picture.width == Inches(9)
+        assert len(list(cache.iterdir())) == 1
+
+        # A second store hits the cache instead of resampling.
+        monkeypatch.setattr(convert, "_downsample", lambda *a: pytest.fail("cache miss"))
+        slide = self._slide_with(ImageStore(tmp_path, cache), colors, fonts, src="big.png")
+        assert self._pictures(slide)[0].image.blob == picture.image.blob
+
+    def test_webp_transcoded_to_png(self, tmp_path, colors, fonts):
+        PIL_Image = pytest.importorskip("PIL.Image")
+        buf = io.BytesIO()
+        PIL_Image.new("RGB", (64, 32), (200, 10, 10)).save(buf, "WEBP")
+        (tmp_path / "a.webp").write_bytes(buf.getvalue())
+        slide = self._slide_with(ImageStore(tmp_path), colors, fonts, src="a.webp")
+        (picture,) = self._pictures(slide)
+        assert picture.image.content_type == "image/png"
+
+
+class TestTables:
+    TABLE = {
+        "header": ["Name", "**Bold** *it*", "`code`"],
+        "rows": [
+            ["x **y** [link](https://example.com)", "", "a<b & 'q'"],
+            ["*it*", "`co`", "[link](https://example.com)"],
+        ],
+    }
+
+    @staticmethod
+    def _rows(slide):
+        from lxml import etree
+        shape = next(sh for sh in slide.shapes if sh.has_table)
+        return [etree.tostring(tr) for tr in shape._element.graphic.graphicData.tbl.tr_lst]
+
+    def test_bulk_xml_matches_per_cell_styling(self, colors, fonts):
+        prs = _make_prs()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        convert.add_table_to_slide(slide, self.TABLE, Inches(1.5), colors, fonts)
+        bulk = self._rows(slide)
+
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        table = slide.shapes.add_table(3, 3, Inches(0.5), Inches(1.5), Inches(9), Inches(1.35)).table
+        for r, row in enumerate([self.TABLE["header"]] + self.TABLE["rows"]):
+            for c, text in enumerate(row):
+                convert.style_table_cell(table.cell(r, c), text, is_header=r == 0, colors=colors, fonts=fonts)
+                if not text:  # the bulk builder leaves empty cells without a run
+                    p = table.cell(r, c).text_frame.paragraphs[0]._p
+                    p.remove(p.r_lst[0])
+        assert bulk == self._rows(slide)
+
+    def test_font_names_are_escaped(self, colors):
+        fonts = {"body": 'A"B & <C>', "code": "Mono's"}
+        prs = _make_prs()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        convert.add_table_to_slide(slide, {"header": ['say "hi"'], "rows": [["`x`"]]},
+                                   Inches(1.5), colors, fonts)
+        table = next(sh for sh in slide.shapes if sh.has_table).table
+        assert table.cell(0, 0).text == 'say "hi"'
+        assert table.cell(0, 0).text_frame.paragraphs[0].runs[0].font.name == 'A"B & <C>'
+        assert table.cell(1, 0).text_frame.paragraphs[0].runs[0].font.name == "Mono's"
+
+    def test_links_share_one_relationship(self, colors, fonts):
+        prs = _make_prs()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        convert.add_table_to_slide(slide, self.TABLE, Inches(1.5), colors, fonts)
+        links = [r for r in slide.part.rels.values() if r.is_external]
+        assert [r.target_ref for r in links] == ["https://example.com"]
+
+
+class TestPagination:
+    @staticmethod
+    def _slide(n_rows, before=(), after=()):
+        table = {"type": "table", "header": ["id", "name"],
+                 "rows": [[str(i), f"row {i}"] for i in range(n_rows)]}
+        return {"title": "## Report", "subtitle": None, "notes": "speak",
+                "content": [*before, table, *after], "is_section": False,
+                "section": "S", "section_idx": 1}
+
+    def test_short_table_is_untouched(self):
+        slide = self._slide(3)
+        assert convert.paginate_slides([slide]) == [slide]
+
+    def test_long_table_continues_with_header(self):
+        text = {"type": "text", "text": "after", "indent": 0}
+        pages = convert.paginate_slides([self._slide(100, after=[text])])
+        assert len(pages) > 1
+        assert pages[0]["title"] == "## Report" and pages[0]["notes"] == "speak"
+        assert all(p["title"] == "## Report (cont.)" and p["notes"] is None for p in pages[1:])
+        assert {(p["section"], p["section_idx"]) for p in pages} == {("S", 1)}
+        tables = [item for p in pages for item in p["content"] if item["type"] == "table"]
+        assert all(t["header"] == ["id", "name"] for t in tables)
+        assert [row for t in tables for row in t["rows"]] == [[str(i), f"row {i}"] for i in range(100)]
+        for t in tables:
+            assert convert.CONTENT_TOP_IN + sum(convert.table_row_heights(t)) <= convert.CONTENT_BOTTOM_IN
+        assert pages[-1]["content"][-1] == text
+
+    def test_table_moves_below_full_page(self):
+        code = {"type": "codeblock", "lang": "", "content": "\n".join("x" * 14)}
+        pages = convert.paginate_slides([self._slide(3, before=[code])])
+        assert [item["type"] for item in pages[0]["content"]] == ["codeblock"]
+        assert [item["type"] for item in pages[1]["content"]] == ["table"]
+
+    def test_long_code_block_splits_between_lines(self, fonts):
+        lines = [f"line_{i} = {i}" for i in range(80)]
+        slide = self._slide(0, before=[{"type": "codeblock", "lang": "python", "content": "\n".join(lines)}])
+        slide["content"].pop()  # drop the empty table
+        pages = convert.paginate_slides([slide], fonts)
+        assert len(pages) == 6
+        assert pages[0]["notes"] == "speak" and all(p["notes"] is None for p in pages[1:])
+        parts = [p["content"][0]["content"].split("\n") for p in pages]
+        assert [line for part in parts for line in part] == lines
+        assert all(convert.slide_overflow_in(p, fonts) == 0.0 for p in pages)
+
+    def test_short_code_block_moves_whole(self, fonts):
+        text = [{"type": "text", "text": f"para {i}", "indent": 0} for i in range(6)]
+        code = {"type": "codeblock", "lang": "", "content": "\n".join("y" * 8)}
+        slide = {"title": "## T", "subtitle": None, "notes": None, "is_section": False,
+                 "content": [*text, code]}
+        pages = convert.paginate_slides([slide], fonts)
+        assert [p["content"] for p in pages] == [text, [code]]
+
+    def test_bullets_split_between_items(self, fonts):
+        bullets = [{"type": "bullet", "text": f"point {i}", "indent": i % 2} for i in range(40)]
+        slide = {"title": "## Points", "subtitle": None, "notes": "n", "is_section": False,
+                 "content": bullets, "section": "S", "section_idx": 2}
+        pages = convert.paginate_slides([slide], fonts)
+        assert len(pages) > 1
+        assert [b for p in pages for b in p["content"]] == bullets
+        assert all(convert.slide_overflow_in(p, fonts) == 0.0 for p in pages)
+        assert {p["section_idx"] for p in pages} == {2}
+
+    def test_text_only_parts_are_measured_as_placeholder_text(self, fonts):
+        bullets = [{"type": "bullet", "text": "a fairly long point " * 6, "indent": 0} for _ in range(8)]
+        code = {"type": "codeblock", "lang": "", "content": "x = 1"}
+        slide = {"title": "## T", "subtitle": None, "notes": None, "is_section": False,
+                 "content": [*bullets, code]}
+        pages = convert.paginate_slides([slide], fonts)
+        assert not any(convert._needs_explicit_layout(p["content"]) for p in pages[:-1])
+        assert all(convert.slide_overflow_in(p, fonts) == 0.0 for p in pages)
+
+    def test_section_counts_include_continuations(self):
+        import re
+        import zipfile
+        code = "\n".join(f"x = {i}" for i in range(40))
+        md = f"# A\n\n----\n\n## Code\n\n```\n{code}\n```\n\n---\n\n# B\n\n----\n\n## End\n\n- done\n"
+        with zipfile.ZipFile(io.BytesIO(convert.convert_markdown(md))) as z:
+            xml = z.read("ppt/presentation.xml").decode()
+        sections = re.findall(r'<p14:section name="([^"]+)".*?</p14:section>', xml, re.S)
+        counts = [len(re.findall(r"<p14:sldId ", body))
+                  for body in re.findall(r"<p14:sldIdLst>(.*?)</p14:sldIdLst>", xml, re.S)]
+        assert sections == ["A", "B"]
+        assert counts == [4, 2]  # A, then the 40 code lines at 14 per slide
+
+    def test_wrapped_cells_make_taller_rows(self):
+        heights = convert.table_row_heights({"header": ["a", "b"], "rows": [["x"], ["word " * 40, ""]]})
+        assert heights[0] == heights[1] == convert.TABLE_ROW_MIN_IN
+        assert heights[2] > 2 * convert.TABLE_ROW_MIN_IN
+
+    def test_rendered_deck_has_continuation_slides(self):
+        rows = "\n".join(f"| {i} | v |" for i in range(40))
+        data = convert.convert_markdown(f"## T\n\n| k | v |\n|---|---|\n{rows}\n")
+        slides = Presentation(io.BytesIO(data)).slides
+        assert len(slides) > 1
+        for slide in slides:
+            table = next(sh for sh in slide.shapes if sh.has_table)
+            assert table.top + table.height <= Inches(convert.CONTENT_BOTTOM_IN)
+            assert table.table.cell(0, 0).text == "k"
+
+
+class TestLayoutEstimate:
+    @staticmethod
+    def _slide(*content):
+        return {"title": "## T", "subtitle": None, "content": list(content),
+                "notes": None, "is_section": False}
+
+    def test_short_slide_fits(self, fonts):
+        slide = self._slide({"type": "bullet", "text": "one", "indent": 0},
+                            {"type": "codeblock", "lang": "", "content": "x = 1"})
+        assert convert.slide_overflow_in(slide, fonts) == 0.0
+
+    def test_long_code_block_overflows(self, fonts):
+        code = "\n".join(f"line_{i} = {i}" for i in range(80))
+        overflow = convert.slide_overflow_in(self._slide({"type": "codeblock", "lang": "", "content": code}), fonts)
+        assert overflow == pytest.approx(80 * 0.22 + 0.3 - convert.CODE_MAX_HEIGHT_IN)
+
+    def test_many_bullets_overflow(self, fonts):
+        bullets = [{"type": "bullet", "text": f"point {i}", "indent": 0} for i in range(30)]
+        assert convert.slide_overflow_in(self._slide(*bullets), fonts) > 0
+        assert convert.slide_overflow_in(self._slide(*bullets[:5]), fonts) == 0.0
+
+    @pytest.mark.parametrize("n_cols", [45, 60])
+    def test_very_wide_table(self, n_cols):
+        header = "|" + "|".join(f"h{i}" for i in range(n_cols)) + "|"
+        rule = "|" + "---|" * n_cols
+        row = "|" + "|".join("cell" for _ in range(n_cols)) + "|"
+        md = f"## Wide\n\n{header}\n{rule}\n{row}\n"
+        heights = convert.table_row_heights({"header": header.strip("|").split("|"),
+                                             "rows": [row.strip("|").split("|")]})
+        assert all(h > 0 for h in heights)
+        data = convert.convert_markdown(md)
+        assert len(Presentation(io.BytesIO(data)).slides) >= 1
+
+    def test_text_box_grows_with_wrapped_text(self, colors, fonts):
+        prs = _make_prs()
+        slide = add_content_slide(prs, self._slide(
+            {"type": "text", "text": "short", "indent": 0},
+            {"type": "text", "text": "long words " * 40, "indent": 0},
+            {"type": "codeblock", "lang": "", "content": "x"},
+        ), colors, fonts)
+        short, long_ = [sh for sh in slide.shapes if sh.has_text_frame and not sh.is_placeholder][:2]
+        assert short.height == Inches(convert.TEXT_ITEM_MIN_IN)
+        assert long_.top == short.top + short.height
+        assert long_.height > 2 * short.height
+
+
 class TestAddFormattedRuns:
     def test_bold_run(self, colors, fonts):
         prs = _make_prs()
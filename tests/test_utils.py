@@ -1,6 +1,7 @@
+import pytest
 from pptx.dml.color import RGBColor
 
-from convert import hex_to_rgb, parse_inline_formatting
+from convert import hex_to_rgb, parse_inline_formatting, text_metrics
 
 
 class TestHexToRgb:
@@ -54,3 +55,30 @@ class TestParseInlineFormatting:
     def test_empty_string(self):
         result = parse_inline_formatting("")
         assert result == [{"text": "", "type": "text"}]
+
+
+class TestTextMetrics:
+    def test_monospace_width(self):
+        metrics = text_metrics("Consolas", 12)
+        assert metrics.width_in("abcd") == pytest.approx(4 * 0.6 * 12 / 72)
+        assert metrics.width_in("WWWW") == metrics.width_in("iiii")
+
+    def test_proportional_width(self):
+        metrics = text_metrics("Arial", 10)
+        assert metrics.width_in("WWWW") > metrics.width_in("iiii")
+        assert metrics.width_in("漢字") == pytest.approx(2 * 10 / 72)
+
+    def test_shared_instances(self):
+        assert text_metrics("Calibri", 15) is text_metrics("Calibri", 15)
+        assert text_metrics("Calibri", 15) is not text_metrics("Calibri", 16)
+
+    def test_wraps_at_spaces(self):
+        metrics = text_metrics("Consolas", 12)
+        word = metrics.width_in("word")
+        assert metrics.line_count("word " * 10, word * 3) == 5  # two words per line
+        assert metrics.line_count("word word", word * 10) == 1
+        assert metrics.line_count("a\nb\n", 10.0) == 3
+
+    def test_breaks_long_words(self):
+        metrics = text_metrics("Consolas", 12)
+        assert metrics.line_count("x" * 100, metrics.width_in("x" * 30)) == 4